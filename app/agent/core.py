@@ -1,7 +1,10 @@
+import asyncio
 from langchain.agents import Tool, AgentExecutor, create_openai_functions_agent
 from app.tools import website_tool, db_tool, job_tool, enterprise_tool
 from app.llm import llm
 from app.utils import clean_html
+from app.utils.lazy import Lazy
+from app.utils.metrics import metrics_callback, set_route, track
 from app.utils.api_client import get_enterprise_details, get_profile_details
 from .prompt import (
     agent_prompt,
@@ -9,43 +12,54 @@ from .prompt import (
     website_content_prompt,
     enterprise_search_prompt,
 )
-from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from langchain_core.messages import HumanMessage, AIMessage
 
 
-class JobSearch(BaseModel):
-    """Search for jobs based on different criteria."""
+def create_executor(tools: list, prompt) -> AgentExecutor:
+    agent = create_openai_functions_agent(llm, tools, prompt)
+    return AgentExecutor(agent=agent, tools=tools, verbose=False)
 
-    query: str = Field(..., description="Search query for job search")
 
-
-# Create specialized agents
-job_search_agent = create_openai_functions_agent(
-    llm, [job_tool, db_tool], job_search_prompt
-)
-job_search_executor = AgentExecutor(
-    agent=job_search_agent, tools=[job_tool, db_tool], verbose=False
-)
-
-enterprise_search_agent = create_openai_functions_agent(
-    llm, [enterprise_tool, db_tool], enterprise_search_prompt
+# Specialized agents, built on first use
+job_search_executor = Lazy(
+    "job_search_executor",
+    lambda: create_executor([job_tool, db_tool], job_search_prompt),
 )
-enterprise_search_executor = AgentExecutor(
-    agent=enterprise_search_agent, tools=[enterprise_tool, db_tool], verbose=False
+enterprise_search_executor = Lazy(
+    "enterprise_search_executor",
+    lambda: create_executor([enterprise_tool, db_tool], enterprise_search_prompt),
 )
-
-website_content_agent = create_openai_functions_agent(
-    llm, [website_tool, db_tool], website_content_prompt
-)
-website_content_executor = AgentExecutor(
-    agent=website_content_agent, tools=[website_tool, db_tool], verbose=False
+website_content_executor = Lazy(
+    "website_content_executor",
+    lambda: create_executor([website_tool, db_tool], website_content_prompt),
 )
 
 # General agent for fallback or uncertain cases
 tools = [website_tool, job_tool, db_tool]
-agent = create_openai_functions_agent(llm, tools, agent_prompt)
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
+agent = Lazy("agent", lambda: create_openai_functions_agent(llm, tools, agent_prompt))
+agent_executor = Lazy(
+    "agent_executor",
+    lambda: AgentExecutor(agent=agent.get(), tools=tools, verbose=False),
+)
+
+_agents = [
+    job_search_executor,
+    enterprise_search_executor,
+    website_content_executor,
+    agent,
+    agent_executor,
+]
+
+
+def reset_agents():
+    """
+    Rebuild the agents on next use. The tool descriptions are copied into the
+    agents' function definitions when they are built (e.g. the Database
+    tool's schema), so they only see a changed description once rebuilt.
+    """
+    for lazy in _agents:
+        lazy.reset()
 
 
 def summarize_profile_info(profileId: Optional[str] = None) -> str:
@@ -97,6 +111,52 @@ Addresses: {", ".join([a.get('mixedAddress') for a in addresses]) if len(address
     return additional_content
 
 
+def classification_prompt(query: str) -> str:
+    # Use a classification approach instead of simple keyword matching
+    # Here we'll use the LLM to determine the most appropriate agent
+    return f"""
+    Analyze this user query: "{query}"
+    
+    Based on the query content, determine which category it best fits into:
+    1. "job_search" - for queries about finding jobs, job descriptions, requirements, salary information, etc.
+    2. "enterprise_search" - for queries about companies, organizations, employers, etc.
+    3. "website_content" - for queries about the website itself, help pages, terms, etc.
+    4. "general" - for queries that don't clearly fit the above categories or span multiple categories
+    
+    Return only one of these four options, no explanation: job_search, enterprise_search, website_content, or general
+    """
+
+
+# Executor for each classification, with the text introducing the user's
+# profile when the agent gets it
+_ROUTES = [
+    (
+        "job_search",
+        job_search_executor,
+        "\nYou have to follow these additional information for best response",
+    ),
+    (
+        "enterprise_search",
+        enterprise_search_executor,
+        "\n[ADDITIONAL INFO] Use these information for best response",
+    ),
+    ("website_content", website_content_executor, None),
+]
+
+
+def select_agent(classification: str):
+    """Return the route name, executor and profile introduction for a classification."""
+    for name, executor, profile_intro in _ROUTES:
+        if name in classification:
+            return name, executor, profile_intro
+    # Default to the general agent for uncertain cases
+    return "general", agent_executor, None
+
+
+def _with_profile(query: str, profile_intro: str, profile_content: str) -> str:
+    return query + profile_intro + profile_content if profile_content else query
+
+
 # Router function to direct queries to the appropriate specialized agent
 def route_to_agent(
     query: str,
@@ -114,55 +174,51 @@ def route_to_agent(
     Returns:
         The response from the appropriate agent
     """
-    # Use a classification approach instead of simple keyword matching
-    # Here we'll use the LLM to determine the most appropriate agent
-    prompt = f"""
-    Analyze this user query: "{query}"
-    
-    Based on the query content, determine which category it best fits into:
-    1. "job_search" - for queries about finding jobs, job descriptions, requirements, salary information, etc.
-    2. "enterprise_search" - for queries about companies, organizations, employers, etc.
-    3. "website_content" - for queries about the website itself, help pages, terms, etc.
-    4. "general" - for queries that don't clearly fit the above categories or span multiple categories
-    
-    Return only one of these four options, no explanation: job_search, enterprise_search, website_content, or general
-    """
-
     # Get classification from LLM
-    classification_response = llm.invoke(prompt)
-    classification = classification_response.content.strip().lower()
-
-    chat_history = chat_history or []
-
-    # Route based on classification
-    if "job_search" in classification:
-        profile_content = summarize_profile_info(profileId=profileId)
-        full_query = (
-            query
-            + "\nYou have to follow these additional information for best response"
-            + profile_content
-            if profile_content
-            else query
-        )
-        return job_search_executor.invoke(
-            {"input": full_query, "chat_history": chat_history}
-        )
-    elif "enterprise_search" in classification:
+    with track("classification", "intent"):
+        classification_response = llm.invoke(classification_prompt(query))
+        classification = classification_response.content.strip().lower()
+        route, executor, profile_intro = select_agent(classification)
+        set_route(route)
+
+    full_query = query
+    if profile_intro:
         profile_content = summarize_profile_info(profileId=profileId)
-        full_query = (
-            query
-            + "\n[ADDITIONAL INFO] Use these information for best response"
-            + profile_content
-            if profile_content
-            else query
+        full_query = _with_profile(query, profile_intro, profile_content)
+    with track("agent", route):
+        return executor.invoke(
+            {"input": full_query, "chat_history": chat_history or []},
+            config={"callbacks": [metrics_callback]},
         )
-        return enterprise_search_executor.invoke(
-            {"input": full_query, "chat_history": chat_history}
+
+
+async def aroute_to_agent(
+    query: str,
+    chat_history: List = None,
+    profileId: Optional[str] = None,
+    enterpriseId: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    route_to_agent on the event loop.
+
+    The LLM calls and the vector searches are awaited, so a conversation
+    does not hold a worker thread while waiting on them.
+    """
+    with track("classification", "intent"):
+        classification_response = await llm.ainvoke(classification_prompt(query))
+        classification = classification_response.content.strip().lower()
+        route, executor, profile_intro = select_agent(classification)
+        set_route(route)
+
+    full_query = query
+    if profile_intro:
+        # The profile API client is blocking
+        profile_content = await asyncio.to_thread(
+            summarize_profile_info, profileId=profileId
         )
-    elif "website_content" in classification:
-        return website_content_executor.invoke(
-            {"input": query, "chat_history": chat_history}
+        full_query = _with_profile(query, profile_intro, profile_content)
+    with track("agent", route):
+        return await executor.ainvoke(
+            {"input": full_query, "chat_history": chat_history or []},
+            config={"callbacks": [metrics_callback]},
         )
-    else:
-        # Default to the general agent for uncertain cases
-        return agent_executor.invoke({"input": query, "chat_history": chat_history})
@@ -54,7 +54,7 @@ job_search_prompt = ChatPromptTemplate.from_messages(
 
             For job search queries:
             1. If the query is not detailed enough, ask the user for more specific requirements (skills, location, experience level, etc.).
-            2. Use the JobSearch tool to find relevant jobs.
+            2. Use the JobSearch tool to find relevant jobs. Pass the location, job types, experience range, salary range (USD) and industries the user asked for as the tool's filters instead of only writing them into the query.
             3. Find at most 2 jobs that:
             - Are active jobs
             - Are from active companies
@@ -1,5 +1,8 @@
 import os
 from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Base directory for file paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,6 +28,17 @@ DB_CONFIG_VECTOR = {
 DATASET_PATH = os.getenv("DATASET_PATH", str(BASE_DIR / "data" / "jobs.csv"))
 OUTPUT_PATH = os.getenv("OUTPUT_PATH", str(BASE_DIR / "data" / "related_jobs.csv"))
 MODEL_PATH = os.getenv("MODEL_PATH", str(BASE_DIR / "models"))
+# At startup the persisted related-jobs model is served as is; it is retrained
+# in the background when missing or older than this
+JOB_MODEL_MAX_AGE_HOURS = float(os.getenv("JOB_MODEL_MAX_AGE_HOURS", "24"))
+# One process trains (Postgres advisory lock on the main database), the others
+# reload the artifact when its version changes. Replicas not sharing MODEL_PATH
+# see a newer version in the main database and train their own copy.
+JOB_MODEL_RELOAD_SECONDS = float(os.getenv("JOB_MODEL_RELOAD_SECONDS", "60"))
+# A run starting this soon after another process trained is skipped
+JOB_TRAINING_MIN_INTERVAL_MINUTES = float(
+    os.getenv("JOB_TRAINING_MIN_INTERVAL_MINUTES", "60")
+)
 
 # API and frontend configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -42,6 +56,153 @@ VECTOR_DB_AUTOLOAD = os.getenv("VECTOR_DB_AUTOLOAD", "true").lower() == "true"
 VECTOR_DB_SYNCHRONIZE = os.getenv("VECTOR_DB_SYNCHRONIZE", "true").lower() == "true"
 VECTOR_DB_LOGGING = os.getenv("VECTOR_DB_LOGGING", "false").lower() == "true"
 
+# Embedding settings
+# "local" loads the model in every process, "worker" uses the shared embedding worker
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local").lower()
+# The worker speaks pickle: its socket is only accessible to the owner (0600)
+# in a private directory, and clients must know the key, which has no default
+EMBEDDING_WORKER_SOCKET = os.getenv("EMBEDDING_WORKER_SOCKET") or os.path.join(
+    os.getenv("XDG_RUNTIME_DIR") or str(BASE_DIR / "data" / "run"),
+    "jobcompass-embeddings.sock",
+)
+EMBEDDING_WORKER_AUTHKEY = os.getenv("EMBEDDING_WORKER_AUTHKEY", "").encode()
+EMBEDDING_TORCH_THREADS = int(os.getenv("EMBEDDING_TORCH_THREADS", "0"))
+# "none" (fp32) or "int8" (dynamically quantized, CPU only)
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "none").lower()
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "2048"))
+EMBEDDING_BATCHING_ENABLED = (
+    os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+# Batch embedding endpoints (/embedding/jobs:batch, /embedding/enterprises:batch)
+EMBEDDING_BATCH_REQUEST_MAX_ITEMS = int(
+    os.getenv("EMBEDDING_BATCH_REQUEST_MAX_ITEMS", "1000")
+)
+DOCUMENT_BUILD_WORKERS = int(os.getenv("DOCUMENT_BUILD_WORKERS", "4"))
+
+# Durable queue for /embedding writes, updates to the same document coalesce
+WRITE_QUEUE_PATH = os.getenv(
+    "WRITE_QUEUE_PATH", str(BASE_DIR / "data" / "write_queue.sqlite3")
+)
+WRITE_QUEUE_BATCH_SIZE = int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "64"))
+WRITE_QUEUE_DEBOUNCE_SECONDS = float(os.getenv("WRITE_QUEUE_DEBOUNCE_SECONDS", "2"))
+# A document updated more often than the debounce is written this long after
+# its first pending update anyway
+WRITE_QUEUE_MAX_DELAY_SECONDS = float(os.getenv("WRITE_QUEUE_MAX_DELAY_SECONDS", "30"))
+WRITE_QUEUE_POLL_SECONDS = float(os.getenv("WRITE_QUEUE_POLL_SECONDS", "1"))
+WRITE_QUEUE_CLAIM_TIMEOUT_SECONDS = float(
+    os.getenv("WRITE_QUEUE_CLAIM_TIMEOUT_SECONDS", "300")
+)
+# Failed writes are retried after RETRY_SECONDS, doubling each time, then moved
+# to the dead_writes table once MAX_ATTEMPTS writes have failed
+WRITE_QUEUE_MAX_ATTEMPTS = int(os.getenv("WRITE_QUEUE_MAX_ATTEMPTS", "5"))
+WRITE_QUEUE_RETRY_SECONDS = float(os.getenv("WRITE_QUEUE_RETRY_SECONDS", "10"))
+
+# Vector database connection pool, per engine (one sync, one async psycopg 3)
+VECTOR_DB_POOL_SIZE = int(os.getenv("VECTOR_DB_POOL_SIZE", "5"))
+VECTOR_DB_MAX_OVERFLOW = int(os.getenv("VECTOR_DB_MAX_OVERFLOW", "10"))
+VECTOR_DB_POOL_TIMEOUT = float(os.getenv("VECTOR_DB_POOL_TIMEOUT", "30"))
+
+# Vector search settings
+# "exact" scans full-precision vectors, "binary" reranks Hamming candidates
+VECTOR_SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "exact").lower()
+BINARY_SEARCH_OVERSAMPLE = int(os.getenv("BINARY_SEARCH_OVERSAMPLE", "10"))
+BINARY_INDEX_REFRESH_SECONDS = float(os.getenv("BINARY_INDEX_REFRESH_SECONDS", "300"))
+# Job and enterprise search fuse full-text and vector rankings (RRF)
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+HYBRID_SEARCH_CANDIDATES = int(os.getenv("HYBRID_SEARCH_CANDIDATES", "50"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+# Delta sync re-reads this window before the stored updated_at watermark
+DELTA_SYNC_OVERLAP_SECONDS = int(os.getenv("DELTA_SYNC_OVERLAP_SECONDS", "60"))
+
+# Blue/green rebuilds (scripts/rebuild.py)
+# A rebuilt collection smaller than this share of the live one is not made live
+REBUILD_MIN_COUNT_RATIO = float(os.getenv("REBUILD_MIN_COUNT_RATIO", "0.5"))
+REBUILD_KEEP_VERSIONS = int(os.getenv("REBUILD_KEEP_VERSIONS", "1"))
+# How long the version of a deleted document is kept to refuse late writes of
+# older versions, pruned by the rebuild's garbage collection
+DELETED_VERSION_TTL_HOURS = float(os.getenv("DELETED_VERSION_TTL_HOURS", "24"))
+# Rows per pipeline batch and batches buffered between pipeline stages
+REBUILD_FETCH_SIZE = int(os.getenv("REBUILD_FETCH_SIZE", "256"))
+REBUILD_QUEUE_SIZE = int(os.getenv("REBUILD_QUEUE_SIZE", "4"))
+
+# Approximate nearest neighbour indexes, one partial index per collection
+# "hnsw", "ivfflat" or "none"
+VECTOR_INDEX_METHOD = os.getenv("VECTOR_INDEX_METHOD", "hnsw").lower()
+VECTOR_INDEX_AUTO_CREATE = (
+    os.getenv("VECTOR_INDEX_AUTO_CREATE", "false").lower() == "true"
+)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+# pgvector 0.8+: "relaxed_order" keeps scanning until filtered searches fill k,
+# unfiltered searches are unaffected. "off" disables it, older pgvector ignores it
+HNSW_ITERATIVE_SCAN = os.getenv("HNSW_ITERATIVE_SCAN", "relaxed_order").lower()
+# 0 sizes the lists from the collection (rows / 1000, at least 1)
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "0"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+
+# Database tool: column cache of the allow-listed tables, refreshed on a schedule
+SQL_SCHEMA_CACHE_PATH = os.getenv(
+    "SQL_SCHEMA_CACHE_PATH", str(BASE_DIR / "data" / "sql_schema.json")
+)
+SQL_SCHEMA_REFRESH_HOURS = float(os.getenv("SQL_SCHEMA_REFRESH_HOURS", "24"))
+# Database tool queries run read only on a small pool with a statement timeout,
+# are refused above an EXPLAIN cost estimate and return a bounded result
+SQL_POOL_SIZE = int(os.getenv("SQL_POOL_SIZE", "5"))
+# How long a query waits for a free pool connection before it is refused
+SQL_POOL_TIMEOUT_SECONDS = float(os.getenv("SQL_POOL_TIMEOUT_SECONDS", "10"))
+SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", "5000"))
+SQL_MAX_QUERY_COST = float(os.getenv("SQL_MAX_QUERY_COST", "100000"))
+SQL_MAX_ROWS = int(os.getenv("SQL_MAX_ROWS", "50"))
+SQL_RESULT_MAX_TOKENS = int(os.getenv("SQL_RESULT_MAX_TOKENS", "2000"))
+# Login role of the Database tool, granted SELECT on the allow-listed columns
+# only (scripts/sql_tool_role.py). It is the access boundary: with it the
+# query check is advisory. Defaults to the main database user, with a warning
+# at startup, and the query check then refuses what it cannot verify.
+SQL_TOOL_RESTRICTED_ROLE = bool(os.getenv("SQL_TOOL_DB_USERNAME"))
+DB_CONFIG_SQL_TOOL = {
+    **DB_CONFIG_PRIMARY,
+    "user": os.getenv("SQL_TOOL_DB_USERNAME") or DB_CONFIG_PRIMARY["user"],
+    "password": os.getenv("SQL_TOOL_DB_PASSWORD") or DB_CONFIG_PRIMARY["password"],
+}
+# Database tool result cache, keyed by normalized SQL. An entry expires after
+# the shortest TTL of the tables it reads ("table=seconds,..."), 0 disables
+SQL_CACHE_SIZE = int(os.getenv("SQL_CACHE_SIZE", "512"))
+SQL_CACHE_DEFAULT_TTL_SECONDS = float(os.getenv("SQL_CACHE_DEFAULT_TTL_SECONDS", "300"))
+SQL_CACHE_TABLE_TTLS = {
+    table.strip(): float(seconds)
+    for table, seconds in (
+        item.split("=")
+        for item in os.getenv(
+            "SQL_CACHE_TABLE_TTLS", "categories=3600,tags=3600,addresses=3600"
+        ).split(",")
+        if item.strip()
+    )
+}
+
+# Startup: build the embedding model, vector stores, SQL schema and agents in
+# the background after startup instead of on the first request
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+
+# Request tracing: Server-Timing header on every response. The debug payload
+# (?debug=true) and the sampling profiler (?profile=true) of /conversation/ask
+# need an X-Debug-Token header matching DEBUG_TOKEN, unset disables them
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+
+# Conversation session settings
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+SESSION_DB_POOL_SIZE = int(os.getenv("SESSION_DB_POOL_SIZE", "5"))
+# Postgres sessions: messages older than this are deleted hourly, 0 keeps them
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "168"))
+
 # Validate required environment variables
 REQUIRED_ENV_VARS = [
     "MAIN_DB_DATABASE",
@@ -56,4 +217,6 @@ REQUIRED_ENV_VARS = [
 ]
 for var in REQUIRED_ENV_VARS:
     if not os.getenv(var):
-        raise ValueError(f"Environment variable {var} is not set")
\ No newline at end of file
+        raise ValueError(f"Environment variable {var} is not set")
+if EMBEDDING_BACKEND == "worker" and not EMBEDDING_WORKER_AUTHKEY:
+    raise ValueError("Environment variable EMBEDDING_WORKER_AUTHKEY is not set")
\ No newline at end of file
@@ -1,4 +1,4 @@
 from .openai import llm
-from .embeddings import embeddings_model
+from .embeddings import embeddings_model, embedding_stats
 
-__all__ = ["llm", "embeddings_model"]
+__all__ = ["llm", "embeddings_model", "embedding_stats"]
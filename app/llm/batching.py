@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _EmbeddingRequest:
+    def __init__(self, kind: str, texts: List[str]):
+        self.kind = kind
+        self.texts = texts
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[List[List[float]]] = None
+        self.error: Optional[BaseException] = None
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Coalesce concurrent embedding calls into one model batch.
+
+    Callers block while a dispatcher thread collects requests for up to
+    ``max_wait_ms`` (or until ``max_batch_size`` texts are queued), runs them
+    through the wrapped model in a single call and hands each caller its slice
+    of the result.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[_EmbeddingRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+        self._max_batch_size_seen = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._submit("documents", list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit("query", [text])[0]
+
+    def _submit(self, kind: str, texts: List[str]) -> List[List[float]]:
+        self._ensure_started()
+        request = _EmbeddingRequest(kind, texts)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-dispatcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[_EmbeddingRequest]:
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Queries and documents use the same encode settings, but keep them
+            # apart so a different query prompt can be configured later
+            for kind in ("query", "documents"):
+                requests = [r for r in batch if r.kind == kind]
+                if requests:
+                    self._process(kind, requests)
+
+    def _process(self, kind: str, requests: List[_EmbeddingRequest]):
+        started = time.perf_counter()
+        texts = [text for request in requests for text in request.texts]
+        try:
+            if kind == "query" and len(texts) == 1:
+                vectors = [self.embeddings.embed_query(texts[0])]
+            else:
+                vectors = self.embeddings.embed_documents(texts)
+        except BaseException as e:
+            logger.error(f"Error embedding batch of {len(texts)} texts: {str(e)}")
+            for request in requests:
+                request.error = e
+                request.done.set()
+            return
+
+        offset = 0
+        for request in requests:
+            request.result = vectors[offset : offset + len(request.texts)]
+            offset += len(request.texts)
+            request.done.set()
+
+        delays = [started - request.enqueued_at for request in requests]
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(requests)
+            self._texts += len(texts)
+            self._max_batch_size_seen = max(self._max_batch_size_seen, len(texts))
+            self._queue_delay_total += sum(delays)
+            self._queue_delay_max = max(self._queue_delay_max, max(delays))
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "texts": self._texts,
+                "avg_batch_size": self._texts / self._batches if self._batches else 0,
+                "max_batch_size_seen": self._max_batch_size_seen,
+                "avg_queue_delay_ms": (
+                    self._queue_delay_total / self._requests * 1000
+                    if self._requests
+                    else 0
+                ),
+                "max_queue_delay_ms": self._queue_delay_max * 1000,
+            }
@@ -0,0 +1,150 @@
+"""
+Shared embedding worker.
+
+Run one worker per host with ``python -m app.llm.embedding_worker``; it owns the
+embedding model and serves every API process that sets
+``EMBEDDING_BACKEND=worker`` over a Unix socket.
+"""
+
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, List
+
+from langchain_core.embeddings import Embeddings
+
+from app.config.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_WORKER_AUTHKEY,
+    EMBEDDING_WORKER_SOCKET,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embedding client that forwards calls to the shared embedding worker."""
+
+    def __init__(self, socket_path: str, authkey: bytes):
+        self.socket_path = socket_path
+        self.authkey = authkey
+        # Connections are not thread-safe, keep one per thread
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, *message: Any) -> Any:
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send(message)
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                # The worker may have restarted, reconnect once
+                self._local.conn = None
+                if attempt == 1:
+                    raise ConnectionError(
+                        f"Embedding worker at {self.socket_path} is unavailable: {str(e)}"
+                    ) from e
+
+        if status != "ok":
+            raise RuntimeError(f"Embedding worker error: {payload}")
+        return payload
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._call("documents", list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call("query", text)
+
+    def stats(self) -> dict:
+        return self._call("stats")
+
+
+def _handle_connection(conn: Connection, embeddings: Embeddings):
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            try:
+                kind = message[0]
+                if kind == "query":
+                    result = ("ok", embeddings.embed_query(message[1]))
+                elif kind == "documents":
+                    result = ("ok", embeddings.embed_documents(message[1]))
+                elif kind == "stats":
+                    stats = getattr(embeddings, "stats", None)
+                    result = ("ok", stats() if stats else {})
+                else:
+                    result = ("error", f"Unknown request type: {kind}")
+            except Exception as e:
+                logger.error(f"Error serving embedding request: {str(e)}")
+                result = ("error", str(e))
+
+            try:
+                conn.send(result)
+            except (EOFError, OSError):
+                return
+
+
+def serve(
+    socket_path: str = EMBEDDING_WORKER_SOCKET,
+    authkey: bytes = EMBEDDING_WORKER_AUTHKEY,
+):
+    """Load the embedding model once and serve it over a Unix socket."""
+    from . import embeddings as embedding_module
+
+    if not authkey:
+        # Requests are unpickled, a guessable key lets any local user run code
+        raise ValueError("Environment variable EMBEDDING_WORKER_AUTHKEY is not set")
+
+    if EMBEDDING_BACKEND == "worker":
+        # API processes share this environment, the worker still owns the model
+        logger.info("Loading embedding model...")
+        embeddings = embedding_module.create_local_embeddings()
+    else:
+        # Load before accepting connections rather than on the first request
+        embeddings = embedding_module.embedding_backend.get()
+
+    os.makedirs(os.path.dirname(socket_path) or ".", mode=0o700, exist_ok=True)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    # Create the socket owner-only rather than fixing its mode after binding
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(socket_path, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+
+    with listener:
+        logger.info(f"Embedding worker listening on {socket_path}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Failed handshakes must not stop the worker
+                logger.warning(f"Rejected embedding worker connection: {str(e)}")
+                continue
+            threading.Thread(
+                target=_handle_connection, args=(conn, embeddings), daemon=True
+            ).start()
+
+
+if __name__ == "__main__":
+    serve()
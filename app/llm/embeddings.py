@@ -1,17 +1,187 @@
 # Enhanced embedding model with better job-specific capabilities
-from langchain_huggingface import HuggingFaceEmbeddings
-import torch
-
-
-embeddings_model = HuggingFaceEmbeddings(
-    model_name="Snowflake/snowflake-arctic-embed-m",
-    model_kwargs={
-        "device": "cuda" if torch.cuda.is_available() else "cpu",
-        "trust_remote_code": True,
-    },
-    encode_kwargs={
-        "normalize_embeddings": True,
-        "precision": "binary",
-        "batch_size": 32,
-    },
+import threading
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.config.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCHING_ENABLED,
+    EMBEDDING_BATCH_MAX_SIZE,
+    EMBEDDING_BATCH_MAX_WAIT_MS,
+    EMBEDDING_QUANTIZATION,
+    EMBEDDING_QUERY_CACHE_SIZE,
+    EMBEDDING_TORCH_THREADS,
+    EMBEDDING_WORKER_AUTHKEY,
+    EMBEDDING_WORKER_SOCKET,
+)
+from app.utils.lazy import Lazy
+from app.utils.metrics import track
+from .batching import BatchingEmbeddings
+from .embedding_worker import RemoteEmbeddings
+
+
+EMBEDDING_MODEL = "Snowflake/snowflake-arctic-embed-m"
+EMBEDDING_DIMENSIONS = 768
+
+
+def embedding_version(quantization: str = EMBEDDING_QUANTIZATION) -> str:
+    """Model and precision of the stored vectors, e.g. snowflake-arctic-embed-m/int8."""
+    precision = "float32" if quantization == "none" else quantization
+    return f"{EMBEDDING_MODEL.split('/')[-1]}/{precision}"
+
+
+# Stored vectors are only comparable when produced by the same model and
+# precision, switching EMBEDDING_QUANTIZATION changes every content hash. The
+# worker backend quantizes in the worker: give both the same setting.
+EMBEDDING_VERSION = embedding_version()
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case so equivalent queries share a cache entry."""
+    # arctic-embed-m uses an uncased tokenizer, lowercasing does not change the vector
+    return " ".join(text.split()).lower()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    LRU cache for query embeddings in front of another embedding model.
+
+    Document embeddings are passed through untouched, query embeddings are
+    keyed by normalized query text.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = 1024):
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track("embedding", "documents"):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        with track("embedding", "query"):
+            vector = self.embeddings.embed_query(key)
+
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def create_base_embeddings(quantization: str = EMBEDDING_QUANTIZATION) -> Embeddings:
+    """
+    Load the HuggingFace embedding model into this process.
+
+    Args:
+        quantization: "none" for fp32 inference, "int8" for dynamically
+            quantized linear layers (CPU only)
+    """
+    # Imported here so processes using the shared worker never load torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+    import torch
+
+    if EMBEDDING_TORCH_THREADS > 0:
+        torch.set_num_threads(EMBEDDING_TORCH_THREADS)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={
+            "device": device,
+            "trust_remote_code": True,
+        },
+        encode_kwargs={
+            "normalize_embeddings": True,
+            "precision": "float32",
+            "batch_size": 32,
+        },
+    )
+
+    if quantization == "int8":
+        if device != "cpu":
+            raise ValueError("int8 embedding quantization is only supported on CPU")
+        # Swap the transformer's Linear layers for int8 weights with dynamic
+        # activation quantization, the pooling/normalize steps stay in fp32
+        transformer = embeddings._client[0]
+        transformer.auto_model = torch.ao.quantization.quantize_dynamic(
+            transformer.auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    elif quantization != "none":
+        raise ValueError(f"Unsupported EMBEDDING_QUANTIZATION: {quantization}")
+
+    return embeddings
+
+
+def create_local_embeddings() -> Embeddings:
+    """Load the model, micro-batching concurrent callers when enabled."""
+    base_embeddings = create_base_embeddings()
+    if not EMBEDDING_BATCHING_ENABLED:
+        return base_embeddings
+    return BatchingEmbeddings(
+        base_embeddings,
+        max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+    )
+
+
+def create_embedding_backend() -> Embeddings:
+    if EMBEDDING_BACKEND == "worker":
+        return RemoteEmbeddings(EMBEDDING_WORKER_SOCKET, EMBEDDING_WORKER_AUTHKEY)
+    if EMBEDDING_BACKEND == "local":
+        return create_local_embeddings()
+    raise ValueError(f"Unsupported EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+
+if EMBEDDING_BACKEND not in ("worker", "local"):
+    raise ValueError(f"Unsupported EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+# Loading torch and the model takes seconds, it happens on first use or warm-up
+embedding_backend = Lazy("embedding_model", create_embedding_backend)
+
+embeddings_model = CachedQueryEmbeddings(
+    embedding_backend, max_size=EMBEDDING_QUERY_CACHE_SIZE
 )
+
+
+def embedding_stats() -> dict:
+    """Query cache and dispatcher statistics for monitoring."""
+    dispatcher_stats = (
+        getattr(embedding_backend, "stats", None)
+        if embedding_backend.initialized
+        else None
+    )
+    return {
+        "backend": EMBEDDING_BACKEND,
+        "query_cache": embeddings_model.stats(),
+        "dispatcher": dispatcher_stats() if dispatcher_stats else None,
+    }
@@ -1,31 +1,74 @@
 # app/main.py
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
 import logging
 import os
-import pickle
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import pandas as pd
 import psycopg2
 from pydantic import BaseModel
-from app.utils import setup_nltk_data
-from app.config.config import DB_CONFIG_PRIMARY, DATASET_PATH, MODEL_PATH
+from app.config.config import (
+    DB_CONFIG_PRIMARY,
+    DATASET_PATH,
+    JOB_MODEL_MAX_AGE_HOURS,
+    JOB_MODEL_RELOAD_SECONDS,
+    JOB_TRAINING_MIN_INTERVAL_MINUTES,
+    MODEL_PATH,
+    SERVER_TIMING_ENABLED,
+    SQL_SCHEMA_REFRESH_HOURS,
+    SQL_TOOL_RESTRICTED_ROLE,
+    VECTOR_INDEX_AUTO_CREATE,
+    WARM_UP_ON_STARTUP,
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize NLTK resources before any imports that depend on them
-logger.info("Initializing NLTK resources...")
-setup_nltk_data()
-
-# Now import modules that depend on NLTK
-from app.routers import chat_router, embedding_router, suggest_router
-from app.services.job_service import compute_related_jobs
+# NLTK data, the embedding model, vector stores, SQL schema and agents are
+# built on first use (see app.utils.lazy), importing them is cheap
+from app.agent.core import reset_agents
+from app.routers import (
+    chat_router,
+    embedding_router,
+    suggest_router,
+    health_router,
+    database_router,
+    metrics_router,
+)
+from app.services.job_service import (
+    compute_related_jobs,
+    job_model_version,
+    load_job_artifact,
+    record_job_model_version,
+    save_job_artifact,
+)
+from app.vectorstore import (
+    website_content_vector_store,
+    job_vector_store,
+    enterprise_vector_store,
+)
+from app.vectorstore.index import check_indexes
+from app.services.leader import advisory_lock, host_lock
+from app.services.session_store import session_store
+from app.services.sql_cache import sql_result_cache
+from app.services.sql_schema import schema_cache
+from app.services.warmup import warm_up_task
+from app.tools.database import database_tool_description, db_tool
+from app.services.write_queue import write_queue
+from app.utils import atomic_write
+from app.utils.tracing import start_trace
 
 load_dotenv()
 
@@ -42,9 +85,42 @@ class UserInput(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
-    logger.info("Running job_training once on startup...")
-    await run_job_training()
-    logger.info("Initial job_training run completed.")
+    # Build heavy dependencies in the background so the app is live right away,
+    # /health/ready reports when they are done
+    warm_up_task.start(
+        WARM_UP_ON_STARTUP,
+        after=lambda: check_indexes(
+            [website_content_vector_store, job_vector_store, enterprise_vector_store],
+            VECTOR_INDEX_AUTO_CREATE,
+        ),
+    )
+
+    write_queue.start()
+    sql_result_cache.start_listener()
+
+    # Serve the last persisted model right away, retrain in the background
+    # when there is none or it is too old
+    data = await load_job_model()
+    trained_at = data.get("trained_at") if data else None
+    max_age = JOB_MODEL_MAX_AGE_HOURS * 3600
+    if trained_at is None or time.time() - trained_at > max_age:
+        logger.info("Scheduling a background job_training run...")
+        scheduler.add_job(
+            run_job_training, id="job_training_startup", replace_existing=True
+        )
+
+    if not SQL_TOOL_RESTRICTED_ROLE:
+        logger.warning(
+            "SQL_TOOL_DB_USERNAME is not set: the Database tool runs agent SQL as the "
+            "main database user, guarded only by its query check. Create a restricted "
+            "role with scripts/sql_tool_role.py."
+        )
+
+    # The Database tool starts from the cached schema, refresh it when too old
+    if schema_cache.is_stale(SQL_SCHEMA_REFRESH_HOURS * 3600):
+        scheduler.add_job(
+            refresh_sql_schema, id="sql_schema_startup", replace_existing=True
+        )
 
     logger.info("Starting scheduler...")
     scheduler.add_job(
@@ -53,6 +129,24 @@ async def lifespan(app: FastAPI):
         id="job_training",
         replace_existing=True,
     )
+    scheduler.add_job(
+        reload_job_model,
+        trigger=IntervalTrigger(seconds=JOB_MODEL_RELOAD_SECONDS),
+        id="job_model_reload",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        refresh_sql_schema,
+        trigger=IntervalTrigger(hours=SQL_SCHEMA_REFRESH_HOURS),
+        id="sql_schema_refresh",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        prune_sessions,
+        trigger=IntervalTrigger(hours=1),
+        id="session_prune",
+        replace_existing=True,
+    )
     scheduler.start()
     logger.info("Scheduler started.")
 
@@ -63,6 +157,8 @@ async def lifespan(app: FastAPI):
         logger.info("Shutting down scheduler...")
         scheduler.shutdown()
         logger.info("Scheduler shut down.")
+        write_queue.stop()
+        sql_result_cache.stop_listener()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -75,10 +171,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    # Stages timed while handling the request (app.utils.metrics.track) are
+    # collected here and summed up in a Server-Timing header
+    trace = start_trace()
+    response = await call_next(request)
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 app.include_router(chat_router)
 app.include_router(embedding_router)
 app.include_router(suggest_router)
+app.include_router(health_router)
+app.include_router(database_router)
+app.include_router(metrics_router)
 
 
 # Fetch Jobs Function
@@ -186,7 +297,7 @@ def fetch_jobs():
         ]
         df = df[output_columns]
 
-        df.to_csv(DATASET_PATH, index=False)
+        atomic_write(DATASET_PATH, lambda f: df.to_csv(f, index=False))
         logger.info(f"Data saved to {DATASET_PATH} with {len(df)} rows")
         return df
     finally:
@@ -195,59 +306,178 @@ def fetch_jobs():
         logger.info("Database connection closed")
 
 
-async def run_job_training():
-    try:
-        logger.info("Starting job training cron job...")
-        # Fetch data from database
-        df = fetch_jobs()
-        if df.empty:
-            logger.warning("No jobs fetched from database")
+def set_job_model_state(data: dict):
+    app.state.job_model_trained_at = data.get("trained_at")
+    app.state.vectorizer = data["vectorizer"]
+    app.state.tfidf_matrix = data["tfidf_matrix"]
+    app.state.df = data["df"]
+    if data.get("hybrid_sim") is not None:
+        app.state.hybrid_sim = data["hybrid_sim"]
+
+
+def train_job_model():
+    # Every worker and replica schedules training, one of them runs it and the
+    # others pick up its artifact (see reload_job_model)
+    with advisory_lock("job_training") as leader:
+        if not leader:
+            logger.info("Another process is training the job model, skipping.")
+            return
+        trained_at = job_model_version()
+        if trained_at and time.time() - trained_at < JOB_TRAINING_MIN_INTERVAL_MINUTES * 60:
+            # A process whose schedule fired a little earlier already trained,
+            # reload_job_model picks up its model
+            logger.info("The job model was just trained by another process, skipping.")
             return
+        _train_job_model()
 
-        logger.info(f"Fetched DataFrame with {len(df)} jobs")
 
-        # Train the model
-        result = compute_related_jobs(df)
+def train_local_job_model():
+    # The workers of one host share MODEL_PATH: one of them trains, the
+    # others reload its artifact
+    with host_lock(os.path.join(MODEL_PATH, ".job_training.lock")) as leader:
+        if not leader:
+            logger.info("Another worker of this host is training the job model, skipping.")
+            return
+        data = load_job_artifact()
+        trained_at = data.get("trained_at") if data else None
+        latest = job_model_version()
+        if trained_at is not None and (latest is None or trained_at >= latest):
+            logger.info("Another worker of this host just trained the job model, skipping.")
+            return
+        _train_job_model(record_version=False)
 
-        # Check the result from compute_related_jobs
-        if isinstance(result, tuple):
-            if len(result) >= 3:
-                df, vectorizer, tfidf_matrix = result[:3]
-                hybrid_sim = result[3] if len(result) > 3 else None
-            else:
-                logger.error("compute_related_jobs returned insufficient values")
-                raise ValueError("compute_related_jobs did not return expected values")
+
+def _train_job_model(record_version: bool = True):
+    logger.info("Starting job training...")
+    # Fetch data from database
+    df = fetch_jobs()
+    if df.empty:
+        # Keep serving the previous model rather than an empty one
+        logger.warning("No jobs fetched from database")
+        return
+
+    logger.info(f"Fetched DataFrame with {len(df)} jobs")
+
+    # Train the model
+    result = compute_related_jobs(df)
+
+    # Check the result from compute_related_jobs
+    if isinstance(result, tuple):
+        if len(result) >= 3:
+            df, vectorizer, tfidf_matrix = result[:3]
+            hybrid_sim = result[3] if len(result) > 3 else None
         else:
-            df, vectorizer, tfidf_matrix = result
-            hybrid_sim = None
-
-        # Store variables in app.state
-        app.state.vectorizer = vectorizer
-        app.state.tfidf_matrix = tfidf_matrix
-        app.state.df = df
-        if hybrid_sim is not None:
-            app.state.hybrid_sim = hybrid_sim
-
-        # Save the new model to file
-        model_file_path = os.path.join(MODEL_PATH, "job_data.pkl")
-        logger.info(f"Saving new model to {model_file_path}...")
-        data_to_save = {
-            "df": df,
-            "vectorizer": vectorizer,
-            "tfidf_matrix": tfidf_matrix,
-        }
-        if hybrid_sim is not None:
-            data_to_save["hybrid_sim"] = hybrid_sim
-
-        os.makedirs(MODEL_PATH, exist_ok=True)
-        with open(model_file_path, "wb") as f:
-            pickle.dump(data_to_save, f)
-        logger.info(f"New model saved successfully to {model_file_path}")
-
-        logger.info("Job training cron job completed successfully.")
+            logger.error("compute_related_jobs returned insufficient values")
+            raise ValueError("compute_related_jobs did not return expected values")
+    else:
+        df, vectorizer, tfidf_matrix = result
+        hybrid_sim = None
+
+    data_to_save = {
+        "df": df,
+        "vectorizer": vectorizer,
+        "tfidf_matrix": tfidf_matrix,
+        "trained_at": time.time(),
+    }
+    if hybrid_sim is not None:
+        data_to_save["hybrid_sim"] = hybrid_sim
+
+    # Replaces the previous model atomically, readers never see a partial file
+    save_job_artifact(data_to_save)
+    set_job_model_state(data_to_save)
+    # Published after the artifact is in place, so a process sharing
+    # MODEL_PATH never sees a version newer than its file
+    if record_version:
+        record_job_model_version(data_to_save["trained_at"])
+    logger.info("Job training completed successfully.")
+
+
+async def run_job_training(local: bool = False):
+    """
+    Retrain in a worker thread, a failure keeps the previous model in service.
+
+    With local, one worker of this host trains its own copy without taking
+    the leader lock or publishing a new version (see reload_job_model).
+    """
+    if _training_lock.locked():
+        logger.info("Job training already running, skipping.")
+        return
+    async with _training_lock:
+        try:
+            if local:
+                await asyncio.to_thread(train_local_job_model)
+            else:
+                await asyncio.to_thread(train_job_model)
+        except Exception as e:
+            logger.error(f"Error in job training cron job: {str(e)}", exc_info=True)
+
+
+async def load_job_model() -> Optional[dict]:
+    """Serve the last persisted model, None if there is none or it cannot be read."""
+    try:
+        data = await asyncio.to_thread(load_job_artifact)
     except Exception as e:
-        logger.error(f"Error in job training cron job: {str(e)}", exc_info=True)
-        raise
+        logger.error(f"Error loading the persisted job model: {str(e)}", exc_info=True)
+        return None
+    if data is None:
+        logger.warning(
+            "No persisted job model yet, related jobs are unavailable until training completes."
+        )
+        return None
+    set_job_model_state(data)
+    return data
+
+
+async def reload_job_model():
+    """
+    Serve an artifact written by another process once its version changes.
+
+    When the local artifact is older than the newest version trained by any
+    process, MODEL_PATH is not shared with the trainer: one worker of this
+    host trains its own copy.
+    """
+    try:
+        data = await asyncio.to_thread(load_job_artifact)
+        latest = await asyncio.to_thread(job_model_version)
+    except Exception as e:
+        logger.error(f"Error reloading the job model: {str(e)}")
+        return
+    trained_at = data.get("trained_at") if data else None
+    if latest is not None and (trained_at is None or trained_at < latest):
+        logger.warning(
+            f"The job model in {MODEL_PATH} (trained at {trained_at}) is older than "
+            f"the one trained at {latest}, MODEL_PATH is not shared: retraining locally."
+        )
+        await run_job_training(local=True)
+        return
+    if data is None:
+        return
+    if trained_at != getattr(app.state, "job_model_trained_at", None):
+        set_job_model_state(data)
+        logger.info(f"Reloaded the job model trained at {data.get('trained_at')}")
+
+
+_training_lock = asyncio.Lock()
+
+
+async def refresh_sql_schema():
+    try:
+        await asyncio.to_thread(schema_cache.refresh)
+        db_tool.description = database_tool_description()
+        # The agents copied the old description when they were built
+        reset_agents()
+    except Exception as e:
+        logger.error(f"Error refreshing the SQL schema cache: {str(e)}")
+
+
+async def prune_sessions():
+    try:
+        await asyncio.to_thread(session_store.prune)
+    except Exception as e:
+        logger.error(f"Error pruning conversation sessions: {str(e)}")
 
 
 scheduler = AsyncIOScheduler()
+
+app.state.import_seconds = round(time.perf_counter() - _import_started, 3)
+logger.info(f"app.main imported in {app.state.import_seconds:.2f}s")
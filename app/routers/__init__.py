@@ -1,5 +1,15 @@
 from .chat import chat_router
 from .embedding import embedding_router
 from .suggest import suggest_router
+from .health import health_router
+from .database import database_router
+from .metrics import metrics_router
 
-__all__ = ["chat_router", "embedding_router", "suggest_router"]
+__all__ = [
+    "chat_router",
+    "embedding_router",
+    "suggest_router",
+    "health_router",
+    "database_router",
+    "metrics_router",
+]
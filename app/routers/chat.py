@@ -1,15 +1,21 @@
+import asyncio
+import hmac
+import uuid
+from contextlib import nullcontext
 from typing import List, Optional
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Header, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from app.agent.core import route_to_agent
-from langchain.memory import ConversationBufferMemory
+from app.agent.core import aroute_to_agent
 from langchain_core.messages import HumanMessage, AIMessage
 
 from app.tools import enterprise
 from app.utils import clean_html
 from app.utils.api_client import get_profile_details
+from app.services.session_store import SessionStoreUnavailable, session_store
+from app.config.config import DEBUG_TOKEN, PROFILE_MAX_SECONDS, PROFILE_SAMPLE_INTERVAL_MS
+from app.utils.tracing import SamplingProfiler, current_trace
 
 chat_router = APIRouter(prefix="/conversation")
 
@@ -23,6 +29,8 @@ class Message(BaseModel):
 
 class ChatRequest(BaseModel):
     query: str
+    conversationId: Optional[str] = None
+    # Deprecated: send conversationId instead of the full history
     chat_history: Optional[List[Message]] = None
     profileId: Optional[str] = None
     enterpriseId: Optional[str] = None
@@ -30,56 +38,114 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     response: str
-    chat_history: List[Message]
+    conversationId: Optional[str] = None
+    chat_history: Optional[List[Message]] = None
+    # Timing breakdown (and profile) of this request, with ?debug=true or ?profile=true
+    debug: Optional[dict] = None
+
+
+def to_langchain_messages(messages: List[dict]) -> list:
+    chat_history = []
+    for msg in messages:
+        if msg["type"] == "human":
+            chat_history.append(HumanMessage(content=msg["content"]))
+        elif msg["type"] == "ai":
+            chat_history.append(AIMessage(content=msg["content"]))
+    return chat_history
 
 
 @chat_router.post(
     "/ask",
     response_model=ChatResponse,
+    response_model_exclude_none=True,
     tags=["chat"],
     summary="Ask a question to the chatbot",
 )
-async def chat(request: ChatRequest):
-    # Initialize memory for this request
-    memory = ConversationBufferMemory(
-        memory_key="chat_history",
-        return_messages=True,
-        ai_prefix="ai",
-        human_prefix="human",
+async def chat(
+    request: ChatRequest,
+    debug: bool = False,
+    profile: bool = False,
+    x_debug_token: Optional[str] = Header(default=None),
+):
+    if (debug or profile) and not (
+        DEBUG_TOKEN
+        and x_debug_token
+        and hmac.compare_digest(x_debug_token.encode(), DEBUG_TOKEN.encode())
+    ):
+        raise HTTPException(status_code=403, detail="Debugging is not allowed")
+    profiler = (
+        SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS, PROFILE_MAX_SECONDS)
+        if profile
+        else None
     )
 
-    # Load chat history from request, if provided
-    chat_history = []
-    if request.chat_history:
-        for msg in request.chat_history:
-            if msg.type == "human":
-                chat_history.append(HumanMessage(content=msg.content))
-                memory.save_context({"input": msg.content}, {"output": ""})
-            elif msg.type == "ai":
-                chat_history.append(AIMessage(content=msg.content))
-                memory.save_context({"input": ""}, {"output": msg.content})
+    with profiler or nullcontext():
+        response = await answer(request)
+
+    if debug or profile:
+        trace = current_trace()
+        response.debug = trace.breakdown() if trace else {}
+        if profiler:
+            response.debug["profile"] = profiler.result()
+    return response
+
+
+async def answer(request: ChatRequest) -> ChatResponse:
+    # Legacy clients upload the whole history and get it echoed back
+    if request.chat_history is not None and not request.conversationId:
+        history = [msg.model_dump() for msg in request.chat_history]
+        response = await aroute_to_agent(
+            request.query,
+            to_langchain_messages(history),
+            profileId=request.profileId,
+            enterpriseId=request.enterpriseId,
+        )
+        history.append({"type": "human", "content": request.query})
+        history.append({"type": "ai", "content": response["output"]})
+        return ChatResponse(response=response["output"], chat_history=history)
+
+    # Session clients send only the new message and receive only the new reply
+    conversation_id = request.conversationId or uuid.uuid4().hex
+    try:
+        # The Postgres backend blocks, keep it off the event loop
+        history = await asyncio.to_thread(session_store.get_messages, conversation_id)
+    except SessionStoreUnavailable:
+        # Answering without the history would answer out of context
+        raise HTTPException(
+            status_code=503, detail="Conversation history is unavailable, try again"
+        )
 
     # Use the agent router to direct to the appropriate specialized agent
-    response = route_to_agent(
+    response = await aroute_to_agent(
         request.query,
-        chat_history,
+        to_langchain_messages(history),
         profileId=request.profileId,
         enterpriseId=request.enterpriseId,
     )
 
-    # Get updated chat history
-    history = []
-    for msg in memory.load_memory_variables({})["chat_history"]:
-        if isinstance(msg, HumanMessage):
-            history.append({"type": "human", "content": msg.content})
-        elif isinstance(msg, AIMessage):
-            history.append({"type": "ai", "content": msg.content})
+    await asyncio.to_thread(
+        session_store.append_messages,
+        conversation_id,
+        [
+            {"type": "human", "content": request.query},
+            {"type": "ai", "content": response["output"]},
+        ],
+    )
+
+    return ChatResponse(response=response["output"], conversationId=conversation_id)
 
-    # Add the latest interaction
-    history.append({"type": "human", "content": request.query})
-    history.append({"type": "ai", "content": response["output"]})
 
-    return ChatResponse(response=response["output"], chat_history=history)
+@chat_router.delete(
+    "/{conversation_id}", tags=["chat"], summary="Delete a conversation session"
+)
+async def delete_conversation(conversation_id: str):
+    try:
+        await asyncio.to_thread(session_store.delete, conversation_id)
+    except SessionStoreUnavailable:
+        raise HTTPException(
+            status_code=503, detail="Conversation history is unavailable, try again"
+        )
+    return {"message": "Conversation deleted successfully"}
 
 
 @chat_router.get("/app", tags=["chat"], response_class=HTMLResponse)
@@ -0,0 +1,27 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Query
+
+from app.services.sql_cache import sql_result_cache
+
+database_router = APIRouter(prefix="/database", tags=["database"])
+
+
+@database_router.get("/cache")
+def get_sql_cache_stats():
+    try:
+        return sql_result_cache.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@database_router.delete("/cache")
+def invalidate_sql_cache(table: Optional[List[str]] = Query(default=None)):
+    """
+    Drop cached Database tool results reading the given tables, or all of them,
+    in every worker and replica. The count is the entries dropped by this one.
+    """
+    try:
+        return {"invalidated": sql_result_cache.invalidate(table, broadcast=True)}
+    except Exception as e:
+        return {"error": str(e)}
@@ -1,10 +1,21 @@
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
 from langchain_core.documents import Document
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from langchain_postgres import PGVector
+from app.config.config import DOCUMENT_BUILD_WORKERS, EMBEDDING_BATCH_REQUEST_MAX_ITEMS
 from app.models import Job, Enterprise
+from app.llm import embedding_stats
 from app.utils import clean_html, format_salary
 from app.services.preprocess import preprocess_text
-from app.vectorstore import job_vector_store, enterprise_vector_store
+from app.services.write_queue import write_queue
+from app.vectorstore import (
+    job_vector_store,
+    enterprise_vector_store,
+    upsert_document_statuses,
+)
+from app.vectorstore.pgvector import ENTERPRISE_COLLECTION, JOB_COLLECTION
 
 embedding_router = APIRouter(prefix="/embedding", tags=["embedding"])
 
@@ -112,6 +123,8 @@ def create_job_metadata(job_info: Job) -> dict:
             else []
         )
 
+        lowest_wage = getattr(job_info, "lowestWage", None) or None
+        highest_wage = getattr(job_info, "highestWage", None) or None
         metadata = {
             "job_id": str(job_info.jobId),
             "job_name": job_info.name if hasattr(job_info, "name") else "",
@@ -123,10 +136,11 @@ def create_job_metadata(job_info: Job) -> dict:
             "experience": job_info.experience if hasattr(job_info, "experience") else 0,
             "education": job_info.education if hasattr(job_info, "education") else "",
             "status": job_info.status if hasattr(job_info, "status") else "",
-            "salary_range": {
-                "min": job_info.lowestWage if hasattr(job_info, "lowestWage") else 0,
-                "max": job_info.highestWage if hasattr(job_info, "highestWage") else 0,
-            },
+            # A missing or zero wage is unknown (negotiable), stored as null
+            "salary_range": {"min": lowest_wage, "max": highest_wage},
+            # Flat copies, nested fields cannot be used in metadata filters
+            "min_salary": lowest_wage,
+            "max_salary": highest_wage,
             "categories": categories,
             "tags": tags,
             "specializations": specializations,
@@ -316,88 +330,204 @@ def create_enterprise_document(enterprise_info: Enterprise) -> Document:
         raise e
 
 
-@embedding_router.post("/job")
+@embedding_router.post("/job", status_code=202)
 def create_embedding_job(job_info: Job):
     try:
         document = create_job_document(job_info)
-        job_vector_store.add_documents([document], ids=[f"job-{job_info.jobId}"])
-        return {"message": "Job embedding updated successfully"}
+        write_queue.enqueue_upsert(
+            JOB_COLLECTION, f"job-{job_info.jobId}", document
+        )
+        return {"message": "Job embedding queued"}
     except Exception as e:
-        return {"error": str(e)}
+        # A 202 with an error body would read as accepted
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@embedding_router.put("/job/{job_id}")
+@embedding_router.put("/job/{job_id}", status_code=202)
 def update_embedding_job(job_id: str, job_info: Job):
     try:
         job_info.jobId = job_id
         document = create_job_document(job_info)
-        job_vector_store.add_documents([document], ids=[f"job-{job_id}"])
-
-        return {"message": "Job embedding updated successfully"}
+        write_queue.enqueue_upsert(JOB_COLLECTION, f"job-{job_id}", document)
+        return {"message": "Job embedding queued"}
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@embedding_router.put("/enterprise/{enterprise_id}")
+@embedding_router.put("/enterprise/{enterprise_id}", status_code=202)
 def update_embedding_enterprise(enterprise_id: str, enterprise_info: Enterprise):
     try:
         enterprise_info.enterpriseId = enterprise_id
         document = create_enterprise_document(enterprise_info)
-
-        enterprise_vector_store.add_documents(
-            [document], ids=[f"enterprise-{enterprise_id}"]
+        write_queue.enqueue_upsert(
+            ENTERPRISE_COLLECTION,
+            f"enterprise-{enterprise_id}",
+            document,
         )
-        return {"message": "Enterprise embedding updated successfully"}
+        return {"message": "Enterprise embedding queued"}
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@embedding_router.post("/enterprise")
+@embedding_router.post("/enterprise", status_code=202)
 def create_embedding_enterprise(enterprise_info: Enterprise):
     try:
         document = create_enterprise_document(enterprise_info)
+        write_queue.enqueue_upsert(
+            ENTERPRISE_COLLECTION,
+            f"enterprise-{enterprise_info.enterpriseId}",
+            document,
+        )
+        return {"message": "Enterprise embedding queued"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def upsert_batch(
+    items: list,
+    item_id: Callable[[object], str],
+    build_document: Callable[[object], Document],
+    vector_store: PGVector,
+    id_prefix: str,
+) -> dict:
+    """
+    Build documents in parallel, then embed and upsert every valid one at once.
+
+    Items whose document cannot be built are reported as failed, the rest
+    of the batch is still written. Documents written since the request was
+    received are reported as stale and left alone.
+    """
+    received_at = time.time()
+    if len(items) > EMBEDDING_BATCH_REQUEST_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {EMBEDDING_BATCH_REQUEST_MAX_ITEMS} items per batch",
+        )
 
-        enterprise_vector_store.add_documents(
-            [document], ids=[f"enterprise-{enterprise_info.enterpriseId}"]
+    def build(item):
+        try:
+            return build_document(item), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=DOCUMENT_BUILD_WORKERS) as executor:
+        built = list(executor.map(build, items))
+
+    results = []
+    documents, ids = [], []
+    for item, (document, error) in zip(items, built):
+        result = {"id": item_id(item)}
+        if error is not None:
+            result.update(status="failed", error=error)
+        else:
+            documents.append(document)
+            ids.append(f"{id_prefix}-{result['id']}")
+        results.append(result)
+
+    statuses = {}
+    if ids:
+        statuses = upsert_document_statuses(
+            vector_store, documents, ids, versions=[received_at] * len(ids)
+        )
+    counts = {
+        "embedded": 0,
+        "metadata_updated": 0,
+        "skipped": 0,
+        "stale": 0,
+        "failed": 0,
+    }
+    for result in results:
+        if "status" not in result:
+            result["status"] = statuses[f"{id_prefix}-{result['id']}"]
+        counts[result["status"]] += 1
+    return {**counts, "items": results}
+
+
+@embedding_router.post("/jobs:batch")
+def create_embedding_jobs_batch(jobs: List[Job]):
+    try:
+        result = upsert_batch(
+            jobs,
+            lambda job: str(job.jobId),
+            create_job_document,
+            job_vector_store,
+            "job",
         )
-        return {"message": "Enterprise embedding updated successfully"}
+        return {"message": "Job embeddings updated", **result}
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
 
-@embedding_router.delete("/job/{job_id}")
-def delete_embedding_job(job_id: str):
+@embedding_router.post("/enterprises:batch")
+def create_embedding_enterprises_batch(enterprises: List[Enterprise]):
     try:
-        job_vector_store.delete([f"job-{job_id}"])
-        return {"message": "Job embedding deleted successfully"}
+        result = upsert_batch(
+            enterprises,
+            lambda enterprise: str(enterprise.enterpriseId),
+            create_enterprise_document,
+            enterprise_vector_store,
+            "enterprise",
+        )
+        return {"message": "Enterprise embeddings updated", **result}
+    except HTTPException:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
 
-@embedding_router.delete("/job")
+@embedding_router.delete("/job/{job_id}", status_code=202)
+def delete_embedding_job(job_id: str):
+    try:
+        write_queue.enqueue_delete(JOB_COLLECTION, f"job-{job_id}")
+        return {"message": "Job embedding deletion queued"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@embedding_router.delete("/job", status_code=202)
 def delete_embedding_jobs(job_ids: List[str]):
     try:
-        job_vector_store.delete([f"job-{job_id}" for job_id in job_ids])
-        return {"message": "Job embedding deleted successfully"}
+        for job_id in job_ids:
+            write_queue.enqueue_delete(JOB_COLLECTION, f"job-{job_id}")
+        return {"message": "Job embedding deletion queued"}
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@embedding_router.delete("/enterprise/{enterprise_id}")
+@embedding_router.delete("/enterprise/{enterprise_id}", status_code=202)
 def delete_embedding_enterprise(enterprise_id: str):
     try:
-        job_vector_store.delete([f"enterprise-{enterprise_id}"])
-        return {"message": "Enterprise embedding deleted successfully"}
+        write_queue.enqueue_delete(ENTERPRISE_COLLECTION, f"enterprise-{enterprise_id}")
+        return {"message": "Enterprise embedding deletion queued"}
     except Exception as e:
-        return {"error": str(e)}
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-@embedding_router.delete("/enterprise")
+@embedding_router.delete("/enterprise", status_code=202)
 def delete_embedding_enterprises(enterprise_ids: List[str]):
     try:
-        job_vector_store.delete(
-            [f"enterprise-{enterprise_id}" for enterprise_id in enterprise_ids]
-        )
-        return {"message": "Enterprise embedding deleted successfully"}
+        for enterprise_id in enterprise_ids:
+            write_queue.enqueue_delete(
+                ENTERPRISE_COLLECTION, f"enterprise-{enterprise_id}"
+            )
+        return {"message": "Enterprise embedding deletion queued"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@embedding_router.get("/stats")
+def get_embedding_stats():
+    try:
+        return embedding_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@embedding_router.get("/queue")
+def get_write_queue_stats():
+    try:
+        return write_queue.stats()
     except Exception as e:
         return {"error": str(e)}
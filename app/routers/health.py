@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from app.services.job_service import job_artifact_info
+from app.services.warmup import warm_up_task
+from app.vectorstore import pool_stats
+
+health_router = APIRouter(prefix="/health", tags=["health"])
+
+
+@health_router.get("/live")
+def live():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+def ready(request: Request):
+    """Every heavy dependency is built, 503 while warming up or after a failure."""
+    status = warm_up_task.status()
+    status["import_seconds"] = getattr(request.app.state, "import_seconds", None)
+    # Informational only, the last persisted model may still be loading or retraining
+    status["related_jobs_model"] = job_artifact_info()
+    status["vector_db_pool"] = pool_stats()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
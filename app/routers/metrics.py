@@ -0,0 +1,64 @@
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.llm import embeddings_model
+from app.services.sql_cache import sql_result_cache
+from app.vectorstore import pool_stats
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+class CacheAndPoolCollector:
+    """Expose the in-process cache and pool statistics at scrape time."""
+
+    def collect(self):
+        for name, stats in (
+            ("sql_result", sql_result_cache.stats()),
+            ("embedding_query", embeddings_model.stats()),
+        ):
+            for key in ("hits", "misses"):
+                yield CounterMetricFamily(
+                    f"jobcompass_{name}_cache_{key}",
+                    f"{name} cache {key}",
+                    value=stats[key],
+                )
+            yield GaugeMetricFamily(
+                f"jobcompass_{name}_cache_size", f"{name} cache entries", value=stats["size"]
+            )
+
+        connections = GaugeMetricFamily(
+            "jobcompass_vector_db_pool_connections",
+            "Vector database pool connections",
+            labels=["engine", "state"],
+        )
+        for engine, status in pool_stats().items():
+            if not isinstance(status, dict):
+                continue
+            for state in ("checked_out", "checked_in", "overflow"):
+                connections.add_metric([engine, state], status[state])
+        yield connections
+
+
+_collector = CacheAndPoolCollector()
+REGISTRY.register(_collector)
+
+
+@metrics_router.get("/metrics")
+def metrics():
+    """Prometheus metrics, aggregated over workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Cache and pool figures are this worker's own
+        registry.register(_collector)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -6,6 +6,7 @@ import logging
 import ast
 from app.config.config import OUTPUT_PATH,JOB_API_URL
 from app.services.job_service import get_related_jobs_for_ids, get_related_jobs_for_multiple
+from app.utils.metrics import track
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,7 +20,8 @@ async def get_top_related_jobs_for_user(job_id: str):
         # Read the CSV file
         logger.info(f"Reading related jobs from {OUTPUT_PATH}")
         try:
-            df = pd.read_csv(OUTPUT_PATH)
+            with track("suggest", "related_jobs_csv", route="suggest"):
+                df = pd.read_csv(OUTPUT_PATH)
         except FileNotFoundError:
             raise HTTPException(status_code=500, detail=f"Related jobs CSV file not found at {OUTPUT_PATH}")
         
@@ -44,12 +46,13 @@ async def get_top_related_jobs_for_user(job_id: str):
         
         # Make request to external service
         try:
-            response = requests.post(
-                f"{JOB_API_URL}/job/related-jobs",
-                json={"related_jobs": related_jobs_ids},
-                headers={"Accept": "*/*", "Content-Type": "application/json"}
-            )
-            response.raise_for_status()  # Raise exception for bad status codes
+            with track("api_call", "related_jobs", route="suggest"):
+                response = requests.post(
+                    f"{JOB_API_URL}/job/related-jobs",
+                    json={"related_jobs": related_jobs_ids},
+                    headers={"Accept": "*/*", "Content-Type": "application/json"}
+                )
+                response.raise_for_status()  # Raise exception for bad status codes
             return response.json()
         except requests.RequestException as e:
             logger.error(f"Error calling related jobs service for job_id {job_id}: {str(e)}")
@@ -87,10 +90,11 @@ async def get_job_suggestions(input_data: JobSuggestionsInput):
         # For 2 or more job IDs, get combined suggestions
         if len(input_data.job_ids) >= 2:
             # Get combined job IDs
-            related_job_ids = get_related_jobs_for_multiple(
-                job_ids=input_data.job_ids,
-                num_related=input_data.num_suggestions
-            )
+            with track("suggest", "multiple_jobs", route="suggest"):
+                related_job_ids = get_related_jobs_for_multiple(
+                    job_ids=input_data.job_ids,
+                    num_related=input_data.num_suggestions
+                )
             
             if not related_job_ids:
                 logger.warning("No related jobs found for the provided job IDs")
@@ -101,12 +105,13 @@ async def get_job_suggestions(input_data: JobSuggestionsInput):
             
             # Fetch job details from external API
             try:
-                response = requests.post(
-                    f"{JOB_API_URL}/job/related-jobs",
-                    json={"related_jobs": related_job_ids},
-                    headers={"Accept": "*/*", "Content-Type": "application/json"}
-                )
-                response.raise_for_status()
+                with track("api_call", "related_jobs", route="suggest"):
+                    response = requests.post(
+                        f"{JOB_API_URL}/job/related-jobs",
+                        json={"related_jobs": related_job_ids},
+                        headers={"Accept": "*/*", "Content-Type": "application/json"}
+                    )
+                    response.raise_for_status()
                 job_details = response.json()
                 # Ensure job_details is a list; adjust based on actual API response
                 if isinstance(job_details, dict) and "related_jobs" in job_details:
@@ -125,10 +130,11 @@ async def get_job_suggestions(input_data: JobSuggestionsInput):
         
         # For 1 job ID, get individual suggestions
         else:
-            related_jobs = get_related_jobs_for_ids(
-                job_ids=input_data.job_ids,
-                num_related=input_data.num_suggestions
-            )
+            with track("suggest", "single_job", route="suggest"):
+                related_jobs = get_related_jobs_for_ids(
+                    job_ids=input_data.job_ids,
+                    num_related=input_data.num_suggestions
+                )
             
             # Check if the job ID was found
             found_jobs = [job_id for job_id in input_data.job_ids if related_jobs.get(job_id)]
@@ -142,12 +148,13 @@ async def get_job_suggestions(input_data: JobSuggestionsInput):
                     result[job_id] = []
                     continue
                 try:
-                    response = requests.post(
-                        "http://localhost:3001/api/v1/job/related-jobs",
-                        json={"related_jobs": related_ids},
-                        headers={"Accept": "*/*", "Content-Type": "application/json"}
-                    )
-                    response.raise_for_status()
+                    with track("api_call", "related_jobs", route="suggest"):
+                        response = requests.post(
+                            "http://localhost:3001/api/v1/job/related-jobs",
+                            json={"related_jobs": related_ids},
+                            headers={"Accept": "*/*", "Content-Type": "application/json"}
+                        )
+                        response.raise_for_status()
                     job_details = response.json()
                     if isinstance(job_details, dict) and "related_jobs" in job_details:
                         job_details = job_details["related_jobs"]
@@ -3,15 +3,129 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from .preprocess import preprocess_text
-from app.config.config import OUTPUT_PATH, MODEL_PATH
+from app.config.config import DB_CONFIG_PRIMARY, OUTPUT_PATH, MODEL_PATH
+from app.utils.files import atomic_write
 import logging
 import pickle
 import os
+import threading
+from psycopg2 import errors
+from psycopg2.pool import ThreadedConnectionPool
+from app.utils.lazy import Lazy
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+JOB_ARTIFACT_PATH = os.path.join(MODEL_PATH, 'job_data.pkl')
+
+_artifact = None
+_artifact_mtime = None
+_artifact_lock = threading.Lock()
+
+# Version (trained_at) of the newest job model, in the main database so that
+# replicas not sharing MODEL_PATH can tell their artifact is behind. Created
+# by scripts/migrate_job_model_version.py, never by the API.
+JOB_MODEL_VERSION_TABLE = "job_model_version"
+CREATE_JOB_MODEL_VERSION_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {JOB_MODEL_VERSION_TABLE} (
+    name TEXT PRIMARY KEY,
+    trained_at DOUBLE PRECISION NOT NULL
+)
+"""
+
+# Read every JOB_MODEL_RELOAD_SECONDS by every worker, one connection is enough
+_version_pool = Lazy(
+    "job_model_version_pool",
+    lambda: ThreadedConnectionPool(1, 1, **DB_CONFIG_PRIMARY),
+)
+
+
+def save_job_artifact(data):
+    atomic_write(JOB_ARTIFACT_PATH, lambda f: pickle.dump(data, f))
+    logger.info(f"Job model saved to {JOB_ARTIFACT_PATH}")
+
+
+def load_job_artifact():
+    """
+    Return the persisted job model, reloading it when the file was replaced.
+
+    Returns:
+        dict: The artifact (df, vectorizer, tfidf_matrix, hybrid_sim, trained_at), None if there is none yet
+    """
+    global _artifact, _artifact_mtime
+    try:
+        mtime = os.stat(JOB_ARTIFACT_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _artifact_lock:
+        if _artifact is None or mtime != _artifact_mtime:
+            with open(JOB_ARTIFACT_PATH, 'rb') as f:
+                _artifact = pickle.load(f)
+            _artifact_mtime = mtime
+            logger.info(f"Loaded job model from {JOB_ARTIFACT_PATH} ({len(_artifact['df'])} jobs)")
+        return _artifact
+
+
+def _execute_version(statement, params=()):
+    """Run a statement on the version table, None when the table was not created."""
+    pool = _version_pool.get()
+    conn = pool.getconn()
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(statement, params)
+            row = cursor.fetchone()
+        return row[0] if row else None
+    except errors.UndefinedTable:
+        logger.warning(
+            f"{JOB_MODEL_VERSION_TABLE} does not exist, "
+            "run scripts/migrate_job_model_version.py"
+        )
+        return None
+    finally:
+        # A connection broken by a restart of the database is replaced
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def record_job_model_version(trained_at):
+    """Publish the version of a newly trained job model, never moving it back."""
+    return _execute_version(
+        f"""
+        INSERT INTO {JOB_MODEL_VERSION_TABLE} AS stored (name, trained_at)
+        VALUES ('job_model', %s)
+        ON CONFLICT (name) DO UPDATE
+        SET trained_at = GREATEST(stored.trained_at, EXCLUDED.trained_at)
+        RETURNING trained_at
+        """,
+        (trained_at,),
+    )
+
+
+def job_model_version():
+    """trained_at of the newest job model trained by any process, None if never trained."""
+    return _execute_version(
+        f"SELECT trained_at FROM {JOB_MODEL_VERSION_TABLE} WHERE name = 'job_model'"
+    )
+
+
+def job_artifact_info():
+    """Summary of the job model currently served, for health checks."""
+    with _artifact_lock:
+        if _artifact is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "jobs": len(_artifact['df']),
+            "trained_at": _artifact.get('trained_at'),
+        }
+
+
+def _require_job_artifact():
+    data = load_job_artifact()
+    if data is None:
+        raise FileNotFoundError(f"Model file not found at {JOB_ARTIFACT_PATH}")
+    return data
+
 def compute_related_jobs(df):
     """
     Compute TF-IDF features and hybrid similarity matrix for jobs, and generate related jobs.
@@ -75,7 +189,7 @@ def compute_related_jobs(df):
 
     # Save only JobID and related_jobs to CSV
     output_df = df[['JobID', 'related_jobs']]
-    output_df.to_csv(OUTPUT_PATH, index=False)
+    atomic_write(OUTPUT_PATH, lambda f: output_df.to_csv(f, index=False))
     logger.info(f"Related jobs data saved to {OUTPUT_PATH} with {len(output_df)} rows")
 
     return df, vectorizer, tfidf_matrix, hybrid_sim
@@ -92,12 +206,10 @@ def get_related_jobs_for_ids(job_ids, num_related=3):
         dict: Mapping of job IDs to their related job IDs.
     """
     try:
-        # Load precomputed data
-        model_file_path = os.path.join(MODEL_PATH, 'job_data.pkl')
-        with open(model_file_path, 'rb') as f:
-            data = pickle.load(f)
-            df = data['df']
-            hybrid_sim = data['hybrid_sim']
+        # Precomputed data, cached in memory until the file is replaced
+        data = _require_job_artifact()
+        df = data['df']
+        hybrid_sim = data['hybrid_sim']
         
         result = {}
         for job_id in job_ids:
@@ -134,15 +246,10 @@ def get_related_jobs_for_multiple(job_ids, num_related=3):
         if len(job_ids) < 2:
             raise ValueError("At least 2 job IDs must be provided")
         
-        # Load precomputed data
-        model_file_path = os.path.join(MODEL_PATH, 'job_data.pkl')
-        if not os.path.exists(model_file_path):
-            raise FileNotFoundError(f"Model file not found at {model_file_path}")
-        
-        with open(model_file_path, 'rb') as f:
-            data = pickle.load(f)
-            df = data['df']
-            hybrid_sim = data['hybrid_sim']
+        # Precomputed data, cached in memory until the file is replaced
+        data = _require_job_artifact()
+        df = data['df']
+        hybrid_sim = data['hybrid_sim']
         
         # Find indices of the input job IDs
         indices = []
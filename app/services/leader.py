@@ -0,0 +1,64 @@
+import fcntl
+import logging
+import os
+from contextlib import contextmanager
+
+import psycopg2
+
+from app.config.config import DB_CONFIG_PRIMARY
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def advisory_lock(name: str, db_config: dict = DB_CONFIG_PRIMARY):
+    """
+    Try to become the single leader for a task across every worker and replica.
+
+    Takes a session-level Postgres advisory lock named after the task without
+    waiting, and yields whether it was acquired. The lock is held until the
+    block exits; if the process dies, Postgres releases it with the connection.
+
+    Usage:
+        with advisory_lock("job_training") as leader:
+            if leader:
+                ...
+    """
+    conn = psycopg2.connect(**db_config)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+            acquired = cursor.fetchone()[0]
+        if acquired:
+            logger.info(f"Acquired the '{name}' leader lock")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+    finally:
+        conn.close()
+
+
+@contextmanager
+def host_lock(path: str):
+    """
+    Like advisory_lock, for the processes of one host: an exclusive flock on
+    path, taken without waiting, released when the block exits or the
+    process dies. Yields whether it was acquired.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -5,11 +5,22 @@ from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 from bs4 import BeautifulSoup
 import re
+from app.utils.lazy import Lazy
+from app.utils.nltk_setup import setup_nltk_data
 
-# Initialize stopwords with custom job-related terms
-stop_words = set(stopwords.words('english'))
 job_stopwords = {'job', 'position', 'company', 'work', 'team', 'skill', 'opportunity', 'role', 'industry', 'career'}
-stop_words.update(job_stopwords)
+
+
+def load_stop_words():
+    """Make sure the NLTK data is present, then build the stopword set."""
+    setup_nltk_data()
+    words = set(stopwords.words('english'))
+    words.update(job_stopwords)
+    return words
+
+
+# Stopwords with custom job-related terms, loaded on first use
+stop_words = Lazy("nltk_data", load_stop_words)
 
 # Initialize lemmatizer
 lemmatizer = WordNetLemmatizer()
@@ -29,6 +40,7 @@ def preprocess_text(text):
     """Preprocess text by cleaning HTML, tokenizing, removing stopwords, and lemmatizing."""
     if not isinstance(text, str):
         return ""
+    words = stop_words.get()
     
     # Strip HTML tags
     text = BeautifulSoup(text, "html.parser").get_text()
@@ -43,6 +55,6 @@ def preprocess_text(text):
     
     # Lemmatize with POS tagging, remove stopwords and short tokens
     tokens = [lemmatizer.lemmatize(token, get_wordnet_pos(token)) 
-              for token in tokens if token not in stop_words and len(token) > 3]
+              for token in tokens if token not in words and len(token) > 3]
     
     return ' '.join(tokens)
\ No newline at end of file
@@ -0,0 +1,249 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from app.config.config import (
+    DB_CONFIG_VECTOR,
+    SESSION_BACKEND,
+    SESSION_CACHE_SIZE,
+    SESSION_DB_POOL_SIZE,
+    SESSION_MAX_MESSAGES,
+    SESSION_TTL_HOURS,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SessionStoreUnavailable(Exception):
+    """The session backend could not be read or written."""
+
+
+class PostgresSessionBackend:
+    """Persist conversation messages in the vector database."""
+
+    def __init__(self, db_config: dict, pool_size: int = 5):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(1, self.pool_size, **self.db_config)
+                self._create_table()
+            return self._pool
+
+    def _create_table(self):
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS chat_session_messages (
+                        id BIGSERIAL PRIMARY KEY,
+                        conversation_id TEXT NOT NULL,
+                        type TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                    CREATE INDEX IF NOT EXISTS ix_chat_session_messages_conversation
+                        ON chat_session_messages (conversation_id, id);
+                    CREATE INDEX IF NOT EXISTS ix_chat_session_messages_created_at
+                        ON chat_session_messages (created_at);
+                    """
+                )
+            conn.commit()
+        finally:
+            self._pool.putconn(conn)
+
+    def load(self, conversation_id: str, limit: int) -> Optional[List[Dict[str, str]]]:
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT type, content FROM (
+                        SELECT id, type, content
+                        FROM chat_session_messages
+                        WHERE conversation_id = %s
+                        ORDER BY id DESC
+                        LIMIT %s
+                    ) recent
+                    ORDER BY id
+                    """,
+                    (conversation_id, limit),
+                )
+                rows = cursor.fetchall()
+            conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+        if not rows:
+            return None
+        return [{"type": row[0], "content": row[1]} for row in rows]
+
+    def append(self, conversation_id: str, messages: List[Dict[str, str]]):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(
+                    """
+                    INSERT INTO chat_session_messages (conversation_id, type, content)
+                    VALUES (%s, %s, %s)
+                    """,
+                    [(conversation_id, m["type"], m["content"]) for m in messages],
+                )
+            conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def delete(self, conversation_id: str):
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM chat_session_messages WHERE conversation_id = %s",
+                    (conversation_id,),
+                )
+            conn.commit()
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete messages older than max_age_seconds, returns how many."""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM chat_session_messages
+                    WHERE created_at < now() - make_interval(secs => %s)
+                    """,
+                    (max_age_seconds,),
+                )
+                deleted = cursor.rowcount
+            conn.commit()
+        finally:
+            pool.putconn(conn)
+        return deleted
+
+
+class SessionStore:
+    """
+    Server-side conversation history keyed by conversation ID.
+
+    Without a backend, conversations live in an in-process LRU: they are lost
+    on restart and every worker has its own. With a backend every read and
+    write goes to it, so any worker sees the latest messages of a conversation.
+    Its calls block: async callers run them in a thread. A failed read or
+    delete raises SessionStoreUnavailable, a conversation never continues
+    without its history.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = 1024,
+        max_messages: int = 20,
+        backend: Optional[PostgresSessionBackend] = None,
+        ttl_seconds: float = 0,
+    ):
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._cache: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, conversation_id: str, messages: List[Dict[str, str]]):
+        with self._lock:
+            self._cache[conversation_id] = messages[-self.max_messages :]
+            self._cache.move_to_end(conversation_id)
+            while len(self._cache) > self.max_conversations:
+                self._cache.popitem(last=False)
+
+    def get_messages(self, conversation_id: str) -> List[Dict[str, str]]:
+        """Return the most recent messages of a conversation (oldest first)."""
+        if self.backend is not None:
+            # Read through: another worker may have appended since our last read
+            try:
+                return self.backend.load(conversation_id, self.max_messages) or []
+            except Exception as e:
+                logger.error(f"Error loading conversation {conversation_id}: {str(e)}")
+                raise SessionStoreUnavailable(str(e)) from e
+
+        with self._lock:
+            messages = self._cache.get(conversation_id)
+            if messages is None:
+                return []
+            self._cache.move_to_end(conversation_id)
+            return list(messages)
+
+    def append_messages(self, conversation_id: str, messages: List[Dict[str, str]]):
+        """Append new messages to a conversation."""
+        if self.backend is not None:
+            try:
+                self.backend.append(conversation_id, messages)
+            except Exception as e:
+                logger.error(f"Error saving conversation {conversation_id}: {str(e)}")
+            return
+
+        self._remember(conversation_id, self.get_messages(conversation_id) + messages)
+
+    def delete(self, conversation_id: str):
+        """Forget a conversation."""
+        with self._lock:
+            self._cache.pop(conversation_id, None)
+        if self.backend is not None:
+            try:
+                self.backend.delete(conversation_id)
+            except Exception as e:
+                logger.error(f"Error deleting conversation {conversation_id}: {str(e)}")
+                raise SessionStoreUnavailable(str(e)) from e
+
+    def prune(self) -> int:
+        """Delete the backend's messages older than the TTL, returns how many."""
+        if self.backend is None or self.ttl_seconds <= 0:
+            return 0
+        deleted = self.backend.prune(self.ttl_seconds)
+        if deleted:
+            logger.info(f"Pruned {deleted} conversation messages older than the TTL")
+        return deleted
+
+
+def create_session_store() -> SessionStore:
+    backend = None
+    if SESSION_BACKEND == "postgres":
+        backend = PostgresSessionBackend(DB_CONFIG_VECTOR, SESSION_DB_POOL_SIZE)
+    elif SESSION_BACKEND != "memory":
+        raise ValueError(f"Unsupported SESSION_BACKEND: {SESSION_BACKEND}")
+
+    logger.info(f"Using '{SESSION_BACKEND}' conversation session backend")
+    return SessionStore(
+        max_conversations=SESSION_CACHE_SIZE,
+        max_messages=SESSION_MAX_MESSAGES,
+        backend=backend,
+        ttl_seconds=SESSION_TTL_HOURS * 3600,
+    )
+
+
+session_store = create_session_store()
@@ -0,0 +1,207 @@
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import psycopg2
+
+from app.config.config import (
+    DB_CONFIG_PRIMARY,
+    SQL_CACHE_DEFAULT_TTL_SECONDS,
+    SQL_CACHE_SIZE,
+    SQL_CACHE_TABLE_TTLS,
+)
+from app.services.sql_schema import _identifier, _is_literal, _tokens, referenced_tables
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Postgres channel carrying invalidations to the other workers and replicas
+INVALIDATION_CHANNEL = "sql_result_cache"
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Collapse whitespace, case and a trailing semicolon outside literals
+    ('...', E'...', $$...$$) and quoted identifiers, so equivalent queries
+    share a cache entry.
+    """
+    tokens = _tokens(query.strip().rstrip(";"))
+    return " ".join(
+        token if _is_literal(token) or token.startswith('"') else token.lower()
+        for token in tokens
+    )
+
+
+class SQLResultCache:
+    """
+    LRU cache of Database tool results keyed by normalized SQL.
+
+    An entry lives as long as the shortest TTL of the tables its query reads,
+    so slowly changing lookups (categories, tags) stay cached longer than job
+    listings. Entries can be dropped per table or all at once.
+
+    Every process keeps its own cache. invalidate(..., broadcast=True) also
+    sends a Postgres NOTIFY that the listener of every other worker and
+    replica applies (start_listener). Writes to the main database are not
+    seen, the TTLs bound how stale a result can get.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        default_ttl: float = 300,
+        table_ttls: Optional[Dict[str, float]] = None,
+        db_config: dict = DB_CONFIG_PRIMARY,
+    ):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.table_ttls = table_ttls or {}
+        self.db_config = db_config
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # key -> (expires at, tables read, result)
+        self._cache: "OrderedDict[str, Tuple[float, FrozenSet[str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Tells this process' own notifications apart, pids repeat across containers
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def ttl(self, tables: Iterable[str]) -> float:
+        return min(
+            (self.table_ttls.get(table, self.default_ttl) for table in tables),
+            default=self.default_ttl,
+        )
+
+    def get_or_run(self, query: str, run: Callable[[str], str]) -> str:
+        """Return the cached result of query, or run it and cache what it returns."""
+        if self.max_size <= 0:
+            return run(query)
+        key = normalize_sql(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        # Errors propagate and are not cached
+        result = run(query)
+
+        tables = frozenset(referenced_tables(query))
+        ttl = self.ttl(tables)
+        if ttl > 0:
+            with self._lock:
+                self._cache[key] = (time.monotonic() + ttl, tables, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def invalidate(
+        self, tables: Optional[Iterable[str]] = None, broadcast: bool = False
+    ) -> int:
+        """
+        Drop the entries reading any of tables, every entry when None. Returns
+        the count dropped here. With broadcast, the other processes drop them too.
+        """
+        if tables is not None:
+            tables = list(tables)
+        if broadcast:
+            self._publish(tables)
+        with self._lock:
+            if tables is None:
+                dropped = len(self._cache)
+                self._cache.clear()
+            else:
+                names = {_identifier(table) or table for table in tables}
+                keys = [key for key, entry in self._cache.items() if entry[1] & names]
+                for key in keys:
+                    del self._cache[key]
+                dropped = len(keys)
+            self.invalidations += dropped
+        return dropped
+
+    def _publish(self, tables: Optional[list]):
+        payload = json.dumps({"origin": self._origin, "tables": tables})
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, payload))
+        finally:
+            conn.close()
+
+    def apply_notification(self, payload: str) -> int:
+        """Apply an invalidation sent by another process, ignoring our own."""
+        message = json.loads(payload)
+        if message.get("origin") == self._origin:
+            return 0
+        return self.invalidate(message.get("tables"))
+
+    def start_listener(self):
+        """Apply the invalidations of the other processes from a background thread."""
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, name="sql-cache-invalidation", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout)
+
+    def _listen(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(**self.db_config)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {INVALIDATION_CHANNEL}")
+                # Notifications sent while we were not listening are lost
+                self.invalidate()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self.apply_notification(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"SQL cache invalidation listener failed, retrying: {e}")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+                "default_ttl_seconds": self.default_ttl,
+                "table_ttl_seconds": self.table_ttls,
+            }
+
+
+sql_result_cache = SQLResultCache(
+    max_size=SQL_CACHE_SIZE,
+    default_ttl=SQL_CACHE_DEFAULT_TTL_SECONDS,
+    table_ttls=SQL_CACHE_TABLE_TTLS,
+)
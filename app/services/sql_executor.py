@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.pool import ThreadedConnectionPool
+
+from app.config.config import (
+    DB_CONFIG_SQL_TOOL,
+    SQL_MAX_QUERY_COST,
+    SQL_MAX_ROWS,
+    SQL_POOL_SIZE,
+    SQL_POOL_TIMEOUT_SECONDS,
+    SQL_RESULT_MAX_TOKENS,
+    SQL_STATEMENT_TIMEOUT_MS,
+)
+from app.utils.lazy import Lazy
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in JSON-encoded rows, close enough to budget the prompt
+_CHARS_PER_TOKEN = 4
+# Rows fetched per round trip from the server-side cursor
+_FETCH_SIZE = 20
+
+
+class QueryRejected(Exception):
+    """The query was not run, or stopped, because it is too expensive."""
+
+
+class SQLExecutor:
+    """
+    Run agent-written SELECTs on pooled, read-only connections of the main database.
+
+    Every session is read only with a statement timeout. A query is planned
+    first and rejected when its estimated cost is too high, then run with an
+    outer LIMIT and streamed row by row until the row or token budget is spent.
+    When every connection is busy, a query waits up to ``pool_timeout`` seconds
+    for one (ThreadedConnectionPool raises at once instead of waiting).
+    """
+
+    def __init__(
+        self,
+        db_config: dict,
+        pool_size: int = 5,
+        pool_timeout: float = 10.0,
+        statement_timeout_ms: int = 5000,
+        max_rows: int = 50,
+        max_tokens: int = 2000,
+        max_cost: float = 100000,
+    ):
+        self.pool_timeout = pool_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_rows = max_rows
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        options = (
+            f"-c default_transaction_read_only=on "
+            f"-c statement_timeout={statement_timeout_ms}"
+        )
+        self._pool = Lazy(
+            "sql_database",
+            lambda: ThreadedConnectionPool(1, pool_size, options=options, **db_config),
+        )
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @contextmanager
+    def _connection(self):
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise QueryRejected(
+                f"The database is busy, no connection freed up within "
+                f"{self.pool_timeout:.0f} s. Try again shortly."
+            )
+        try:
+            pool = self._pool.get()
+            conn = pool.getconn()
+            broken = False
+            try:
+                yield conn
+            except psycopg2.errors.QueryCanceled:
+                # Statement timeout, the connection is still usable
+                raise
+            except psycopg2.OperationalError:
+                broken = True
+                raise
+            finally:
+                if not broken:
+                    conn.rollback()
+                pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+    def _bounded(self, query: str) -> str:
+        # The agent's own LIMIT still applies, this one caps it. One extra row
+        # tells whether anything was cut off.
+        return f"SELECT * FROM (\n{query}\n) AS bounded LIMIT {self.max_rows + 1}"
+
+    def estimate(self, cursor, query: str) -> dict:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {query}")
+        plan = cursor.fetchone()[0][0]["Plan"]
+        return {"cost": plan["Total Cost"], "rows": plan["Plan Rows"]}
+
+    def run(self, query: str) -> str:
+        """
+        Run one SELECT, returning JSON rows for the prompt.
+
+        Raises:
+            QueryRejected: The estimated cost or the statement timeout was exceeded
+        """
+        query = self._bounded(query.strip().rstrip(";"))
+        try:
+            return self._run(query)
+        except psycopg2.errors.QueryCanceled:
+            raise QueryRejected(
+                f"Query cancelled after {self.statement_timeout_ms} ms. "
+                "Add filters or aggregate to make it cheaper."
+            )
+
+    def _run(self, query: str) -> str:
+        with self._connection() as conn:
+            with conn.cursor() as cursor:
+                estimate = self.estimate(cursor, query)
+            if estimate["cost"] > self.max_cost:
+                logger.warning(f"Rejected SQL query with estimated cost {estimate['cost']}")
+                raise QueryRejected(
+                    f"Query rejected: estimated cost {estimate['cost']:.0f} "
+                    f"(about {estimate['rows']} rows) is above {self.max_cost:.0f}. "
+                    "Add filters, join fewer tables or aggregate."
+                )
+
+            # Server-side cursor, rows arrive in small batches and reading
+            # stops as soon as the budget is spent
+            with conn.cursor(name="database_tool") as cursor:
+                cursor.itersize = _FETCH_SIZE
+                cursor.execute(query)
+                rows: List[str] = []
+                budget = self.max_tokens * _CHARS_PER_TOKEN
+                truncated = None
+                for row in cursor:
+                    if len(rows) == self.max_rows:
+                        truncated = f"more than {self.max_rows} rows"
+                        break
+                    encoded = json.dumps(list(row), default=str, ensure_ascii=False)
+                    budget -= len(encoded) + 1
+                    if budget < 0:
+                        truncated = f"result too large after {len(rows)} rows"
+                        break
+                    rows.append(encoded)
+                columns = [column.name for column in cursor.description]
+
+        if not rows and not truncated:
+            return "No results found."
+        result = '{"columns": %s, "rows": [%s]' % (json.dumps(columns), ",".join(rows))
+        if truncated:
+            result += ', "truncated": %s' % json.dumps(
+                f"{truncated}, narrow the query or aggregate to see the rest"
+            )
+        return result + "}"
+
+
+sql_executor = SQLExecutor(
+    DB_CONFIG_SQL_TOOL,
+    pool_size=SQL_POOL_SIZE,
+    pool_timeout=SQL_POOL_TIMEOUT_SECONDS,
+    statement_timeout_ms=SQL_STATEMENT_TIMEOUT_MS,
+    max_rows=SQL_MAX_ROWS,
+    max_tokens=SQL_RESULT_MAX_TOKENS,
+    max_cost=SQL_MAX_QUERY_COST,
+)
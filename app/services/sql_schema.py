@@ -0,0 +1,600 @@
+import json
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import psycopg2
+
+from app.config.config import DB_CONFIG_PRIMARY, SQL_SCHEMA_CACHE_PATH
+from app.utils.files import atomic_write
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tables and columns the Database tool may read, with a one-line description
+# used in the prompt. Anything not listed here (emails, phone numbers, user
+# accounts, ...) is invisible to the agent.
+SQL_ALLOWED_SCHEMA: Dict[str, dict] = {
+    "jobs": {
+        "description": "job postings, status 'OPEN' means accepting applications",
+        "columns": [
+            "job_id",
+            "enterprise_id",
+            "name",
+            "type",
+            "status",
+            "deadline",
+            "education",
+            "experience",
+            "lowest_wage",
+            "highest_wage",
+            "requirement",
+            "description",
+            "responsibility",
+            "enterprise_benefits",
+            "created_at",
+            "updated_at",
+        ],
+    },
+    "enterprises": {
+        "description": "companies posting jobs, status 'ACTIVE' means visible",
+        "columns": [
+            "enterprise_id",
+            "name",
+            "description",
+            "company_vision",
+            "founded_in",
+            "organization_type",
+            "team_size",
+            "status",
+            "is_premium",
+            "categories",
+            "created_at",
+            "updated_at",
+        ],
+    },
+    "categories": {
+        "description": "industries and majors",
+        "columns": ["category_id", "category_name"],
+    },
+    "tags": {
+        "description": "skill and keyword tags of jobs",
+        "columns": ["tag_id", "name"],
+    },
+    "addresses": {
+        "description": "job and company locations",
+        "columns": ["address_id", "country", "city", "mixed_address"],
+    },
+    "job_categories": {
+        "description": "job to industry category",
+        "columns": ["job_id", "category_id"],
+    },
+    "job_specializations": {
+        "description": "job to major category",
+        "columns": ["job_id", "category_id"],
+    },
+    "job_tags": {"description": "job to tag", "columns": ["job_id", "tag_id"]},
+    "job_addresses": {
+        "description": "job to address",
+        "columns": ["job_id", "address_id"],
+    },
+    "enterprise_addresses": {
+        "description": "enterprise to address",
+        "columns": ["enterprise_id", "address_id"],
+    },
+    "boosted_jobs": {
+        "description": "promoted jobs, higher points_used ranks first",
+        "columns": ["job_id", "points_used"],
+    },
+}
+
+# Short type names keep the prompt small
+_TYPE_ALIASES = {
+    "character varying": "text",
+    "timestamp with time zone": "timestamptz",
+    "timestamp without time zone": "timestamp",
+    "double precision": "float",
+    "USER-DEFINED": "enum",
+    "ARRAY": "array",
+}
+
+_TOKEN = re.compile(
+    r"\$(?P<tag>(?:[A-Za-z_][A-Za-z0-9_]*)?)\$.*?\$(?P=tag)\$"  # dollar-quoted literal
+    r"|[Ee]'(?:[^'\\]|\\.|'')*'"  # escape string literal, \' does not end it
+    r"|'(?:[^']|'')*'"  # string literal
+    r'|"(?:[^"]|"")+"'  # quoted identifier
+    r"|--[^\n]*"  # line comment
+    r"|/\*"  # block comment, see _tokens
+    r"|[A-Za-z_][A-Za-z0-9_$]*"  # word
+    r"|\d+(?:\.\d+)?"
+    r"|\S",
+    re.DOTALL,
+)
+_BLOCK_COMMENT = re.compile(r"/\*|\*/")
+# Keywords ending a FROM list
+_FROM_END = set(
+    "where group order limit offset having window union intersect except fetch for".split()
+)
+# Keywords that may follow FROM/JOIN/comma before the table name
+_FROM_MODIFIERS = {"lateral", "only"}
+# Keywords that may follow a FROM item, anything else there is its alias
+_ALIAS_STOP = _FROM_END | set(
+    "join inner left right full outer cross natural on using tablesample".split()
+)
+# Functions whose arguments are separated by FROM: EXTRACT(... FROM ...)
+_FROM_ARGUMENT_FUNCTIONS = {"extract", "substring", "trim", "overlay"}
+# Keywords ending a top-level ORDER BY
+_ORDER_BY_END = {"limit", "offset", "fetch", "for", "union", "intersect", "except"}
+_ORDER_ITEM_END = _ORDER_BY_END | {"asc", "desc", "nulls"}
+
+# Functions the Database tool may call, none of them runs SQL or reads whole
+# rows. Anything else (query_to_xml, row_to_json, dblink, ...) is refused.
+_ALLOWED_FUNCTIONS = set(
+    """
+    count sum avg min max string_agg array_agg bool_and bool_or every
+    row_number rank dense_rank
+    coalesce nullif greatest least cast
+    lower upper initcap length char_length trim ltrim rtrim btrim substring substr
+    position replace concat concat_ws left right split_part string_to_array
+    round floor ceil ceiling abs trunc
+    now age date_trunc date_part extract to_char
+    array_length array_to_string cardinality unnest
+    """.split()
+)
+# Keywords that may be followed by a parenthesis
+_PAREN_KEYWORDS = set(
+    """
+    select from where and or not in exists any all some as values join on using
+    over filter group array lateral case when then else by having is distinct
+    with union intersect except like ilike between row only
+    """.split()
+)
+# Reserved and structural keywords, never a column reference
+_KEYWORDS = _PAREN_KEYWORDS | _FROM_END | set(
+    """
+    null true false isnull notnull similar escape symmetric to end asc desc nulls
+    first last next rows ties limit offset inner left right full outer cross
+    natural recursive materialized partition range groups unbounded preceding
+    following current at zone varying precision both leading trailing placing
+    interval collate current_date current_time current_timestamp localtime
+    localtimestamp
+    """.split()
+)
+
+
+def _tokens(query: str) -> List[str]:
+    """Tokens of a query without its comments."""
+    tokens = []
+    position = 0
+    while True:
+        match = _TOKEN.search(query, position)
+        if match is None:
+            return tokens
+        token = match.group()
+        position = match.end()
+        if token == "/*":
+            # Block comments nest in Postgres
+            depth = 1
+            while depth:
+                delimiter = _BLOCK_COMMENT.search(query, position)
+                if delimiter is None:
+                    return tokens
+                depth += 1 if delimiter.group() == "/*" else -1
+                position = delimiter.end()
+        elif not token.startswith("--"):
+            tokens.append(token)
+
+
+def _is_literal(token: str) -> bool:
+    return (
+        token[0] == "'"
+        or (token[0] == "$" and len(token) > 1)
+        or (token[0] in "Ee" and token[1:2] == "'")
+    )
+
+
+def _keyword(token: str) -> Optional[str]:
+    """Lower-cased unquoted word, None for anything else."""
+    if token[:1].isalpha() or token[:1] == "_":
+        if not _is_literal(token):
+            return token.lower()
+    return None
+
+
+def _identifier(token: str) -> Optional[str]:
+    # Quoted identifiers are case sensitive, "Jobs" is not jobs
+    if token.startswith('"'):
+        return token[1:-1].replace('""', '"')
+    return _keyword(token)
+
+
+def _scan(tokens: List[str]) -> dict:
+    """
+    Relations of a query: the tables it reads, table aliases, CTE and subquery
+    names, output column aliases and the positions declaring any of them.
+    """
+    tables: Set[str] = set()
+    # alias -> tables it names (the same alias may be reused in subqueries)
+    aliases: Dict[str, Set[str]] = {}
+    # Names of subqueries and CTEs, their columns were checked where defined
+    derived: Set[str] = set()
+    ctes: Set[str] = set()
+    output_aliases: Set[str] = set()
+    # Positions of bare names in the top-level ORDER BY
+    order_items: Set[int] = set()
+    declared: Set[int] = set()
+    # One state per parenthesis depth: None, "expect" (next word is a
+    # relation), "alias" (after a relation), "item" (inside a parenthesised
+    # FROM item) or "list" (inside a FROM list, a comma starts another item)
+    states: List[Optional[str]] = [None]
+    # Table name of the last FROM item per depth, None for a subquery
+    items: List[Optional[str]] = [None]
+    # Whether FROM inside the parentheses introduces a relation, it does not
+    # in EXTRACT(... FROM ...) or SUBSTRING(... FROM ...)
+    query: List[bool] = [True]
+    ordering = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        word = _keyword(token)
+        following = tokens[i + 1] if i + 1 < len(tokens) else ""
+
+        if states[-1] == "alias":
+            states[-1] = "list"
+            alias_at = None
+            if word == "as":
+                alias_at = i + 1
+            elif _identifier(token) is not None and word not in _ALIAS_STOP:
+                alias_at = i
+            alias = None
+            if alias_at is not None and alias_at < len(tokens):
+                alias = _identifier(tokens[alias_at])
+            if alias is not None:
+                if items[-1] is None:
+                    derived.add(alias)
+                else:
+                    aliases.setdefault(alias, set()).add(items[-1])
+                declared.update(range(i, alias_at + 1))
+                i = alias_at + 1
+                continue
+
+        state = states[-1]
+        if len(states) == 1 and word is not None and not token.startswith('"'):
+            # Only the top-level ORDER BY resolves output column aliases
+            if word == "order" and _keyword(following) == "by":
+                ordering = True
+            elif word in _ORDER_BY_END:
+                ordering = False
+        if token == "(":
+            if state == "expect":
+                states[-1] = "item"
+                items[-1] = None
+            states.append(None)
+            items.append(None)
+            query.append(not i or _keyword(tokens[i - 1]) not in _FROM_ARGUMENT_FUNCTIONS)
+        elif token == ")":
+            if len(states) > 1:
+                states.pop()
+                items.pop()
+                query.pop()
+                if states[-1] == "item":
+                    states[-1] = "alias"
+        elif token == ",":
+            if state == "list":
+                states[-1] = "expect"
+        elif word in ("from", "join") and query[-1]:
+            # IS [NOT] DISTINCT FROM compares two values
+            if not (
+                word == "from"
+                and i >= 2
+                and _keyword(tokens[i - 1]) == "distinct"
+                and _keyword(tokens[i - 2]) in ("is", "not")
+            ):
+                states[-1] = "expect"
+        elif state == "expect" and _identifier(token) is not None:
+            declared.add(i)
+            if word not in _FROM_MODIFIERS:
+                name = _identifier(token)
+                if following == "." and i + 2 < len(tokens):
+                    qualified = _identifier(tokens[i + 2])
+                    name = qualified if name == "public" else f"{name}.{qualified}"
+                    declared.update((i + 1, i + 2))
+                    i += 2
+                tables.add(name)
+                items[-1] = name
+                states[-1] = "alias"
+        elif state == "list" and word in _FROM_END:
+            states[-1] = None
+        elif word == "as" and _identifier(following) is not None:
+            declared.add(i + 1)
+            # Deeper down AS also names types in CAST and subquery columns
+            if len(states) == 1:
+                output_aliases.add(_identifier(following))
+        elif (
+            len(states) == 1
+            and _identifier(token) is not None
+            and _keyword(following) == "as"
+        ):
+            # CTE: name AS [NOT] [MATERIALIZED] (
+            j = i + 2
+            while j < len(tokens) and _keyword(tokens[j]) in ("not", "materialized"):
+                j += 1
+            if tokens[j : j + 1] == ["("]:
+                ctes.add(_identifier(token))
+                derived.add(_identifier(token))
+                declared.update(range(i, j))
+                i = j
+                continue
+        if ordering and len(states) == 1 and i and _identifier(token) is not None:
+            previous = tokens[i - 1]
+            if (previous == "," or _keyword(previous) == "by") and (
+                following in ("", ",", ";") or _keyword(following) in _ORDER_ITEM_END
+            ):
+                order_items.add(i)
+        i += 1
+    return {
+        "tables": tables,
+        "aliases": aliases,
+        "derived": derived,
+        "ctes": ctes,
+        "output_aliases": output_aliases,
+        "order_items": order_items,
+        "declared": declared,
+    }
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def grant_statements(role: str, allowed: Dict[str, dict] = SQL_ALLOWED_SCHEMA) -> List[str]:
+    """
+    SQL limiting a role to SELECT on the allow-listed columns, the database
+    side of check_query: nothing else is readable even if a query gets past it.
+    """
+    role = _quote(role)
+    statements = [
+        f"REVOKE ALL ON ALL TABLES IN SCHEMA public FROM {role}",
+        f"GRANT USAGE ON SCHEMA public TO {role}",
+    ]
+    for table, spec in allowed.items():
+        columns = ", ".join(map(_quote, spec["columns"]))
+        statements.append(f"GRANT SELECT ({columns}) ON public.{_quote(table)} TO {role}")
+    return statements
+
+
+def referenced_tables(query: str) -> Set[str]:
+    """
+    Names of the relations a query reads, including comma-separated FROM lists.
+
+    Schema-qualified names outside public are returned qualified so they never
+    match the allow-list; set-returning functions in FROM are returned by name.
+    """
+    return _scan(_tokens(query))["tables"]
+
+
+class SchemaCache:
+    """
+    Column names and types of the allow-listed tables, persisted as JSON.
+
+    The cache is read from disk at startup and refreshed on a schedule from
+    information_schema (one query for the allow-listed tables), so no process
+    reflects the main database while starting. Without a cache file the
+    allow-list alone is used, without column types.
+    """
+
+    def __init__(self, path: str, allowed: Dict[str, dict]):
+        self.path = path
+        self.allowed = allowed
+        self.refreshed_at: Optional[float] = None
+        # table -> [(column, type)] of allowed columns that exist
+        self.tables: Dict[str, List[List[str]]] = {}
+        # table -> columns that exist but are not allowed
+        self.hidden: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.info(f"No SQL schema cache at {self.path} yet")
+            return
+        except Exception as e:
+            logger.error(f"Error reading SQL schema cache: {str(e)}")
+            return
+        # The allow-list may have shrunk since the cache was written
+        tables: Dict[str, List[List[str]]] = {}
+        hidden: Dict[str, List[str]] = dict(data.get("hidden", {}))
+        for name, columns in data.get("tables", {}).items():
+            if name not in self.allowed:
+                continue
+            for column, data_type in columns:
+                if column in self.allowed[name]["columns"]:
+                    tables.setdefault(name, []).append([column, data_type])
+                else:
+                    hidden.setdefault(name, []).append(column)
+        with self._lock:
+            self.tables, self.hidden = tables, hidden
+            self.refreshed_at = data.get("refreshed_at")
+
+    def refresh(self):
+        """Read the allow-listed tables' columns from the main database and persist them."""
+        conn = psycopg2.connect(**DB_CONFIG_PRIMARY)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT table_name, column_name, data_type
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = ANY(%s)
+                    ORDER BY table_name, ordinal_position
+                    """,
+                    (list(self.allowed),),
+                )
+                rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        tables: Dict[str, List[List[str]]] = {}
+        hidden: Dict[str, List[str]] = {}
+        for table, column, data_type in rows:
+            if column in self.allowed[table]["columns"]:
+                tables.setdefault(table, []).append(
+                    [column, _TYPE_ALIASES.get(data_type, data_type)]
+                )
+            else:
+                hidden.setdefault(table, []).append(column)
+
+        refreshed_at = time.time()
+        data = {"refreshed_at": refreshed_at, "tables": tables, "hidden": hidden}
+        atomic_write(
+            self.path, lambda f: f.write(json.dumps(data, indent=1).encode("utf-8"))
+        )
+        with self._lock:
+            self.tables, self.hidden, self.refreshed_at = tables, hidden, refreshed_at
+        logger.info(f"SQL schema cache refreshed ({len(tables)} tables)")
+
+    def is_stale(self, max_age_seconds: float) -> bool:
+        return self.refreshed_at is None or time.time() - self.refreshed_at > max_age_seconds
+
+    def describe(self) -> str:
+        """Compact schema for the prompt, one line per table."""
+        with self._lock:
+            tables = dict(self.tables)
+        lines = []
+        for name, spec in self.allowed.items():
+            if name in tables:
+                columns = ", ".join(f"{column} {data_type}" for column, data_type in tables[name])
+            elif self.refreshed_at is None:
+                columns = ", ".join(spec["columns"])
+            else:
+                # The table does not exist in the database
+                continue
+            lines.append(f"{name}({columns}) -- {spec['description']}")
+        return "\n".join(lines)
+
+    def check_query(self, query: str) -> Optional[str]:
+        """
+        Return why the query is not allowed, None if it only reads allow-listed data.
+
+        Fails closed: every name must be an allow-listed column of a table the
+        query reads, a keyword, an allowed function or a relation qualifying a
+        column. Whole-row references, SELECT * and other functions are refused,
+        whether or not the schema cache has been loaded.
+        """
+        tokens = _tokens(query)
+        if not tokens:
+            return "The query is empty."
+        if ";" in tokens[:-1]:
+            return "Run a single statement at a time."
+
+        scope = _scan(tokens)
+        referenced = scope["tables"]
+        if not referenced:
+            return "The query must select FROM at least one table."
+        ctes = scope["ctes"]
+        unknown = sorted(referenced - ctes - set(self.allowed))
+        if unknown:
+            return f"Tables not available: {', '.join(unknown)}."
+
+        names = {name for name in map(_identifier, tokens) if name is not None}
+        if any(
+            name.lower().startswith("pg_") or name.lower() in ("information_schema", "dblink")
+            for name in names
+        ):
+            return "System catalogs and functions are not available."
+
+        with self._lock:
+            hidden = self.hidden
+        tables = referenced - ctes
+        columns: Set[str] = set()
+        hidden_columns: Set[str] = set()
+        for table in tables:
+            columns.update(self.allowed[table]["columns"])
+            hidden_columns.update(hidden.get(table, []))
+        # alias -> real tables it names, CTEs and subqueries have checked columns
+        aliases = {
+            alias: named - ctes for alias, named in scope["aliases"].items()
+        }
+        relations = tables | set(aliases) | scope["derived"]
+
+        blocked: List[str] = []
+        for i, token in enumerate(tokens):
+            previous = tokens[i - 1] if i else ""
+            following = tokens[i + 1] if i + 1 < len(tokens) else ""
+            if token == "*":
+                if previous == "(" and following == ")" and i >= 2 and _keyword(tokens[i - 2]) == "count":
+                    continue
+                operand = (
+                    previous == ")"
+                    or previous[:1].isdigit()
+                    or (previous and _is_literal(previous))
+                    or (
+                        _identifier(previous) is not None
+                        and _keyword(previous) not in _KEYWORDS
+                    )
+                )
+                # SELECT *, alias.* and "name, *" expose columns outside the allow-list
+                if not operand:
+                    return "Select the needed columns explicitly instead of *."
+                continue
+
+            name = _identifier(token)
+            if name is None or i in scope["declared"]:
+                continue
+            word = _keyword(token)
+            type_position = (
+                tokens[i - 2 : i] == [":", ":"]
+                or _keyword(previous) == "as"
+            )
+
+            if following == "(":
+                if previous == ".":
+                    return f"Function not available: {tokens[i - 2]}.{token}."
+                # Type modifiers: ::numeric(10, 2), CAST(x AS varchar(20))
+                if type_position or word in _PAREN_KEYWORDS or word in _ALLOWED_FUNCTIONS:
+                    continue
+                return f"Function not available: {name}."
+            if previous == ".":
+                qualifier = _identifier(tokens[i - 2]) if i >= 2 else None
+                for table in aliases.get(qualifier, {qualifier} & tables):
+                    if name not in self.allowed[table]["columns"]:
+                        blocked.append(name)
+                continue
+            if following == ".":
+                if name not in relations:
+                    return f"Unknown table or alias: {name}."
+                continue
+            if name in relations:
+                # e, ROW(e) or to_json(e) would read every column of the table
+                return f"Whole-row references are not available, select columns of {name} instead."
+            if type_position or (following and _is_literal(following)):
+                # x::text, CAST(x AS text), DATE '2024-01-01'
+                continue
+            if previous == "(" and i >= 2 and _keyword(tokens[i - 2]) == "extract":
+                continue
+            if word == "time" and _keyword(following) == "zone":
+                continue
+            if name in hidden_columns:
+                blocked.append(name)
+            elif word in _KEYWORDS or name in columns:
+                continue
+            elif name in scope["output_aliases"] and i in scope["order_items"]:
+                continue
+            else:
+                blocked.append(name)
+        if blocked:
+            return (
+                f"Columns not available: {', '.join(sorted(set(blocked)))}. Use the "
+                "listed columns, alias.column for subquery and CTE columns and "
+                "AS for computed columns."
+            )
+        return None
+
+
+schema_cache = SchemaCache(SQL_SCHEMA_CACHE_PATH, SQL_ALLOWED_SCHEMA)
@@ -0,0 +1,94 @@
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+from app.utils.lazy import lazy_status, warm_up
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Singletons a request may need, in the order they are built
+WARM_UP_COMPONENTS = [
+    "nltk_data",
+    "embedding_model",
+    "website_content_vector_store",
+    "job_vector_store",
+    "enterprise_vector_store",
+    "sql_database",
+    "job_search_executor",
+    "enterprise_search_executor",
+    "website_content_executor",
+    "agent",
+    "agent_executor",
+]
+
+
+class WarmUp:
+    """
+    Build the heavy singletons in a background thread after startup.
+
+    The app answers liveness probes right away; readiness turns true once
+    every component is built. With warm-up disabled the app reports ready
+    immediately and components are built by the first request using them.
+    """
+
+    def __init__(self, components: List[str]):
+        self.components = components
+        self.enabled = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self, after: Optional[Callable[[], None]]):
+        if self.enabled:
+            logger.info("Warming up...")
+            warm_up(self.components)
+        self.finished_at = time.perf_counter()
+        if self.enabled:
+            logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.2f}s")
+        if after is not None:
+            try:
+                after()
+            except Exception as e:
+                logger.error(f"Error after warm-up: {str(e)}")
+
+    def start(self, enabled: bool, after: Optional[Callable[[], None]] = None):
+        """Start warming up, then run ``after`` (e.g. startup checks) in the same thread."""
+        self.enabled = enabled
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(after,), name="warm-up", daemon=True
+        )
+        self._thread.start()
+
+    def status(self) -> dict:
+        components = lazy_status()
+        if not self.enabled:
+            state = "disabled"
+        elif self.finished_at is None:
+            state = "running"
+        else:
+            state = "done"
+        ready = not self.enabled or (
+            state == "done"
+            and all(
+                components.get(name, {}).get("initialized")
+                for name in self.components
+            )
+        )
+        elapsed = (
+            (self.finished_at or time.perf_counter()) - self.started_at
+            if self.started_at is not None
+            else None
+        )
+        return {
+            "ready": ready,
+            "warm_up": state,
+            "warm_up_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "components": components,
+        }
+
+
+warm_up_task = WarmUp(WARM_UP_COMPONENTS)
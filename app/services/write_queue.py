@@ -0,0 +1,407 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.config.config import (
+    WRITE_QUEUE_BATCH_SIZE,
+    WRITE_QUEUE_CLAIM_TIMEOUT_SECONDS,
+    WRITE_QUEUE_DEBOUNCE_SECONDS,
+    WRITE_QUEUE_MAX_DELAY_SECONDS,
+    WRITE_QUEUE_MAX_ATTEMPTS,
+    WRITE_QUEUE_PATH,
+    WRITE_QUEUE_POLL_SECONDS,
+    WRITE_QUEUE_RETRY_SECONDS,
+)
+from app.vectorstore import (
+    job_vector_store,
+    enterprise_vector_store,
+    delete_documents,
+    upsert_documents,
+)
+from app.vectorstore.pgvector import ENTERPRISE_COLLECTION, JOB_COLLECTION
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VECTOR_STORES = {
+    JOB_COLLECTION: job_vector_store,
+    ENTERPRISE_COLLECTION: enterprise_vector_store,
+}
+
+
+class WriteQueue:
+    """
+    Durable SQLite queue of pending vector store writes.
+
+    There is one row per (collection, document id), so repeated updates to
+    the same document coalesce into the latest one. A background worker
+    waits until a document has been quiet for ``debounce_seconds``, or
+    pending for ``max_delay_seconds`` since its first update however often it
+    changes, then embeds and writes pending documents in batches.
+
+    A failed write is retried after ``retry_seconds``, doubling on every
+    failure, and moved to the dead_writes table after ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 64,
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        poll_seconds: float = 1.0,
+        claim_timeout_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retry_seconds: float = 10.0,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_seconds = poll_seconds
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        # Several API processes may share the file, rows are claimed per worker
+        self.worker_id = uuid.uuid4().hex
+        self.processed = 0
+        self.failed_batches = 0
+        self.last_error: Optional[str] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._create_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_table(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pending_writes (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    payload TEXT,
+                    first_enqueued_at REAL NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    updates INTEGER NOT NULL DEFAULT 1,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    claimed_at REAL,
+                    not_before REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (collection, doc_id)
+                )
+                """
+            )
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(pending_writes)")
+            }
+            if "not_before" not in columns:
+                # Queue files created before retries were delayed
+                conn.execute(
+                    "ALTER TABLE pending_writes "
+                    "ADD COLUMN not_before REAL NOT NULL DEFAULT 0"
+                )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dead_writes (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    payload TEXT,
+                    first_enqueued_at REAL NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    error TEXT,
+                    failed_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _enqueue(self, collection: str, doc_id: str, op: str, payload: Optional[str]):
+        if collection not in VECTOR_STORES:
+            raise ValueError(f"Unknown collection: {collection}")
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                INSERT INTO pending_writes
+                    (collection, doc_id, op, payload, first_enqueued_at, enqueued_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (collection, doc_id) DO UPDATE SET
+                    op = excluded.op,
+                    payload = excluded.payload,
+                    enqueued_at = excluded.enqueued_at,
+                    updates = updates + 1,
+                    attempts = 0,
+                    not_before = 0
+                """,
+                (collection, doc_id, op, payload, now, now),
+            )
+        self._wakeup.set()
+
+    def enqueue_upsert(self, collection: str, doc_id: str, document: Document):
+        payload = json.dumps(
+            {"page_content": document.page_content, "metadata": document.metadata},
+            default=str,
+        )
+        self._enqueue(collection, doc_id, "upsert", payload)
+
+    def enqueue_delete(self, collection: str, doc_id: str):
+        self._enqueue(collection, doc_id, "delete", None)
+
+    def _claim(self) -> List[sqlite3.Row]:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """
+                SELECT * FROM pending_writes
+                WHERE (enqueued_at <= ? OR first_enqueued_at <= ?)
+                  AND not_before <= ?
+                  AND (claimed_by IS NULL OR claimed_at < ?)
+                ORDER BY first_enqueued_at
+                LIMIT ?
+                """,
+                (
+                    now - self.debounce_seconds,
+                    now - self.max_delay_seconds,
+                    now,
+                    now - self.claim_timeout_seconds,
+                    self.batch_size,
+                ),
+            ).fetchall()
+            conn.executemany(
+                """
+                UPDATE pending_writes SET claimed_by = ?, claimed_at = ?
+                WHERE collection = ? AND doc_id = ?
+                """,
+                [(self.worker_id, now, row["collection"], row["doc_id"]) for row in rows],
+            )
+            conn.execute("COMMIT")
+        return rows
+
+    def _complete(self, rows: List[sqlite3.Row]):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Rows updated while they were being written stay queued
+            conn.executemany(
+                """
+                DELETE FROM pending_writes
+                WHERE collection = ? AND doc_id = ? AND enqueued_at = ?
+                """,
+                [(row["collection"], row["doc_id"], row["enqueued_at"]) for row in rows],
+            )
+            self._release(conn, rows)
+            conn.execute("COMMIT")
+
+    def _release(self, conn: sqlite3.Connection, rows: List[sqlite3.Row]):
+        conn.executemany(
+            """
+            UPDATE pending_writes SET claimed_by = NULL, claimed_at = NULL
+            WHERE collection = ? AND doc_id = ? AND claimed_by = ?
+            """,
+            [(row["collection"], row["doc_id"], self.worker_id) for row in rows],
+        )
+
+    def _write(self, rows: List[sqlite3.Row]):
+        by_collection: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            by_collection.setdefault(row["collection"], []).append(row)
+
+        for collection, collection_rows in by_collection.items():
+            vector_store = VECTOR_STORES[collection]
+            upserts = [row for row in collection_rows if row["op"] == "upsert"]
+            deletes = [row for row in collection_rows if row["op"] == "delete"]
+            if upserts:
+                documents = []
+                for row in upserts:
+                    payload = json.loads(row["payload"])
+                    documents.append(
+                        Document(
+                            page_content=payload["page_content"],
+                            metadata=payload["metadata"],
+                        )
+                    )
+                # Versioned by enqueue time, writes made directly since then win
+                upsert_documents(
+                    vector_store,
+                    documents,
+                    ids=[row["doc_id"] for row in upserts],
+                    versions=[row["enqueued_at"] for row in upserts],
+                )
+            if deletes:
+                delete_documents(
+                    vector_store,
+                    [row["doc_id"] for row in deletes],
+                    versions=[row["enqueued_at"] for row in deletes],
+                )
+
+    def _dead_letter(
+        self, conn: sqlite3.Connection, row: sqlite3.Row, attempts: int, error: str
+    ):
+        key = (row["collection"], row["doc_id"], row["enqueued_at"])
+        moved = conn.execute(
+            """
+            INSERT INTO dead_writes
+                (collection, doc_id, op, payload, first_enqueued_at, enqueued_at,
+                 attempts, error, failed_at)
+            SELECT collection, doc_id, op, payload, first_enqueued_at, enqueued_at,
+                   ?, ?, ?
+            FROM pending_writes
+            WHERE collection = ? AND doc_id = ? AND enqueued_at = ?
+            """,
+            (attempts, error, time.time(), *key),
+        ).rowcount
+        if moved:
+            conn.execute(
+                """
+                DELETE FROM pending_writes
+                WHERE collection = ? AND doc_id = ? AND enqueued_at = ?
+                """,
+                key,
+            )
+            logger.error(
+                f"Giving up on queued {row['op']} of {row['collection']}/{row['doc_id']} "
+                f"after {attempts} attempts, moved to dead_writes: {error}"
+            )
+
+    def _fail(self, rows: List[sqlite3.Row], error: Exception):
+        self.failed_batches += 1
+        self.last_error = str(error)
+        logger.error(f"Error writing queued embeddings: {str(error)}")
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                attempts = row["attempts"] + 1
+                if attempts >= self.max_attempts:
+                    self._dead_letter(conn, row, attempts, str(error))
+                    continue
+                # Rows updated since the claim start over with the new payload
+                conn.execute(
+                    """
+                    UPDATE pending_writes SET attempts = ?, not_before = ?
+                    WHERE collection = ? AND doc_id = ? AND enqueued_at = ?
+                    """,
+                    (
+                        attempts,
+                        now + self.retry_seconds * 2 ** (attempts - 1),
+                        row["collection"],
+                        row["doc_id"],
+                        row["enqueued_at"],
+                    ),
+                )
+            self._release(conn, rows)
+            conn.execute("COMMIT")
+
+    def process_batch(self) -> int:
+        """Write one batch of pending documents, returns how many were written."""
+        rows = self._claim()
+        if not rows:
+            return 0
+        try:
+            self._write(rows)
+            self._complete(rows)
+            self.processed += len(rows)
+            return len(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                self._fail(rows, e)
+                raise
+
+        # Retry one by one so a single bad document does not hold back the rest
+        written = 0
+        for row in rows:
+            try:
+                self._write([row])
+                self._complete([row])
+                written += 1
+            except Exception as e:
+                self._fail([row], e)
+        self.processed += written
+        if not written:
+            raise RuntimeError(self.last_error)
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                written = self.process_batch()
+            except Exception:
+                # Back off before retrying the failed batch
+                self._stop.wait(self.poll_seconds * 10)
+                continue
+            if not written:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="embedding-write-queue", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Embedding write queue started ({self.path})")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """
+                SELECT count(*) AS depth,
+                       min(first_enqueued_at) AS oldest,
+                       coalesce(sum(updates), 0) AS updates,
+                       coalesce(sum(claimed_by IS NOT NULL), 0) AS in_flight,
+                       coalesce(sum(attempts > 0), 0) AS retrying
+                FROM pending_writes
+                """
+            ).fetchone()
+            dead = conn.execute("SELECT count(*) FROM dead_writes").fetchone()[0]
+        return {
+            "depth": row["depth"],
+            "in_flight": row["in_flight"],
+            "retrying": row["retrying"],
+            "dead": dead,
+            # Updates received for the queued documents, including coalesced ones
+            "pending_updates": row["updates"],
+            "lag_seconds": round(now - row["oldest"], 3) if row["oldest"] else 0.0,
+            "processed": self.processed,
+            "failed_batches": self.failed_batches,
+            "last_error": self.last_error,
+        }
+
+
+write_queue = WriteQueue(
+    WRITE_QUEUE_PATH,
+    batch_size=WRITE_QUEUE_BATCH_SIZE,
+    debounce_seconds=WRITE_QUEUE_DEBOUNCE_SECONDS,
+    max_delay_seconds=WRITE_QUEUE_MAX_DELAY_SECONDS,
+    poll_seconds=WRITE_QUEUE_POLL_SECONDS,
+    claim_timeout_seconds=WRITE_QUEUE_CLAIM_TIMEOUT_SECONDS,
+    max_attempts=WRITE_QUEUE_MAX_ATTEMPTS,
+    retry_seconds=WRITE_QUEUE_RETRY_SECONDS,
+)
@@ -1,25 +1,49 @@
-from langchain.agents import Tool
-from langchain_community.utilities import SQLDatabase
-from constants import main_database_url
-import json
+import logging
 
+from langchain.agents import Tool
+from app.config.config import SQL_MAX_ROWS, SQL_TOOL_RESTRICTED_ROLE
+from app.services.sql_cache import sql_result_cache
+from app.services.sql_executor import QueryRejected, sql_executor
+from app.services.sql_schema import schema_cache
 
-# Database tool
-db = SQLDatabase.from_uri(database_uri=main_database_url)
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def database_query(query):
     try:
-        if not query.strip().lower().startswith("select"):
+        if not query.strip().lower().startswith(("select", "with")):
             return "Only SELECT queries are allowed."
-        result = db.run(query)
-        return json.dumps(result) if result else "No results found."
+        rejection = schema_cache.check_query(query)
+        if rejection:
+            if not SQL_TOOL_RESTRICTED_ROLE:
+                return f"Query not allowed: {rejection}"
+            # The role's column grants decide, the check misreads some valid SQL
+            logger.info(f"Running a query the check would refuse ({rejection}): {query}")
+        # Many conversations ask the same lookups, only successful results are cached
+        return sql_result_cache.get_or_run(query, sql_executor.run)
+    except QueryRejected as e:
+        return str(e)
     except Exception as e:
         return f"Error executing query: {str(e)}"
 
 
+def database_tool_description() -> str:
+    return (
+        "Run SELECT SQL queries on the PostgreSQL database. Name the columns you need "
+        "(no SELECT *), name computed columns with AS and use only common aggregate, "
+        f"string and date functions. At most {SQL_MAX_ROWS} rows are returned, filter, "
+        "aggregate or ORDER BY and LIMIT to get the rows that matter. "
+        "Only these tables and columns are available:\n"
+        + schema_cache.describe()
+    )
+
+
+# Database tool, limited to the allow-listed tables. Their schema comes from
+# the local schema cache, so nothing is reflected when the tool is built.
 db_tool = Tool(
     name="Database",
     func=database_query,
-    description="Run SELECT SQL queries on the PostgreSQL database. Example: SELECT * FROM products WHERE name = 'Product X'.",
+    description=database_tool_description(),
 )
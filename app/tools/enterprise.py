@@ -1,7 +1,14 @@
+import asyncio
+
 from langchain.agents import Tool
 
 from app.utils import get_enterprise_details
-from ..vectorstore import enterprise_vector_store
+from ..vectorstore import (
+    async_enterprise_vector_store,
+    asearch_documents,
+    enterprise_vector_store,
+    search_documents,
+)
 from dotenv import load_dotenv
 import os
 
@@ -69,157 +76,172 @@ def format_list_items(items, default="Not specified"):
     return default
 
 
+def format_enterprise_results(docs):
+    if not docs:
+        return "No results found."
+
+    formatted_results = []
+    for doc in docs:
+        meta = doc.metadata
+        enterprise_id = meta.get("enterprise_id")
+        enterprise_details = get_enterprise_details(enterprise_id)
+
+        if enterprise_details:
+            # Format categories/industries
+            categories_text = format_list_items(
+                enterprise_details.get("categories")
+            )
+
+            # Format addresses
+            addresses_text = "Not specified"
+            if enterprise_details.get("addresses"):
+                address_list = []
+                for addr in enterprise_details.get("addresses", []):
+                    if isinstance(addr, dict) and "mixedAddress" in addr:
+                        address_list.append(addr["mixedAddress"])
+                if address_list:
+                    addresses_text = "; ".join(address_list)
+
+            # Format websites/contact
+            websites_text = "Not specified"
+            if enterprise_details.get("websites"):
+                website_list = []
+                for website in enterprise_details.get("websites", []):
+                    if isinstance(website, dict) and "url" in website:
+                        website_list.append(website["url"])
+                if website_list:
+                    websites_text = "; ".join(website_list)
+
+            # Build enterprise card using components
+            enterprise_header = create_enterprise_header(
+                enterprise_details.get("enterpriseId"),
+                enterprise_details.get("name", "Unknown Enterprise"),
+                enterprise_details.get("logoUrl", ""),
+                enterprise_details.get("status"),
+                enterprise_details.get("foundedIn"),
+                enterprise_details.get("teamSize"),
+            )
+
+            description_section = create_description_section(
+                enterprise_details.get("description")
+            )
+
+            # Info grid
+            info_grid = create_enterprise_info_grid(
+                [
+                    ("Industries", categories_text),
+                    (
+                        "Organization Type",
+                        enterprise_details.get("organizationType")
+                        or "Not specified",
+                    ),
+                ]
+            )
+
+            # Info sections
+            addresses_section = create_enterprise_info_section(
+                "Addresses", addresses_text
+            )
+            contact_section = create_enterprise_info_section(
+                "Contact", websites_text
+            )
+
+            # Footer
+            enterprise_footer = create_enterprise_footer(
+                enterprise_details.get("enterpriseId")
+            )
+
+            # Combine all sections
+            enterprise_content = (
+                enterprise_header
+                + description_section
+                + info_grid
+                + addresses_section
+                + contact_section
+                + enterprise_footer
+            )
+
+            formatted_results.append(enterprise_content)
+        else:
+            # Format categories
+            categories_text = (
+                [cat["category_name"] for cat in meta.get("categories")]
+                if meta.get("categories")
+                else []
+            )
+
+            # Format addresses
+            addresses_text = "Not specified"
+            if meta.get("addresses"):
+                address_list = []
+                for addr in meta.get("addresses", []):
+                    if isinstance(addr, dict) and "mixed_address" in addr:
+                        address_list.append(addr["mixed_address"])
+                if address_list:
+                    addresses_text = "; ".join(address_list)
+
+            # Build fallback enterprise card using components
+            enterprise_header = create_enterprise_header(
+                meta.get("enterprise_id"),
+                meta.get("name", "Unknown Enterprise"),
+                meta.get("logo_url", ""),
+                meta.get("status"),
+                meta.get("founded_in"),
+                meta.get("team_size"),
+            )
+
+            description_section = create_description_section(
+                meta.get("description")
+            )
+
+            # Info grid
+            info_grid = create_enterprise_info_grid(
+                [
+                    ("Industries", categories_text),
+                    (
+                        "Organization Type",
+                        meta.get("organization_type") or "Not specified",
+                    ),
+                ]
+            )
+
+            # Info sections
+            addresses_section = create_enterprise_info_section(
+                "Addresses", addresses_text
+            )
+
+            # Footer
+            enterprise_footer = create_enterprise_footer(meta.get("enterprise_id"))
+
+            # Combine all sections
+            enterprise_content = (
+                enterprise_header
+                + description_section
+                + info_grid
+                + addresses_section
+                + enterprise_footer
+            )
+
+            formatted_results.append(enterprise_content)
+
+    return "\n".join(formatted_results)
+
+
 def enterprise_vector_search(query):
     try:
-        docs = enterprise_vector_store.similarity_search(query, k=10)
-        if not docs:
-            return "No results found."
-
-        formatted_results = []
-        for doc in docs:
-            meta = doc.metadata
-            enterprise_id = meta.get("enterprise_id")
-            enterprise_details = get_enterprise_details(enterprise_id)
-
-            if enterprise_details:
-                # Format categories/industries
-                categories_text = format_list_items(
-                    enterprise_details.get("categories")
-                )
-
-                # Format addresses
-                addresses_text = "Not specified"
-                if enterprise_details.get("addresses"):
-                    address_list = []
-                    for addr in enterprise_details.get("addresses", []):
-                        if isinstance(addr, dict) and "mixedAddress" in addr:
-                            address_list.append(addr["mixedAddress"])
-                    if address_list:
-                        addresses_text = "; ".join(address_list)
-
-                # Format websites/contact
-                websites_text = "Not specified"
-                if enterprise_details.get("websites"):
-                    website_list = []
-                    for website in enterprise_details.get("websites", []):
-                        if isinstance(website, dict) and "url" in website:
-                            website_list.append(website["url"])
-                    if website_list:
-                        websites_text = "; ".join(website_list)
-
-                # Build enterprise card using components
-                enterprise_header = create_enterprise_header(
-                    enterprise_details.get("enterpriseId"),
-                    enterprise_details.get("name", "Unknown Enterprise"),
-                    enterprise_details.get("logoUrl", ""),
-                    enterprise_details.get("status"),
-                    enterprise_details.get("foundedIn"),
-                    enterprise_details.get("teamSize"),
-                )
-
-                description_section = create_description_section(
-                    enterprise_details.get("description")
-                )
-
-                # Info grid
-                info_grid = create_enterprise_info_grid(
-                    [
-                        ("Industries", categories_text),
-                        (
-                            "Organization Type",
-                            enterprise_details.get("organizationType")
-                            or "Not specified",
-                        ),
-                    ]
-                )
-
-                # Info sections
-                addresses_section = create_enterprise_info_section(
-                    "Addresses", addresses_text
-                )
-                contact_section = create_enterprise_info_section(
-                    "Contact", websites_text
-                )
-
-                # Footer
-                enterprise_footer = create_enterprise_footer(
-                    enterprise_details.get("enterpriseId")
-                )
-
-                # Combine all sections
-                enterprise_content = (
-                    enterprise_header
-                    + description_section
-                    + info_grid
-                    + addresses_section
-                    + contact_section
-                    + enterprise_footer
-                )
-
-                formatted_results.append(enterprise_content)
-            else:
-                # Format categories
-                categories_text = (
-                    [cat["category_name"] for cat in meta.get("categories")]
-                    if meta.get("categories")
-                    else []
-                )
-
-                # Format addresses
-                addresses_text = "Not specified"
-                if meta.get("addresses"):
-                    address_list = []
-                    for addr in meta.get("addresses", []):
-                        if isinstance(addr, dict) and "mixed_address" in addr:
-                            address_list.append(addr["mixed_address"])
-                    if address_list:
-                        addresses_text = "; ".join(address_list)
-
-                # Build fallback enterprise card using components
-                enterprise_header = create_enterprise_header(
-                    meta.get("enterprise_id"),
-                    meta.get("name", "Unknown Enterprise"),
-                    meta.get("logo_url", ""),
-                    meta.get("status"),
-                    meta.get("founded_in"),
-                    meta.get("team_size"),
-                )
-
-                description_section = create_description_section(
-                    meta.get("description")
-                )
-
-                # Info grid
-                info_grid = create_enterprise_info_grid(
-                    [
-                        ("Industries", categories_text),
-                        (
-                            "Organization Type",
-                            meta.get("organization_type") or "Not specified",
-                        ),
-                    ]
-                )
-
-                # Info sections
-                addresses_section = create_enterprise_info_section(
-                    "Addresses", addresses_text
-                )
-
-                # Footer
-                enterprise_footer = create_enterprise_footer(meta.get("enterprise_id"))
-
-                # Combine all sections
-                enterprise_content = (
-                    enterprise_header
-                    + description_section
-                    + info_grid
-                    + addresses_section
-                    + enterprise_footer
-                )
-
-                formatted_results.append(enterprise_content)
-
-        return "\n".join(formatted_results)
+        docs = search_documents(enterprise_vector_store, query, k=10, hybrid=True)
+        return format_enterprise_results(docs)
+    except Exception as e:
+        return f"Error searching enterprises: {str(e)}"
+
+
+async def aenterprise_vector_search(query):
+    try:
+        docs = await asearch_documents(
+            async_enterprise_vector_store, query, k=10, hybrid=True
+        )
+        # Enterprise details are fetched from the API with blocking requests
+        return await asyncio.to_thread(format_enterprise_results, docs)
     except Exception as e:
         return f"Error searching enterprises: {str(e)}"
 
@@ -227,5 +249,6 @@ def enterprise_vector_search(query):
 enterprise_tool = Tool(
     name="EnterpriseSearch",
     func=enterprise_vector_search,
+    coroutine=aenterprise_vector_search,
     description="Use this tool to search for enterprise data. The input should be a string of text.",
 )
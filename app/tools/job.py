@@ -1,5 +1,13 @@
-from langchain.agents import Tool
-from app.vectorstore import job_vector_store
+import asyncio
+from langchain.tools import StructuredTool
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.vectorstore import (
+    async_job_vector_store,
+    asearch_documents,
+    job_vector_store,
+    search_documents,
+)
 from dotenv import load_dotenv
 from os import getenv
 from app.utils import get_job_details, format_salary
@@ -201,8 +209,8 @@ def _format_metadata_job(meta, job_data, job_id, index):
     )
 
     salary_range = meta.get("salary_range", {})
-    lowest_wage = salary_range.get("min", 0)
-    highest_wage = salary_range.get("max", 0)
+    lowest_wage = salary_range.get("min")
+    highest_wage = salary_range.get("max")
 
     return f"""
 JOB {index}: {job_data['job_name']}
@@ -222,35 +230,246 @@ View Details: {getenv("DETAILS_SINGLE_JOB_FRONTEND_LINK")}/{job_id}
 """.strip()
 
 
-def job_vector_search(query):
-    """Search for jobs using natural language query with enhanced relevance scoring"""
-    try:
-        # Get initial results with higher k for better filtering
-        docs = job_vector_store.similarity_search(query, k=15)
-        print(f"Found {len(docs)} jobs matching the query.")
-        if not docs:
-            return "No jobs found matching your criteria."
+class JobSearch(BaseModel):
+    """Search for jobs based on different criteria."""
+
+    query: str = Field(..., description="Search query for job search")
+    location: Optional[str] = Field(
+        None, description="City or country the job must be in, e.g. 'Da Nang'"
+    )
+    job_types: Optional[List[str]] = Field(
+        None, description="Accepted job types, e.g. ['Full-time', 'Part-time']"
+    )
+    min_experience: Optional[float] = Field(
+        None, description="Minimum years of experience the job may require"
+    )
+    max_experience: Optional[float] = Field(
+        None, description="Maximum years of experience the job may require"
+    )
+    min_salary: Optional[float] = Field(
+        None, description="Lowest acceptable salary in USD"
+    )
+    max_salary: Optional[float] = Field(
+        None, description="Highest salary in USD the user is looking for"
+    )
+    categories: Optional[List[str]] = Field(
+        None, description="Industries the job must belong to (any of them)"
+    )
 
-        formatted_jobs = []
-        for i, doc in enumerate(docs):
-            meta = doc.metadata
-            job_id = meta.get("job_id", "Unknown")
-            job_details = get_job_details(job_id)
 
-            job_data = extract_job_data(job_details, meta)
+def _like_pattern(value: str) -> str:
+    """Escape LIKE wildcards in user text."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _job_type_pattern(job_type: str) -> str:
+    """
+    ILIKE pattern matching a job type whatever its separators: "Full-time",
+    "full time" and "FULL_TIME" all match each other.
+    """
+    words = [word for word in re.split(r"[\s_-]+", job_type) if word]
+    return "%".join(_like_pattern(word) for word in words)
+
+
+def build_job_filter(
+    location: Optional[str] = None,
+    job_types: Optional[List[str]] = None,
+    min_experience: Optional[float] = None,
+    max_experience: Optional[float] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+) -> Optional[dict]:
+    """
+    Translate structured job criteria into a PGVector metadata filter.
+
+    Location, job type and category conditions are ILIKE matches on the
+    metadata text, which the trigram indexes created by
+    scripts/vector_index.py serve. Job types match regardless of case and of
+    "-", "_" or space separators. Salary ranges match when they overlap, and
+    jobs with an unspecified or negotiable wage match any salary criteria.
+    """
+    conditions = []
+    if location and location.strip():
+        conditions.append(
+            {"locations": {"$ilike": f"%{_like_pattern(location.strip())}%"}}
+        )
+    job_types = [_job_type_pattern(t) for t in job_types or [] if t]
+    job_types = [t for t in job_types if t]
+    if job_types:
+        conditions.append({"$or": [{"job_type": {"$ilike": t}} for t in job_types]})
+    categories = [c.strip() for c in categories or [] if c and c.strip()]
+    if categories:
+        # categories is a JSON array, match a whole quoted element
+        conditions.append(
+            {
+                "$or": [
+                    {"categories": {"$ilike": f'%"{_like_pattern(c)}"%'}}
+                    for c in categories
+                ]
+            }
+        )
+    if min_experience is not None:
+        conditions.append({"experience": {"$gte": min_experience}})
+    if max_experience is not None:
+        conditions.append({"experience": {"$lte": max_experience}})
+    # A null bound is an unknown (negotiable) wage, which does not rule the job out
+    if min_salary is not None:
+        conditions.append(
+            {
+                "$or": [
+                    {"max_salary": {"$gte": min_salary}},
+                    {"max_salary": {"$eq": None}},
+                ]
+            }
+        )
+    if max_salary is not None:
+        conditions.append(
+            {
+                "$or": [
+                    {"min_salary": {"$lte": max_salary}},
+                    {"min_salary": {"$eq": None}},
+                ]
+            }
+        )
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def job_vector_search(
+    query: str,
+    location: Optional[str] = None,
+    job_types: Optional[List[str]] = None,
+    min_experience: Optional[float] = None,
+    max_experience: Optional[float] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+):
+    """Search for jobs using natural language query with enhanced relevance scoring"""
+    try:
+        criteria = dict(
+            location=location,
+            job_types=job_types,
+            min_experience=min_experience,
+            max_experience=max_experience,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            categories=categories,
+        )
+        # Filters run in the database, every returned job matches them
+        docs = search_documents(
+            job_vector_store,
+            query,
+            k=15,
+            filter=build_job_filter(**criteria),
+            hybrid=True,
+        )
+        if docs or not job_types:
+            return format_job_results(docs)
+
+        # Job types are free text from the model, retry without them
+        docs = search_documents(
+            job_vector_store,
+            query,
+            k=15,
+            filter=build_job_filter(**{**criteria, "job_types": None}),
+            hybrid=True,
+        )
+        return _without_job_types(format_job_results(docs), job_types)
 
-            final = format_job_result(doc, job_data, i)
+    except Exception as e:
+        return f"Error searching jobs: {str(e)}"
 
-            formatted_jobs.append(final)
 
-        return formatted_jobs
+async def ajob_vector_search(
+    query: str,
+    location: Optional[str] = None,
+    job_types: Optional[List[str]] = None,
+    min_experience: Optional[float] = None,
+    max_experience: Optional[float] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+):
+    """job_vector_search on the async job collection"""
+    try:
+        criteria = dict(
+            location=location,
+            job_types=job_types,
+            min_experience=min_experience,
+            max_experience=max_experience,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            categories=categories,
+        )
+        docs = await asearch_documents(
+            async_job_vector_store,
+            query,
+            k=15,
+            filter=build_job_filter(**criteria),
+            hybrid=True,
+        )
+        fallback = not docs and job_types
+        if fallback:
+            docs = await asearch_documents(
+                async_job_vector_store,
+                query,
+                k=15,
+                filter=build_job_filter(**{**criteria, "job_types": None}),
+                hybrid=True,
+            )
+        # Job details are fetched from the API with blocking requests
+        results = await asyncio.to_thread(format_job_results, docs)
+        return _without_job_types(results, job_types) if fallback else results
 
     except Exception as e:
         return f"Error searching jobs: {str(e)}"
 
 
-job_tool = Tool(
-    name="JobSearch",
-    description="Search for jobs using a natural language query.",
+def _without_job_types(results, job_types: List[str]):
+    """Tell the model the job type filter was dropped to find these results."""
+    if not isinstance(results, list):
+        return results
+    note = (
+        f"No jobs matched the job types {', '.join(job_types)}; "
+        "these results are of any job type."
+    )
+    return [note] + results
+
+
+def format_job_results(docs):
+    print(f"Found {len(docs)} jobs matching the query.")
+    if not docs:
+        return "No jobs found matching your criteria."
+
+    formatted_jobs = []
+    for i, doc in enumerate(docs):
+        meta = doc.metadata
+        job_id = meta.get("job_id", "Unknown")
+        job_details = get_job_details(job_id)
+
+        job_data = extract_job_data(job_details, meta)
+
+        final = format_job_result(doc, job_data, i)
+
+        formatted_jobs.append(final)
+
+    return formatted_jobs
+
+
+job_tool = StructuredTool.from_function(
     func=job_vector_search,
+    coroutine=ajob_vector_search,
+    name="JobSearch",
+    description=(
+        "Search for jobs using a natural language query. Fill in the optional "
+        "filters only when the user states them (location, job type, years of "
+        "experience, salary in USD, industries)."
+    ),
+    args_schema=JobSearch,
 )
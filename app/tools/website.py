@@ -1,24 +1,44 @@
 from langchain.agents import Tool
-from app.vectorstore import website_content_vector_store
+from app.vectorstore import (
+    async_website_content_vector_store,
+    website_content_vector_store,
+)
+from app.vectorstore.pgvector import WEBSITE_CONTENT_COLLECTION
+from app.utils.metrics import track
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import EmbeddingsFilter
 from app.llm import llm
 import html
 
 
+def format_website_results(docs):
+    if not docs:
+        return "No relevant website content found."
+
+    formatted_results = []
+    for doc in docs:
+        formatted_results.append(doc.metadata)
+
+    return formatted_results
+
+
 # Website search tool
 def website_search(query):
     try:
-        docs = website_content_vector_store.similarity_search(query, k=5)
-
-        if not docs:
-            return "No relevant website content found."
+        with track("vector_search", WEBSITE_CONTENT_COLLECTION):
+            docs = website_content_vector_store.similarity_search(query, k=5)
+        return format_website_results(docs)
+    except Exception as e:
+        return f"Error searching website: {str(e)}"
 
-        formatted_results = []
-        for doc in docs:
-            formatted_results.append(doc.metadata)
 
-        return formatted_results
+async def awebsite_search(query):
+    try:
+        with track("vector_search", WEBSITE_CONTENT_COLLECTION):
+            docs = await async_website_content_vector_store.asimilarity_search(
+                query, k=5
+            )
+        return format_website_results(docs)
     except Exception as e:
         return f"Error searching website: {str(e)}"
 
@@ -26,5 +46,6 @@ def website_search(query):
 website_tool = Tool(
     name="WebsiteSearch",
     func=website_search,
+    coroutine=awebsite_search,
     description="Search website content for relevant information. Returns up to 3 snippets with URLs.",
 )
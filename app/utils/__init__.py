@@ -2,6 +2,8 @@ from .clean_html import clean_html
 from .format_salary import format_salary
 from .api_client import get_job_details, get_enterprise_details, get_profile_details
 from .nltk_setup import setup_nltk_data
+from .lazy import Lazy, lazy_status, warm_up
+from .files import atomic_write
 
 __all__ = [
     "clean_html",
@@ -10,4 +12,8 @@ __all__ = [
     "get_enterprise_details",
     "setup_nltk_data",
     "get_profile_details",
+    "Lazy",
+    "lazy_status",
+    "warm_up",
+    "atomic_write",
 ]
@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 import logging
 from typing import List, Optional
 
+from .metrics import track
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,6 +14,15 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 
+def _get_payload(name: str, url: str, headers: dict):
+    # Timed as an api_call stage, request errors are labelled and re-raised
+    with track("api_call", name):
+        response = requests.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+        results = response.json()
+    return results.get("payload", {}).get("value", {})
+
+
 def get_job_details(job_id):
     """
     Fetch detailed job information from the JobCompass API.
@@ -33,12 +44,7 @@ def get_job_details(job_id):
             "Content-Type": "application/json",
         }
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        results = response.json()
-        data = results.get("payload", {}).get("value", {})
-        return data
+        return _get_payload("job", url, headers)
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching job details for job ID {job_id}: {str(e)}")
         return None
@@ -140,13 +146,7 @@ def get_enterprise_details(enterprise_id) -> Optional[EnterpriseResponse]:
             "Content-Type": "application/json",
         }
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        results = response.json()
-        data = results.get("payload", {}).get("value", {})
-
-        return data
+        return _get_payload("enterprise", url, headers)
     except requests.exceptions.RequestException as e:
         logger.error(
             f"Error fetching enterprise details for enterprise ID {enterprise_id}: {str(e)}"
@@ -176,13 +176,7 @@ def get_profile_details(profile_id):
             "Authorization": f"Bearer {os.getenv('JOB_API_TOKEN')}",
         }
 
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        results = response.json()
-        data = results.get("payload", {}).get("value", {})
-
-        return data
+        return _get_payload("profile", url, headers)
     except requests.exceptions.RequestException as e:
         logger.error(
             f"Error fetching profile details for profile ID {profile_id}: {str(e)}"
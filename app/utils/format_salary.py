@@ -1,7 +1,14 @@
-def format_salary(lowest: float, highest: float) -> str:
+from typing import Optional
+
+
+def format_salary(lowest: Optional[float], highest: Optional[float]) -> str:
     """Format salary range in a human-readable format."""
     if not lowest and not highest:
         return "Salary not specified"
+    if not highest:
+        return f"From ${lowest:,.0f}"
+    if not lowest:
+        return f"Up to ${highest:,.0f}"
     if lowest == highest:
         return f"${lowest:,.0f}"
     return f"${lowest:,.0f} - ${highest:,.0f}"
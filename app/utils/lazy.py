@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_registry: Dict[str, "Lazy"] = {}
+
+
+class Lazy(Generic[T]):
+    """
+    Thread-safe, lazily built singleton.
+
+    The object is built by ``factory`` on first use and attribute access is
+    forwarded to it, so a ``Lazy`` can stand in for the object it wraps.
+    A failed build is not cached, the next use tries again.
+    """
+
+    # Looked up while half-constructed (copy, pickle), never forwarded
+    _own_attrs = frozenset(
+        ("_name", "_factory", "_lock", "_built", "_value", "_seconds", "_error")
+    )
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self._name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._built = False
+        self._value: Optional[T] = None
+        self._seconds: Optional[float] = None
+        self._error: Optional[str] = None
+        _registry[name] = self
+
+    @property
+    def initialized(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if self._built:
+            return self._value
+        with self._lock:
+            if not self._built:
+                start = time.perf_counter()
+                try:
+                    value = self._factory()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self._value = value
+                self._seconds = time.perf_counter() - start
+                self._error = None
+                self._built = True
+                logger.info(f"Initialized {self._name} in {self._seconds:.2f}s")
+        return self._value
+
+    def reset(self):
+        """
+        Rebuild the object on next use. Callers that already got it keep the
+        old one, concurrent ones get either the old or the new object.
+        """
+        with self._lock:
+            self._built = False
+
+    def __getattr__(self, attr: str):
+        # Only called for attributes Lazy itself does not have
+        if attr.startswith("__") or attr in Lazy._own_attrs:
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._built else "pending"
+        return f"<Lazy {self._name} ({state})>"
+
+    def status(self) -> dict:
+        return {
+            "initialized": self._built,
+            "seconds": round(self._seconds, 3) if self._seconds is not None else None,
+            "error": self._error,
+        }
+
+
+def lazy_status() -> Dict[str, dict]:
+    return {name: lazy.status() for name, lazy in _registry.items()}
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    """
+    Build the registered singletons (all of them unless names are given).
+
+    Errors are logged, not raised, so one failing dependency does not keep
+    the others from warming up.
+    """
+    for name in list(names) if names is not None else list(_registry):
+        lazy = _registry.get(name)
+        if lazy is None:
+            logger.warning(f"Nothing registered to warm up as {name}")
+            continue
+        try:
+            lazy.get()
+        except Exception as e:
+            logger.error(f"Error initializing {name}: {str(e)}")
+    return lazy_status()
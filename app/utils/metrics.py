@@ -0,0 +1,136 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Histogram
+
+from .tracing import record_span
+
+# Stages of a chat turn and of the other request paths:
+#   classification  intent classification by the LLM
+#   agent           one specialized agent executor run (name: its route)
+#   tool            one tool call (name: JobSearch, EnterpriseSearch, ...)
+#   vector_search   one collection search (name: the collection)
+#   embedding       query/document embedding (name: query or documents)
+#   api_call        JobCompass API request (name: job, enterprise, profile)
+#   suggest         related-jobs lookups (name: the lookup)
+STAGE_SECONDS = Histogram(
+    "jobcompass_stage_duration_seconds",
+    "Time spent in a stage of request handling",
+    ["stage", "name", "route", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+STAGE_CALLS = Counter(
+    "jobcompass_stage_calls_total",
+    "Calls of a stage of request handling",
+    ["stage", "name", "route", "outcome"],
+)
+
+# Chat route (job_search, enterprise_search, website_content, general) of the
+# current turn; copied into worker threads and LangChain tool executors
+_route: ContextVar[str] = ContextVar("metrics_route", default="none")
+
+
+def set_route(route: str):
+    _route.set(route)
+
+
+def current_route() -> str:
+    return _route.get()
+
+
+class StageTimer:
+    """Handle yielded by track, set outcome to label anything but success."""
+
+    def __init__(self):
+        self.outcome = "success"
+
+
+def observe(stage: str, name: str, start: float, outcome: str, route: Optional[str] = None):
+    """Record a stage call that started at perf_counter() value start and ends now."""
+    end = time.perf_counter()
+    labels = (stage, name, route or _route.get(), outcome)
+    STAGE_SECONDS.labels(*labels).observe(end - start)
+    STAGE_CALLS.labels(*labels).inc()
+    # Also a span of the current request's trace, if any
+    record_span(stage, name, start, end, outcome)
+
+
+@contextmanager
+def track(stage: str, name: str, route: Optional[str] = None):
+    """
+    Time a block as one call of a stage.
+
+    An exception leaving the block is labelled "error". The route label is
+    read when the block exits, so a block that sets the route (intent
+    classification) is labelled with the route it chose.
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        timer.outcome = "error"
+        raise
+    finally:
+        observe(stage, name, start, timer.outcome, route)
+
+
+def tool_outcome(output: Any) -> str:
+    # Tools catch their errors and return them as text for the agent
+    if isinstance(output, str):
+        if output.startswith("Error"):
+            return "error"
+        if output.startswith(("Query not allowed", "Query rejected", "Query cancelled")):
+            return "rejected"
+        if output.startswith("No "):
+            return "empty"
+    return "success"
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Time the tool calls of agent executors, and their LLM calls for traces."""
+
+    # Only records a timestamp, no need for a worker thread in async runs
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, tuple] = {}
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._runs[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs):
+        started = self._runs.pop(run_id, None)
+        if started:
+            observe("tool", started[0], started[1], tool_outcome(output))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        started = self._runs.pop(run_id, None)
+        if started:
+            observe("tool", started[0], started[1], "error")
+
+    # Agent steps: the LLM call deciding the next tool or the final answer.
+    # Only traced, the agent stage already times the executor as a whole.
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = ("agent_step", time.perf_counter())
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs):
+        self._runs[run_id] = ("agent_step", time.perf_counter())
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs):
+        started = self._runs.pop(run_id, None)
+        if started:
+            record_span("llm", started[0], started[1], time.perf_counter(), "success")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        started = self._runs.pop(run_id, None)
+        if started:
+            record_span("llm", started[0], started[1], time.perf_counter(), "error")
+
+
+metrics_callback = MetricsCallbackHandler()
@@ -0,0 +1,134 @@
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+class Trace:
+    """
+    Spans recorded while handling one request.
+
+    Spans are appended from the event loop, worker threads and LangChain
+    callbacks, each with its offset from the start of the request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, name: str, start: float, end: float, outcome: str):
+        with self._lock:
+            self.spans.append(
+                {
+                    "stage": stage,
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000, 1),
+                    "duration_ms": round((end - start) * 1000, 1),
+                    "outcome": outcome,
+                    "thread": threading.current_thread().name,
+                }
+            )
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def breakdown(self) -> dict:
+        """Every span in start order, for a debug payload."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        return {"total_ms": self.elapsed_ms(), "spans": spans}
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, spans summed per stage and name."""
+        totals: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        with self._lock:
+            for span in self.spans:
+                total = totals.setdefault((span["stage"], span["name"]), [0.0, 0])
+                total[0] += span["duration_ms"]
+                total[1] += 1
+        entries = []
+        for (stage, name), (duration, count) in totals.items():
+            description = name if count == 1 else f"{name} x{count}"
+            description = description.replace("\\", "").replace('"', "")
+            entries.append(f'{stage};desc="{description}";dur={duration:.1f}')
+        entries.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(entries)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("request_trace", default=None)
+
+
+def start_trace() -> Trace:
+    """Start collecting spans for the current request (and the tasks it spawns)."""
+    trace = Trace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def record_span(stage: str, name: str, start: float, end: float, outcome: str):
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage, name, start, end, outcome)
+
+
+class SamplingProfiler:
+    """
+    Sample the Python stacks of every thread while one request runs.
+
+    Samples are folded into "thread;frame;frame count" lines, the input of
+    flame graph tools (flamegraph.pl, speedscope). Other requests handled at
+    the same time show up in the samples too.
+    """
+
+    def __init__(self, interval_ms: float = 5, max_seconds: float = 120):
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def result(self) -> Dict[str, object]:
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "folded": [
+                f"{stack} {count}" for stack, count in self._stacks.most_common()
+            ],
+        }
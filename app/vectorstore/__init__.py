@@ -2,10 +2,40 @@ from .pgvector import (
     website_content_vector_store,
     job_vector_store,
     enterprise_vector_store,
+    async_website_content_vector_store,
+    async_job_vector_store,
+    async_enterprise_vector_store,
+    pool_stats,
+)
+from .upsert import (
+    upsert_documents,
+    upsert_document_statuses,
+    aupsert_documents,
+    aupsert_document_statuses,
+    delete_documents,
+    delete_missing_documents,
+    content_hash,
+)
+from .search import (
+    search_documents,
+    asearch_documents,
 )
 
 __all__ = [
     "website_content_vector_store",
     "job_vector_store",
     "enterprise_vector_store",
+    "async_website_content_vector_store",
+    "async_job_vector_store",
+    "async_enterprise_vector_store",
+    "pool_stats",
+    "upsert_documents",
+    "upsert_document_statuses",
+    "aupsert_documents",
+    "aupsert_document_statuses",
+    "delete_documents",
+    "delete_missing_documents",
+    "content_hash",
+    "search_documents",
+    "asearch_documents",
 ]
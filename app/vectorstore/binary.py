@@ -0,0 +1,397 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from sqlalchemy import bindparam, text
+
+from app.config.config import BINARY_INDEX_REFRESH_SECONDS, BINARY_SEARCH_OVERSAMPLE
+from .pgvector import vector_engine
+from .schema import (
+    assert_embedding_key,
+    ensure_embedding_key,
+    primary_key,
+    strip_id_prefixes,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BINARY_TABLE = "langchain_pg_embedding_binary"
+
+# Number of set bits for every byte value
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def pack_bits(embeddings: Sequence[Sequence[float]]) -> np.ndarray:
+    """Binary-quantize embeddings to one sign bit per dimension, packed in bytes."""
+    return np.packbits(np.asarray(embeddings, dtype=np.float32) > 0, axis=-1)
+
+
+def vector_literal(embedding: Sequence[float]) -> str:
+    """Format an embedding as a pgvector text literal."""
+    return "[" + ",".join(str(float(value)) for value in embedding) + "]"
+
+
+_CREATE_BINARY_TABLE = text(
+    f"""
+    CREATE TABLE IF NOT EXISTS {BINARY_TABLE} (
+        collection_id UUID NOT NULL,
+        id VARCHAR NOT NULL,
+        bits BYTEA NOT NULL,
+        PRIMARY KEY (collection_id, id),
+        CONSTRAINT {BINARY_TABLE}_embedding_fkey FOREIGN KEY (collection_id, id)
+            REFERENCES langchain_pg_embedding (collection_id, id)
+            ON DELETE CASCADE ON UPDATE CASCADE
+    )
+    """
+)
+
+# Tables created with the id-only key, whose foreign key was dropped along
+# with the old langchain_pg_embedding key (see schema.py)
+_REKEY_BINARY_TABLE = text(
+    f"""
+    ALTER TABLE {BINARY_TABLE}
+        DROP CONSTRAINT IF EXISTS {BINARY_TABLE}_id_fkey,
+        DROP CONSTRAINT {BINARY_TABLE}_pkey,
+        ADD PRIMARY KEY (collection_id, id)
+    """
+)
+
+_ADD_BINARY_FOREIGN_KEY = text(
+    f"""
+    ALTER TABLE {BINARY_TABLE}
+        ADD CONSTRAINT {BINARY_TABLE}_embedding_fkey FOREIGN KEY (collection_id, id)
+        REFERENCES langchain_pg_embedding (collection_id, id)
+        ON DELETE CASCADE ON UPDATE CASCADE
+    """
+)
+
+_UPSERT_BINARY = text(
+    f"""
+    INSERT INTO {BINARY_TABLE} (id, collection_id, bits)
+    VALUES (:id, :collection_id, :bits)
+    ON CONFLICT (collection_id, id) DO UPDATE SET bits = EXCLUDED.bits
+    """
+)
+
+_RERANK = text(
+    """
+    SELECT id, document, cmetadata,
+           embedding <=> CAST(:embedding AS vector) AS distance
+    FROM langchain_pg_embedding
+    WHERE collection_id = :cid AND id IN :ids
+    ORDER BY distance
+    LIMIT :k
+    """
+).bindparams(bindparam("ids", expanding=True))
+
+
+def migrate_binary_table(session):
+    """
+    Move the embedding table and the binary table to the (collection_id, id)
+    key, then create the binary table if missing. Run by
+    scripts/migrate_vector_keys.py, never by the API.
+    """
+    ensure_embedding_key(session)
+    if primary_key(session, BINARY_TABLE) == ["id"]:
+        session.execute(_REKEY_BINARY_TABLE)
+        session.execute(text(f"DROP INDEX IF EXISTS ix_{BINARY_TABLE}_collection"))
+        strip_id_prefixes(session, BINARY_TABLE)
+        session.execute(_ADD_BINARY_FOREIGN_KEY)
+        logger.info(f"Migrated {BINARY_TABLE} to the (collection_id, id) primary key")
+    session.execute(_CREATE_BINARY_TABLE)
+
+
+def _create_binary_table(session):
+    assert_embedding_key(session)
+    if primary_key(session, BINARY_TABLE) == ["id"]:
+        raise RuntimeError(
+            f"{BINARY_TABLE} is keyed by id alone: run scripts/migrate_vector_keys.py"
+        )
+    session.execute(_CREATE_BINARY_TABLE)
+
+
+def _ensure_binary_table(session):
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        _create_binary_table(session)
+        session.commit()
+        _table_ready = True
+
+
+async def _aensure_binary_table(session):
+    global _table_ready
+    if _table_ready:
+        return
+    # CREATE ... IF NOT EXISTS is idempotent, racing coroutines are harmless
+    await session.run_sync(_create_binary_table)
+    await session.commit()
+    _table_ready = True
+
+
+def _binary_rows(collection_uuid, ids: Sequence[str], packed: np.ndarray) -> List[dict]:
+    return [
+        {"id": doc_id, "collection_id": collection_uuid, "bits": bits.tobytes()}
+        for doc_id, bits in zip(ids, packed)
+    ]
+
+
+def write_binary_vectors(
+    session, collection_uuid, ids: Sequence[str], embeddings: Sequence[Sequence[float]]
+) -> np.ndarray:
+    """Write the bit-packed copy of embeddings in the session's transaction."""
+    packed = pack_bits(embeddings)
+    session.execute(_UPSERT_BINARY, _binary_rows(collection_uuid, ids, packed))
+    return packed
+
+
+async def awrite_binary_vectors(
+    session, collection_uuid, ids: Sequence[str], embeddings: Sequence[Sequence[float]]
+) -> np.ndarray:
+    """write_binary_vectors for an async session."""
+    packed = pack_bits(embeddings)
+    await session.execute(_UPSERT_BINARY, _binary_rows(collection_uuid, ids, packed))
+    return packed
+
+
+def _merge(
+    ids: List[str], bits: np.ndarray, new_ids: Sequence[str], packed: np.ndarray
+) -> Tuple[List[str], np.ndarray]:
+    """Copy of (ids, bits) with the rows of new_ids replaced or appended."""
+    positions = {doc_id: i for i, doc_id in enumerate(ids)}
+    bits = bits.copy() if len(ids) else packed[:0].copy()
+    added_ids, added_rows = [], []
+    for doc_id, row in zip(new_ids, packed):
+        if doc_id in positions:
+            bits[positions[doc_id]] = row
+        else:
+            added_ids.append(doc_id)
+            added_rows.append(row)
+    if added_rows:
+        bits = np.vstack([bits, np.asarray(added_rows)])
+    return ids + added_ids, bits
+
+
+def _drop(
+    ids: List[str], bits: np.ndarray, removed: Sequence[str]
+) -> Tuple[List[str], np.ndarray]:
+    """Copy of (ids, bits) without the rows of removed."""
+    removed = set(removed)
+    keep = [i for i, doc_id in enumerate(ids) if doc_id not in removed]
+    if len(keep) == len(ids):
+        return ids, bits
+    return [ids[i] for i in keep], bits[keep]
+
+
+def _apply(
+    ids: List[str],
+    bits: np.ndarray,
+    change_ids: Sequence[str],
+    packed: Optional[np.ndarray],
+) -> Tuple[List[str], np.ndarray]:
+    # packed is None for a removal
+    if packed is None:
+        return _drop(ids, bits, change_ids)
+    return _merge(ids, bits, change_ids, packed)
+
+
+class BinaryIndex:
+    """
+    In-memory Hamming-distance index over the bit-packed copy of a collection.
+
+    768 float32 dimensions shrink to 96 bytes per document, so the candidate
+    scan touches 32x less memory than a full-precision scan.
+
+    One caller at a time reloads the index, outside the lock guarding the
+    arrays; searches keep scanning the previous copy meanwhile.
+    """
+
+    def __init__(self, collection_name: str, refresh_seconds: float):
+        # Loaded through the shared sync engine, so sync and async stores of a
+        # collection share one index
+        self.collection_name = collection_name
+        self.refresh_seconds = refresh_seconds
+        self.ids: List[str] = []
+        self.bits = np.zeros((0, 0), dtype=np.uint8)
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # Writes and deletes applied while a reload runs, replayed on the
+        # loaded copy (packed is None for a delete)
+        self._pending: Optional[
+            List[Tuple[Sequence[str], Optional[np.ndarray]]]
+        ] = None
+
+    def _change(self, ids: Sequence[str], packed: Optional[np.ndarray]):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((ids, packed))
+            if self._loaded_at is None:
+                return
+            self.ids, self.bits = _apply(self.ids, self.bits, ids, packed)
+
+    def update(self, ids: Sequence[str], packed: np.ndarray):
+        """Apply this process's own writes without waiting for a refresh."""
+        self._change(ids, packed)
+
+    def remove(self, ids: Sequence[str]):
+        """Drop this process's own deletes, so they stop taking candidate slots."""
+        self._change(ids, None)
+
+    def _read(self) -> Tuple[List[str], np.ndarray]:
+        with vector_engine.connect() as conn:
+            _ensure_binary_table(conn)
+            rows = conn.execute(
+                text(
+                    f"""
+                    SELECT b.id, b.bits
+                    FROM {BINARY_TABLE} b
+                    JOIN langchain_pg_collection c ON c.uuid = b.collection_id
+                    WHERE c.name = :name
+                    """
+                ),
+                {"name": self.collection_name},
+            ).all()
+
+        ids = [row.id for row in rows]
+        if not rows:
+            return ids, np.zeros((0, 0), dtype=np.uint8)
+        bits = np.frombuffer(
+            b"".join(bytes(row.bits) for row in rows), dtype=np.uint8
+        ).reshape(len(rows), -1)
+        return ids, bits
+
+    def _stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    def _load(self):
+        # Only the first load makes callers wait, later ones are single-flight
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if not self._stale():
+                return
+            with self._lock:
+                self._pending = []
+            ids, bits = self._read()
+            with self._lock:
+                for change_ids, packed in self._pending:
+                    ids, bits = _apply(ids, bits, change_ids, packed)
+                self.ids, self.bits = ids, bits
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._pending = None
+            self._load_lock.release()
+        logger.info(
+            f"Loaded binary index for '{self.collection_name}' "
+            f"with {len(ids)} documents ({bits.nbytes} bytes)"
+        )
+
+    def candidates(self, embedding: Sequence[float], n: int) -> List[str]:
+        """Return the ids of the n documents closest in Hamming distance."""
+        if self._stale():
+            self._load()
+        with self._lock:
+            ids, bits = self.ids, self.bits
+
+        if not ids:
+            return []
+        distances = _POPCOUNT[np.bitwise_xor(bits, pack_bits(embedding))].sum(axis=1)
+        n = min(n, len(ids))
+        nearest = np.argpartition(distances, n - 1)[:n]
+        return [ids[i] for i in nearest[np.argsort(distances[nearest])]]
+
+
+_indexes: Dict[str, BinaryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def binary_index(vector_store: PGVector) -> BinaryIndex:
+    with _indexes_lock:
+        index = _indexes.get(vector_store.collection_name)
+        if index is None:
+            index = BinaryIndex(vector_store.collection_name, BINARY_INDEX_REFRESH_SECONDS)
+            _indexes[vector_store.collection_name] = index
+        return index
+
+
+def binary_similarity_search_by_vector(
+    vector_store: PGVector,
+    embedding: List[float],
+    k: int = 4,
+    oversample: int = BINARY_SEARCH_OVERSAMPLE,
+) -> List[Document]:
+    """
+    Two-stage search: Hamming candidates from the binary index, then an exact
+    cosine rerank of those candidates in Postgres.
+    """
+    candidate_ids = binary_index(vector_store).candidates(embedding, k * oversample)
+    if not candidate_ids:
+        return []
+
+    with vector_store.session_maker() as session:
+        collection = vector_store.get_collection(session)
+        rows = session.execute(
+            _RERANK,
+            {
+                "embedding": vector_literal(embedding),
+                "cid": collection.uuid,
+                "ids": candidate_ids,
+                "k": k,
+            },
+        ).all()
+    return _rows_to_documents(rows)
+
+
+async def abinary_similarity_search_by_vector(
+    vector_store: PGVector,
+    embedding: List[float],
+    k: int = 4,
+    oversample: int = BINARY_SEARCH_OVERSAMPLE,
+) -> List[Document]:
+    """binary_similarity_search_by_vector for an async store."""
+    # The scan is numpy work and the periodic reload is a sync query
+    candidate_ids = await asyncio.to_thread(
+        binary_index(vector_store).candidates, embedding, k * oversample
+    )
+    if not candidate_ids:
+        return []
+
+    async with vector_store.session_maker() as session:
+        collection = await vector_store.aget_collection(session)
+        rows = (
+            await session.execute(
+                _RERANK,
+                {
+                    "embedding": vector_literal(embedding),
+                    "cid": collection.uuid,
+                    "ids": candidate_ids,
+                    "k": k,
+                },
+            )
+        ).all()
+    return _rows_to_documents(rows)
+
+
+def _rows_to_documents(rows) -> List[Document]:
+    return [
+        Document(id=row.id, page_content=row.document, metadata=row.cmetadata)
+        for row in rows
+    ]
@@ -0,0 +1,220 @@
+import re
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from sqlalchemy import Text, cast, func, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import TSQUERY
+
+from app.config.config import HYBRID_RRF_K, HYBRID_SEARCH_CANDIDATES
+
+# "simple" keeps terms like "ReactJS" or company names unstemmed. It must
+# match the expression of the index built by scripts/vector_index.py.
+TEXT_SEARCH_CONFIG = "simple"
+
+
+def text_search_vector(EmbeddingStore):
+    return func.to_tsvector(
+        literal_column(f"'{TEXT_SEARCH_CONFIG}'"), EmbeddingStore.document
+    )
+
+
+# English stopwords, dropped from queries: the "simple" configuration keeps
+# them, so "jobs at the bank" would rank every document containing "the"
+STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because
+    been before being below between both but by can could did do does doing
+    down during each few for from further had has have having he her here hers
+    herself him himself his how i if in into is it its itself just me more most
+    my myself no nor not now of off on once only or other our ours ourselves
+    out over own same she should so some such than that the their theirs them
+    themselves then there these they this those through to too under until up
+    very was we were what when where which while who whom why will with would
+    you your yours yourself yourselves
+    """.split()
+)
+
+_WORD = re.compile(r"\w+")
+
+
+def _is_stopword(word: str) -> bool:
+    # Upper-case words are acronyms ("IT", "US"), not stopwords
+    acronym = len(word) > 1 and word.isupper()
+    return word.lower() in STOPWORDS and not acronym
+
+
+def strip_stopwords(query: str) -> str:
+    kept = _WORD.sub(lambda m: " " if _is_stopword(m.group()) else m.group(), query)
+    return " ".join(kept.split())
+
+
+def _text_queries(query: str):
+    """Queries matching every term and any term of the query, without stopwords."""
+    all_terms = func.plainto_tsquery(
+        literal_column(f"'{TEXT_SEARCH_CONFIG}'"), strip_stopwords(query)
+    )
+    any_term = cast(func.replace(cast(all_terms, Text), "&", "|"), TSQUERY)
+    return all_terms, any_term
+
+
+def _hybrid_statement(
+    vector_store: PGVector,
+    collection_uuid,
+    query: str,
+    embedding: List[float],
+    k: int,
+    filter: Optional[dict],
+    candidates: int,
+    rrf_k: int,
+    vector_candidates: Optional[List[str]] = None,
+):
+    EmbeddingStore = vector_store.EmbeddingStore
+    conditions = [EmbeddingStore.collection_id == collection_uuid]
+    if filter:
+        # Private PGVector API, stable as long as requirement.txt pins
+        # langchain_postgres==0.0.14; check it when upgrading
+        conditions.append(vector_store._create_filter_clause(filter))
+
+    vector_conditions = list(conditions)
+    if vector_candidates is not None:
+        # Binary mode: the vector ranking reranks the binary index's candidates
+        vector_conditions.append(EmbeddingStore.id.in_(vector_candidates))
+
+    distance = EmbeddingStore.embedding.cosine_distance(embedding)
+    vector_ranked = (
+        select(
+            EmbeddingStore.id,
+            func.row_number().over(order_by=distance).label("rank"),
+        )
+        .where(*vector_conditions)
+        .order_by(distance)
+        .limit(candidates)
+        .cte("vector_ranked")
+    )
+
+    ts_vector = text_search_vector(EmbeddingStore)
+    all_terms, any_term = _text_queries(query)
+    # Documents with every term first, then the ones matching only some
+    text_order = (
+        ts_vector.op("@@")(all_terms).desc(),
+        func.ts_rank_cd(ts_vector, any_term).desc(),
+    )
+    text_ranked = (
+        select(
+            EmbeddingStore.id,
+            func.row_number().over(order_by=text_order).label("rank"),
+        )
+        .where(*conditions, ts_vector.op("@@")(any_term))
+        .order_by(*text_order)
+        .limit(candidates)
+        .cte("text_ranked")
+    )
+
+    ranks = union_all(
+        select(vector_ranked.c.id, vector_ranked.c.rank),
+        select(text_ranked.c.id, text_ranked.c.rank),
+    ).subquery()
+    fused = (
+        select(
+            ranks.c.id,
+            func.sum(1.0 / (rrf_k + ranks.c.rank)).label("score"),
+        )
+        .group_by(ranks.c.id)
+        .subquery()
+    )
+
+    return (
+        select(
+            EmbeddingStore.id,
+            EmbeddingStore.document,
+            EmbeddingStore.cmetadata,
+            fused.c.score,
+        )
+        .join(fused, EmbeddingStore.id == fused.c.id)
+        .where(EmbeddingStore.collection_id == collection_uuid)
+        .order_by(fused.c.score.desc())
+        .limit(k)
+    )
+
+
+def _rows_to_documents(rows) -> List[Document]:
+    return [
+        Document(id=row.id, page_content=row.document, metadata=row.cmetadata)
+        for row in rows
+    ]
+
+
+def hybrid_search_by_vector(
+    vector_store: PGVector,
+    query: str,
+    embedding: List[float],
+    k: int = 4,
+    filter: Optional[dict] = None,
+    candidates: int = HYBRID_SEARCH_CANDIDATES,
+    rrf_k: int = HYBRID_RRF_K,
+    vector_candidates: Optional[List[str]] = None,
+) -> List[Document]:
+    """
+    Fuse full-text and vector rankings with reciprocal rank fusion.
+
+    Both rankings take their top candidates from the collection, every
+    document scores sum(1 / (rrf_k + rank)) over the rankings it appears in.
+    The text ranking ignores English stopwords and puts documents matching
+    every remaining term ahead of those matching only some. Everything runs
+    in a single SQL statement.
+
+    With vector_candidates (ids from the binary index), the vector ranking
+    only orders those documents instead of scanning the collection.
+    """
+    with vector_store.session_maker() as session:
+        collection = vector_store.get_collection(session)
+        if not collection:
+            return []
+        rows = session.execute(
+            _hybrid_statement(
+                vector_store,
+                collection.uuid,
+                query,
+                embedding,
+                k,
+                filter,
+                candidates,
+                rrf_k,
+                vector_candidates,
+            )
+        ).all()
+    return _rows_to_documents(rows)
+
+
+async def ahybrid_search_by_vector(
+    vector_store: PGVector,
+    query: str,
+    embedding: List[float],
+    k: int = 4,
+    filter: Optional[dict] = None,
+    candidates: int = HYBRID_SEARCH_CANDIDATES,
+    rrf_k: int = HYBRID_RRF_K,
+    vector_candidates: Optional[List[str]] = None,
+) -> List[Document]:
+    """hybrid_search_by_vector for an async store."""
+    async with vector_store.session_maker() as session:
+        collection = await vector_store.aget_collection(session)
+        if not collection:
+            return []
+        rows = (
+            await session.execute(
+                _hybrid_statement(
+                    vector_store,
+                    collection.uuid,
+                    query,
+                    embedding,
+                    k,
+                    filter,
+                    candidates,
+                    rrf_k,
+                    vector_candidates,
+                )
+            )
+        ).all()
+    return _rows_to_documents(rows)
@@ -0,0 +1,306 @@
+import logging
+from typing import Dict, List, Optional
+
+from langchain_postgres import PGVector
+from sqlalchemy import text
+
+from app.config.config import (
+    DB_CONFIG_VECTOR,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_M,
+    IVFFLAT_LISTS,
+    VECTOR_INDEX_METHOD,
+)
+from app.llm.embeddings import EMBEDDING_DIMENSIONS
+from app.services.leader import advisory_lock
+from .hybrid import TEXT_SEARCH_CONFIG
+from .pgvector import vector_engine
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+# Held by the one process building indexes, so workers and replicas starting
+# together do not all run the same CREATE INDEX CONCURRENTLY
+INDEX_BUILD_LOCK = "vector_index_build"
+
+
+def index_name(vector_store: PGVector) -> str:
+    return f"ix_embedding_{vector_store.collection_name}"
+
+
+def _collection_uuid(vector_store: PGVector) -> Optional[str]:
+    with vector_store.session_maker() as session:
+        collection = vector_store.get_collection(session)
+        return str(collection.uuid) if collection else None
+
+
+def embedding_dimensions() -> Optional[int]:
+    """Return the declared dimension of the embedding column, None if untyped."""
+    with vector_engine.connect() as conn:
+        typmod = conn.execute(
+            text(
+                """
+                SELECT atttypmod FROM pg_attribute
+                WHERE attrelid = 'langchain_pg_embedding'::regclass
+                  AND attname = 'embedding'
+                """
+            )
+        ).scalar()
+    return typmod if typmod and typmod > 0 else None
+
+
+def set_embedding_dimensions(dimensions: int = EMBEDDING_DIMENSIONS):
+    """
+    Declare the embedding column as vector(dimensions), which HNSW and IVFFlat
+    indexes require. Rewrites the table and fails if a stored vector has a
+    different size.
+    """
+    with vector_engine.begin() as conn:
+        conn.execute(
+            text(
+                f"ALTER TABLE langchain_pg_embedding "
+                f"ALTER COLUMN embedding TYPE vector({int(dimensions)})"
+            )
+        )
+    logger.info(f"Embedding column declared as vector({dimensions})")
+
+
+def index_status(vector_store: PGVector) -> Optional[Dict[str, str]]:
+    """Return the definition and size of the collection's index, None if missing."""
+    with vector_engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """
+                SELECT i.indexdef,
+                       pg_size_pretty(pg_relation_size(c.oid)) AS size,
+                       ix.indisvalid AS valid
+                FROM pg_indexes i
+                JOIN pg_class c ON c.relname = i.indexname
+                JOIN pg_index ix ON ix.indexrelid = c.oid
+                WHERE i.tablename = 'langchain_pg_embedding' AND i.indexname = :name
+                """
+            ),
+            {"name": index_name(vector_store)},
+        ).first()
+    if row is None:
+        return None
+    return {"definition": row.indexdef, "size": row.size, "valid": row.valid}
+
+
+def _ivfflat_lists(vector_store: PGVector, collection_uuid: str) -> int:
+    if IVFFLAT_LISTS > 0:
+        return IVFFLAT_LISTS
+    with vector_engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = :cid"),
+            {"cid": collection_uuid},
+        ).scalar()
+    # pgvector's guideline for up to 1M rows
+    return max(1, rows // 1000)
+
+
+def create_index(
+    vector_store: PGVector,
+    method: str = VECTOR_INDEX_METHOD,
+    m: int = HNSW_M,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    lists: Optional[int] = None,
+) -> bool:
+    """
+    Build a partial cosine-distance index over one collection's rows.
+
+    The index is built CONCURRENTLY so searches and writes keep working.
+
+    Returns:
+        bool: False if the index already exists or the collection is empty
+    """
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unsupported vector index method: {method}")
+    if embedding_dimensions() is None:
+        raise RuntimeError(
+            "langchain_pg_embedding.embedding has no declared dimension, "
+            "run scripts/vector_index.py create --set-dimensions first"
+        )
+    if index_status(vector_store) is not None:
+        return False
+
+    collection_uuid = _collection_uuid(vector_store)
+    if collection_uuid is None:
+        logger.warning(f"Collection '{vector_store.collection_name}' does not exist yet")
+        return False
+
+    if method == "hnsw":
+        options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        options = f"lists = {int(lists or _ivfflat_lists(vector_store, collection_uuid))}"
+
+    # The predicate has to be a literal for the planner to match it to queries
+    statement = (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(vector_store)} "
+        f"ON langchain_pg_embedding USING {method} (embedding vector_cosine_ops) "
+        f"WITH ({options}) WHERE collection_id = '{collection_uuid}'"
+    )
+    logger.info(f"Creating vector index: {statement}")
+    with vector_engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(text(statement))
+    return True
+
+
+def drop_index(vector_store: PGVector) -> bool:
+    """Drop the collection's index, returns False if it did not exist."""
+    if index_status(vector_store) is None:
+        return False
+    with vector_engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(vector_store)}"))
+    return True
+
+
+def check_indexes(vector_stores: List[PGVector], auto_create: bool = False) -> List[str]:
+    """
+    Report collections without a vector index, creating them when asked.
+
+    Only the process holding INDEX_BUILD_LOCK creates indexes, the others
+    just report.
+
+    Returns:
+        list: Names of the collections that are still unindexed
+    """
+    if VECTOR_INDEX_METHOD == "none":
+        return []
+
+    if auto_create:
+        with advisory_lock(INDEX_BUILD_LOCK, DB_CONFIG_VECTOR) as leader:
+            if leader:
+                return _check_indexes(vector_stores, auto_create=True)
+        logger.info("Another process is building the vector indexes, only checking them")
+    return _check_indexes(vector_stores, auto_create=False)
+
+
+def _check_indexes(vector_stores: List[PGVector], auto_create: bool) -> List[str]:
+    missing = []
+    for vector_store in vector_stores:
+        status = index_status(vector_store)
+        if status is not None and status["valid"]:
+            continue
+        if status is not None:
+            # Left behind by an interrupted CREATE INDEX CONCURRENTLY
+            logger.warning(f"Vector index {index_name(vector_store)} is invalid")
+        elif auto_create and embedding_dimensions() is not None:
+            if create_index(vector_store):
+                continue
+        missing.append(vector_store.collection_name)
+
+    if auto_create:
+        create_metadata_indexes()
+        create_text_search_index()
+
+    if missing:
+        logger.warning(
+            f"Collections searched without a vector index: {', '.join(missing)}. "
+            "Run scripts/vector_index.py create to build them."
+        )
+    return missing
+
+
+# Metadata fields filtered with $ilike by the job search tool
+TRIGRAM_INDEXED_FIELDS = ("locations", "job_type", "categories")
+
+
+def metadata_index_name(field: str) -> str:
+    return f"ix_cmetadata_{field}_trgm"
+
+
+def create_metadata_indexes() -> List[str]:
+    """
+    Build trigram indexes on the metadata text that search filters match
+    with ILIKE. Range conditions are checked on the rows these indexes and
+    the collection index return.
+
+    Returns:
+        list: Names of the indexes that were created
+    """
+    created = []
+    with vector_engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        existing = set(
+            conn.execute(
+                text(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE tablename = 'langchain_pg_embedding'"
+                )
+            ).scalars()
+        )
+        for field in TRIGRAM_INDEXED_FIELDS:
+            name = metadata_index_name(field)
+            if name in existing:
+                continue
+            conn.execute(
+                text(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                    f"ON langchain_pg_embedding "
+                    f"USING gin ((cmetadata ->> '{field}') gin_trgm_ops)"
+                )
+            )
+            created.append(name)
+    return created
+
+
+def metadata_index_status() -> Dict[str, bool]:
+    """Return whether each metadata filter index exists."""
+    with vector_engine.connect() as conn:
+        existing = set(
+            conn.execute(
+                text(
+                    "SELECT indexname FROM pg_indexes "
+                    "WHERE tablename = 'langchain_pg_embedding'"
+                )
+            ).scalars()
+        )
+    return {
+        metadata_index_name(field): metadata_index_name(field) in existing
+        for field in TRIGRAM_INDEXED_FIELDS
+    }
+
+
+TEXT_SEARCH_INDEX = "ix_embedding_document_fts"
+
+
+def create_text_search_index() -> bool:
+    """
+    Build the GIN full-text index used by hybrid search.
+
+    Returns:
+        bool: False if the index already exists
+    """
+    if text_search_index_exists():
+        return False
+    with vector_engine.connect().execution_options(
+        isolation_level="AUTOCOMMIT"
+    ) as conn:
+        conn.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {TEXT_SEARCH_INDEX} "
+                f"ON langchain_pg_embedding "
+                f"USING gin (to_tsvector('{TEXT_SEARCH_CONFIG}', document))"
+            )
+        )
+    return True
+
+
+def text_search_index_exists() -> bool:
+    with vector_engine.connect() as conn:
+        return (
+            conn.execute(
+                text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+                {"name": TEXT_SEARCH_INDEX},
+            ).first()
+            is not None
+        )
@@ -1,24 +1,146 @@
+import logging
+
 from langchain_postgres import PGVector
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from constants import vector_database_url
+from app.config.config import (
+    HNSW_EF_SEARCH,
+    HNSW_ITERATIVE_SCAN,
+    IVFFLAT_PROBES,
+    VECTOR_DB_MAX_OVERFLOW,
+    VECTOR_DB_POOL_SIZE,
+    VECTOR_DB_POOL_TIMEOUT,
+)
 from app.llm import embeddings_model
+from app.llm.embeddings import EMBEDDING_DIMENSIONS
+from app.utils.lazy import Lazy
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_POOL_OPTIONS = {
+    "pool_size": VECTOR_DB_POOL_SIZE,
+    "max_overflow": VECTOR_DB_MAX_OVERFLOW,
+    "pool_timeout": VECTOR_DB_POOL_TIMEOUT,
+    "pool_pre_ping": True,
+}
+
+
+def _set_search_params(dbapi_connection, connection_record):
+    # Query-time recall/speed trade-off of the collection indexes
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET hnsw.ef_search = {int(HNSW_EF_SEARCH)}")
+    cursor.execute(f"SET ivfflat.probes = {int(IVFFLAT_PROBES)}")
+    cursor.close()
+    dbapi_connection.commit()
+    if HNSW_ITERATIVE_SCAN and HNSW_ITERATIVE_SCAN != "off":
+        cursor = dbapi_connection.cursor()
+        try:
+            # set_config, psycopg 3 binds parameters server side where SET takes none
+            cursor.execute(
+                "SELECT set_config('hnsw.iterative_scan', %s, false)",
+                (HNSW_ITERATIVE_SCAN,),
+            )
+            dbapi_connection.commit()
+        except Exception as e:
+            # pgvector before 0.8 has no iterative scans
+            dbapi_connection.rollback()
+            logger.warning(f"hnsw.iterative_scan not set: {str(e)}")
+        finally:
+            cursor.close()
+
+
+# One engine and connection pool shared by every collection
+vector_engine = create_engine(vector_database_url, **_POOL_OPTIONS)
+event.listen(vector_engine, "connect", _set_search_params)
+
+
+def create_async_vector_engine() -> AsyncEngine:
+    """Async (psycopg 3) engine shared by the async collections, same pool settings."""
+    engine = create_async_engine(
+        vector_database_url.replace("postgresql://", "postgresql+psycopg://", 1),
+        **_POOL_OPTIONS,
+    )
+    event.listen(engine.sync_engine, "connect", _set_search_params)
+    return engine
+
+
+async_vector_engine = Lazy("async_vector_engine", create_async_vector_engine)
 
-website_content_vector_store = PGVector(
-    collection_name="website_content",
-    connection=vector_database_url,
-    embeddings=embeddings_model,
-    use_jsonb=True,
-)
 
-job_vector_store = PGVector(
-    collection_name="job_listings",
-    connection=vector_database_url,
-    embeddings=embeddings_model,
-    use_jsonb=True,
+def _pool_status(engine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+
+
+def pool_stats() -> dict:
+    """Connection pool usage of the sync and async vector database engines."""
+    return {
+        "sync": _pool_status(vector_engine),
+        "async": (
+            _pool_status(async_vector_engine.get())
+            if async_vector_engine.initialized
+            else None
+        ),
+        "max_connections_per_engine": VECTOR_DB_POOL_SIZE + VECTOR_DB_MAX_OVERFLOW,
+    }
+
+
+WEBSITE_CONTENT_COLLECTION = "website_content"
+JOB_COLLECTION = "job_listings"
+ENTERPRISE_COLLECTION = "enterprise_listings"
+
+
+def create_vector_store(collection_name: str) -> PGVector:
+    # PGVector creates the extension and the collection row when constructed
+    return PGVector(
+        collection_name=collection_name,
+        connection=vector_engine,
+        embeddings=embeddings_model,
+        embedding_length=EMBEDDING_DIMENSIONS,
+        use_jsonb=True,
+    )
+
+
+def create_async_vector_store(collection_name: str) -> PGVector:
+    # Async stores create the extension and the collection row on first use
+    return PGVector(
+        collection_name=collection_name,
+        connection=async_vector_engine.get(),
+        embeddings=embeddings_model,
+        embedding_length=EMBEDDING_DIMENSIONS,
+        use_jsonb=True,
+        async_mode=True,
+    )
+
+
+# Built on first use so importing the app does not need the vector database
+website_content_vector_store = Lazy(
+    "website_content_vector_store",
+    lambda: create_vector_store(WEBSITE_CONTENT_COLLECTION),
+)
+job_vector_store = Lazy("job_vector_store", lambda: create_vector_store(JOB_COLLECTION))
+enterprise_vector_store = Lazy(
+    "enterprise_vector_store", lambda: create_vector_store(ENTERPRISE_COLLECTION)
 )
 
-enterprise_vector_store = PGVector(
-    collection_name="enterprise_listings",
-    connection=vector_database_url,
-    embeddings=embeddings_model,
-    use_jsonb=True,
+# Same collections for request handlers, queries await a pooled connection
+# instead of holding a thread for their duration
+async_website_content_vector_store = Lazy(
+    "async_website_content_vector_store",
+    lambda: create_async_vector_store(WEBSITE_CONTENT_COLLECTION),
+)
+async_job_vector_store = Lazy(
+    "async_job_vector_store", lambda: create_async_vector_store(JOB_COLLECTION)
+)
+async_enterprise_vector_store = Lazy(
+    "async_enterprise_vector_store",
+    lambda: create_async_vector_store(ENTERPRISE_COLLECTION),
 )
@@ -0,0 +1,130 @@
+"""
+Primary key of langchain_pg_embedding.
+
+langchain_postgres keys the embedding table by id alone, so a document id
+could only exist in one collection. It is migrated to (collection_id, id):
+blue/green versions of a collection (versioning.py) then hold the same
+unprefixed ids and are made live by renaming collections, without touching
+their rows.
+
+The migration rewrites the table under an exclusive lock, so only
+scripts/migrate_vector_keys.py runs it; the API and the other scripts check
+the key with assert_embedding_key.
+"""
+
+import logging
+import threading
+from typing import List, Optional
+
+from sqlalchemy import text
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+# Serializes the migration and the creation of the side tables across processes
+SCHEMA_LOCK = "langchain_pg_embedding_schema"
+
+_key_checked = False
+_key_lock = threading.Lock()
+
+
+def lock_schema(session):
+    """Take the schema lock until the session's transaction ends."""
+    session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": SCHEMA_LOCK}
+    )
+
+
+def primary_key(session, table: str) -> Optional[List[str]]:
+    """Column names of a table's primary key, None if the table does not exist."""
+    exists = session.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar()
+    if exists is None:
+        return None
+    return list(
+        session.execute(
+            text(
+                """
+                SELECT a.attname
+                FROM pg_index i
+                JOIN pg_attribute a
+                  ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = CAST(:table AS regclass) AND i.indisprimary
+                ORDER BY array_position(CAST(i.indkey AS int2[]), a.attnum)
+                """
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def strip_id_prefixes(session, table: str) -> int:
+    """
+    Remove the ``"<collection name>:"`` prefix that non-live collections used
+    to carry on their ids. Returns the number of rows renamed.
+    """
+    return session.execute(
+        text(
+            f"""
+            UPDATE {table} AS t SET id = substr(t.id, length(c.name) + 2)
+            FROM langchain_pg_collection c
+            WHERE t.collection_id = c.uuid AND starts_with(t.id, c.name || ':')
+            """
+        )
+    ).rowcount
+
+
+def assert_embedding_key(session):
+    """
+    Raise unless langchain_pg_embedding has the (collection_id, id) primary key.
+
+    Checked once per process. Writes keyed by (collection_id, id) would fail
+    on the old key anyway, this says how to fix it.
+    """
+    global _key_checked
+    if _key_checked:
+        return
+    with _key_lock:
+        if _key_checked:
+            return
+        key = primary_key(session, EMBEDDING_TABLE)
+        if key != ["collection_id", "id"]:
+            raise RuntimeError(
+                f"{EMBEDDING_TABLE} is keyed by {key}, not (collection_id, id): "
+                "run scripts/migrate_vector_keys.py"
+            )
+        _key_checked = True
+
+
+def ensure_embedding_key(session):
+    """
+    Migrate langchain_pg_embedding to the (collection_id, id) primary key.
+
+    Idempotent. Runs under the schema lock, which the caller releases by
+    ending the transaction. Foreign keys on the old key are dropped with it,
+    their tables re-create them (see binary.py).
+    """
+    lock_schema(session)
+    key = primary_key(session, EMBEDDING_TABLE)
+    if key is None or key == ["collection_id", "id"]:
+        return
+
+    constraint = session.execute(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+        ),
+        {"table": EMBEDDING_TABLE},
+    ).scalar()
+    session.execute(
+        text(f'ALTER TABLE {EMBEDDING_TABLE} DROP CONSTRAINT "{constraint}" CASCADE')
+    )
+    session.execute(
+        text(f"ALTER TABLE {EMBEDDING_TABLE} ADD PRIMARY KEY (collection_id, id)")
+    )
+    renamed = strip_id_prefixes(session, EMBEDDING_TABLE)
+    logger.info(
+        f"Migrated {EMBEDDING_TABLE} to the (collection_id, id) primary key, "
+        f"{renamed} prefixed ids renamed"
+    )
@@ -0,0 +1,122 @@
+import asyncio
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+
+from app.config.config import (
+    BINARY_SEARCH_OVERSAMPLE,
+    HYBRID_SEARCH_CANDIDATES,
+    HYBRID_SEARCH_ENABLED,
+    VECTOR_SEARCH_MODE,
+)
+from app.llm import embeddings_model
+from app.utils.metrics import track
+from .binary import (
+    abinary_similarity_search_by_vector,
+    binary_index,
+    binary_similarity_search_by_vector,
+)
+from .hybrid import ahybrid_search_by_vector, hybrid_search_by_vector
+
+
+def _uses_binary(filter: Optional[dict]) -> bool:
+    return VECTOR_SEARCH_MODE == "binary" and not filter
+
+
+# Binary candidates reranked by the hybrid search's vector ranking
+_HYBRID_BINARY_CANDIDATES = HYBRID_SEARCH_CANDIDATES * BINARY_SEARCH_OVERSAMPLE
+
+
+def search_by_vector(
+    vector_store: PGVector,
+    embedding: List[float],
+    k: int = 4,
+    filter: Optional[dict] = None,
+) -> List[Document]:
+    """
+    Search a collection with the configured VECTOR_SEARCH_MODE.
+
+    Binary search has no metadata filtering, filtered searches always run exact.
+    """
+    with track("vector_search", vector_store.collection_name):
+        if _uses_binary(filter):
+            return binary_similarity_search_by_vector(vector_store, embedding, k=k)
+        return vector_store.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+
+def search_documents(
+    vector_store: PGVector,
+    query: str,
+    k: int = 4,
+    filter: Optional[dict] = None,
+    hybrid: bool = False,
+) -> List[Document]:
+    """
+    Embed a query and search one collection with the configured mode.
+
+    With hybrid=True (and HYBRID_SEARCH_ENABLED) full-text matches on the
+    query terms are fused with the vector ranking. In binary mode that
+    ranking reranks the binary index's candidates, like binary search does.
+    """
+    embedding = embeddings_model.embed_query(query)
+    if hybrid and HYBRID_SEARCH_ENABLED:
+        with track("vector_search", vector_store.collection_name):
+            vector_candidates = None
+            if _uses_binary(filter):
+                vector_candidates = binary_index(vector_store).candidates(
+                    embedding, _HYBRID_BINARY_CANDIDATES
+                )
+            return hybrid_search_by_vector(
+                vector_store,
+                query,
+                embedding,
+                k=k,
+                filter=filter,
+                vector_candidates=vector_candidates,
+            )
+    return search_by_vector(vector_store, embedding, k=k, filter=filter)
+
+
+async def asearch_by_vector(
+    vector_store: PGVector,
+    embedding: List[float],
+    k: int = 4,
+    filter: Optional[dict] = None,
+) -> List[Document]:
+    """search_by_vector on an async store."""
+    with track("vector_search", vector_store.collection_name):
+        if _uses_binary(filter):
+            return await abinary_similarity_search_by_vector(vector_store, embedding, k=k)
+        return await vector_store.asimilarity_search_by_vector(
+            embedding, k=k, filter=filter
+        )
+
+
+async def asearch_documents(
+    vector_store: PGVector,
+    query: str,
+    k: int = 4,
+    filter: Optional[dict] = None,
+    hybrid: bool = False,
+) -> List[Document]:
+    """search_documents on an async store."""
+    embedding = await embeddings_model.aembed_query(query)
+    if hybrid and HYBRID_SEARCH_ENABLED:
+        with track("vector_search", vector_store.collection_name):
+            vector_candidates = None
+            if _uses_binary(filter):
+                vector_candidates = await asyncio.to_thread(
+                    binary_index(vector_store).candidates,
+                    embedding,
+                    _HYBRID_BINARY_CANDIDATES,
+                )
+            return await ahybrid_search_by_vector(
+                vector_store,
+                query,
+                embedding,
+                k=k,
+                filter=filter,
+                vector_candidates=vector_candidates,
+            )
+    return await asearch_by_vector(vector_store, embedding, k=k, filter=filter)
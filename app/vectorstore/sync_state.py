@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from .pgvector import vector_engine
+
+_table_ready = False
+
+
+def _ensure_table(conn):
+    global _table_ready
+    if _table_ready:
+        return
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS vector_sync_state (
+                name TEXT PRIMARY KEY,
+                watermark TIMESTAMPTZ NOT NULL,
+                synced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+    )
+    _table_ready = True
+
+
+def get_watermark(name: str) -> Optional[datetime]:
+    """Return the high-water mark of the last successful sync, None if never synced."""
+    with vector_engine.begin() as conn:
+        _ensure_table(conn)
+        return conn.execute(
+            text("SELECT watermark FROM vector_sync_state WHERE name = :name"),
+            {"name": name},
+        ).scalar()
+
+
+def set_watermark(name: str, watermark: datetime):
+    with vector_engine.begin() as conn:
+        _ensure_table(conn)
+        conn.execute(
+            text(
+                """
+                INSERT INTO vector_sync_state (name, watermark, synced_at)
+                VALUES (:name, :watermark, now())
+                ON CONFLICT (name) DO UPDATE
+                SET watermark = EXCLUDED.watermark, synced_at = EXCLUDED.synced_at
+                """
+            ),
+            {"name": name, "watermark": watermark},
+        )
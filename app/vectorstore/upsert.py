@@ -0,0 +1,500 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config.config import EMBEDDING_BATCH_MAX_SIZE
+from app.llm.embeddings import EMBEDDING_VERSION
+from .binary import (
+    _aensure_binary_table,
+    _ensure_binary_table,
+    awrite_binary_vectors,
+    binary_index,
+    write_binary_vectors,
+)
+from .versions import (
+    aclaim_versions,
+    aensure_versions_table,
+    claim_versions,
+    ensure_versions_table,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_KEY = "content_hash"
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def content_hash(page_content: str) -> str:
+    """Return a stable hash of the text that gets embedded and of the model."""
+    return hashlib.sha256(
+        f"{EMBEDDING_VERSION}\n{page_content}".encode("utf-8")
+    ).hexdigest()
+
+
+def _normalize_metadata(metadata: dict) -> dict:
+    # Compare metadata the way it looks once it has been stored as JSONB
+    return json.loads(json.dumps(metadata or {}, default=str))
+
+
+def _chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _stored_statement(vector_store: PGVector, collection_uuid, ids: Sequence[str]):
+    EmbeddingStore = vector_store.EmbeddingStore
+    return (
+        select(EmbeddingStore.id, EmbeddingStore.cmetadata)
+        .where(EmbeddingStore.collection_id == collection_uuid)
+        .where(EmbeddingStore.id.in_(ids))
+    )
+
+
+def _select_stored(session, vector_store: PGVector, collection_uuid, ids) -> Dict[str, dict]:
+    stored = {}
+    for chunk in _chunks(list(ids), LOOKUP_CHUNK_SIZE):
+        rows = session.execute(_stored_statement(vector_store, collection_uuid, chunk)).all()
+        stored.update({row.id: row.cmetadata or {} for row in rows})
+    return stored
+
+
+async def _aselect_stored(
+    session, vector_store: PGVector, collection_uuid, ids
+) -> Dict[str, dict]:
+    stored = {}
+    for chunk in _chunks(list(ids), LOOKUP_CHUNK_SIZE):
+        rows = (
+            await session.execute(_stored_statement(vector_store, collection_uuid, chunk))
+        ).all()
+        stored.update({row.id: row.cmetadata or {} for row in rows})
+    return stored
+
+
+def get_stored_metadata(vector_store: PGVector, ids: Sequence[str]) -> Dict[str, dict]:
+    """Fetch the stored metadata of the given ids in the store's collection."""
+    with vector_store.session_maker() as session:
+        collection = vector_store.get_collection(session)
+        if not collection:
+            return {}
+        return _select_stored(session, vector_store, collection.uuid, ids)
+
+
+async def aget_stored_metadata(
+    vector_store: PGVector, ids: Sequence[str]
+) -> Dict[str, dict]:
+    """get_stored_metadata for an async store."""
+    async with vector_store.session_maker() as session:
+        collection = await vector_store.aget_collection(session)
+        if not collection:
+            return {}
+        return await _aselect_stored(session, vector_store, collection.uuid, ids)
+
+
+def list_document_ids(vector_store: PGVector) -> List[str]:
+    """Return every document id stored in the store's collection."""
+    EmbeddingStore = vector_store.EmbeddingStore
+    with vector_store.session_maker() as session:
+        collection = vector_store.get_collection(session)
+        if not collection:
+            return []
+        return list(
+            session.execute(
+                select(EmbeddingStore.id).where(
+                    EmbeddingStore.collection_id == collection.uuid
+                )
+            ).scalars()
+        )
+
+
+def _prepare(
+    documents: List[Document], ids: List[str], versions: Optional[Sequence[float]]
+):
+    if versions is None:
+        # Written now: newer than anything queued before this call
+        versions = [time.time()] * len(ids)
+    # The multi-row upsert cannot touch the same id twice, the last copy wins
+    latest = {doc_id: i for i, doc_id in enumerate(ids)}
+    if len(latest) < len(ids):
+        documents = [documents[i] for i in latest.values()]
+        versions = [versions[i] for i in latest.values()]
+        ids = list(latest)
+
+    for document in documents:
+        document.metadata[CONTENT_HASH_KEY] = content_hash(document.page_content)
+    return documents, ids, list(versions)
+
+
+def _plan(
+    documents: List[Document],
+    ids: List[str],
+    stored: Dict[str, dict],
+    current: Optional[set] = None,
+):
+    """
+    Split documents into the ones to embed and the ones to update in place.
+
+    Ids missing from current (when given) have a newer version stored already.
+    """
+    to_embed: List[int] = []
+    to_update: List[int] = []
+    statuses: Dict[str, str] = {}
+    for i, (document, doc_id) in enumerate(zip(documents, ids)):
+        stored_metadata = stored.get(doc_id)
+        if current is not None and doc_id not in current:
+            statuses[doc_id] = "stale"
+        elif (
+            stored_metadata is None
+            or stored_metadata.get(CONTENT_HASH_KEY)
+            != document.metadata[CONTENT_HASH_KEY]
+        ):
+            to_embed.append(i)
+            statuses[doc_id] = "embedded"
+        elif stored_metadata != _normalize_metadata(document.metadata):
+            to_update.append(i)
+            statuses[doc_id] = "metadata_updated"
+        else:
+            statuses[doc_id] = "skipped"
+    return to_embed, to_update, statuses
+
+
+def _embed(vector_store: PGVector, documents: List[Document], indexes: List[int]):
+    texts = [documents[i].page_content for i in indexes]
+    embeddings: List[List[float]] = []
+    for batch in _chunks(texts, EMBEDDING_BATCH_MAX_SIZE):
+        embeddings.extend(vector_store.embeddings.embed_documents(list(batch)))
+    return dict(zip(indexes, embeddings))
+
+
+async def _aembed(vector_store: PGVector, documents: List[Document], indexes: List[int]):
+    texts = [documents[i].page_content for i in indexes]
+    embeddings: List[List[float]] = []
+    for batch in _chunks(texts, EMBEDDING_BATCH_MAX_SIZE):
+        embeddings.extend(await vector_store.embeddings.aembed_documents(list(batch)))
+    return dict(zip(indexes, embeddings))
+
+
+def _upsert_embeddings(
+    vector_store: PGVector,
+    collection_uuid,
+    documents: List[Document],
+    ids: List[str],
+    to_embed: List[int],
+    embeddings: Dict[int, List[float]],
+):
+    # PGVector.add_embeddings conflicts on id alone, which is only unique per
+    # collection (see schema.py)
+    statement = insert(vector_store.EmbeddingStore).values(
+        [
+            {
+                "id": ids[i],
+                "collection_id": collection_uuid,
+                "embedding": embeddings[i],
+                "document": documents[i].page_content,
+                "cmetadata": documents[i].metadata,
+            }
+            for i in to_embed
+        ]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["collection_id", "id"],
+        set_={
+            "embedding": statement.excluded.embedding,
+            "document": statement.excluded.document,
+            "cmetadata": statement.excluded.cmetadata,
+        },
+    )
+
+
+def _update_metadata(vector_store: PGVector, collection_uuid):
+    # Core statement: the ORM maps the key as id alone and would update
+    # the document in every collection
+    table = vector_store.EmbeddingStore.__table__
+    return (
+        update(table)
+        .where(table.c.collection_id == collection_uuid)
+        .where(table.c.id == bindparam("doc_id"))
+        .values(cmetadata=bindparam("new_metadata"))
+    )
+
+
+def _metadata_updates(documents: List[Document], ids: List[str], to_update: List[int]):
+    return [
+        {"doc_id": ids[i], "new_metadata": documents[i].metadata} for i in to_update
+    ]
+
+
+def _log_upsert(vector_store: PGVector, statuses: Dict[str, str]):
+    counts = _count_statuses(statuses)
+    logger.info(
+        f"Upserted into '{vector_store.collection_name}': "
+        f"{counts['embedded']} embedded, {counts['metadata_updated']} metadata updated, "
+        f"{counts['skipped']} skipped, {counts['stale']} stale"
+    )
+
+
+def upsert_document_statuses(
+    vector_store: PGVector,
+    documents: List[Document],
+    ids: List[str],
+    force: bool = False,
+    versions: Optional[Sequence[float]] = None,
+) -> Dict[str, str]:
+    """
+    Embed and store documents, skipping the ones whose content is unchanged.
+
+    A hash of ``page_content`` is kept in the document metadata. Documents with
+    an unchanged hash are not embedded again; if only their metadata changed it
+    is updated in place. Changed documents are embedded in batches of the
+    model's batch size and written with one multi-row upsert.
+
+    Every write records a version per document (langchain_pg_embedding_version)
+    in the same transaction, and documents whose stored version is newer are
+    left alone, so a delayed write (the write queue) never overwrites a newer
+    one (batch endpoints, delta sync).
+
+    Args:
+        vector_store: The collection to write to
+        documents: Documents to store
+        ids: Document ids, one per document
+        force: Re-embed every document regardless of the stored hash
+        versions: Time (epoch seconds) the data of each document was read,
+            defaults to now
+
+    Returns:
+        dict: "embedded", "metadata_updated", "skipped" or "stale" for each document id
+    """
+    documents, ids, versions = _prepare(documents, ids, versions)
+    # Embed before taking the version locks, they are held until commit
+    stored = {} if force else get_stored_metadata(vector_store, ids)
+    embeddings = _embed(vector_store, documents, _plan(documents, ids, stored)[0])
+
+    packed = None
+    with vector_store.session_maker() as session:
+        ensure_versions_table(session)
+        _ensure_binary_table(session)
+        collection = vector_store.get_collection(session)
+        if not collection:
+            raise ValueError(f"Collection {vector_store.collection_name} not found")
+        current = claim_versions(session, collection.uuid, ids, versions)
+        # Plan again under the locks, another writer may have committed since
+        if not force:
+            stored = _select_stored(session, vector_store, collection.uuid, current)
+        to_embed, to_update, statuses = _plan(documents, ids, stored, current)
+        missing = [i for i in to_embed if i not in embeddings]
+        if missing:
+            embeddings.update(_embed(vector_store, documents, missing))
+
+        embedded_ids = [ids[i] for i in to_embed]
+        if to_embed:
+            session.execute(
+                _upsert_embeddings(
+                    vector_store, collection.uuid, documents, ids, to_embed, embeddings
+                )
+            )
+            packed = write_binary_vectors(
+                session, collection.uuid, embedded_ids, [embeddings[i] for i in to_embed]
+            )
+        if to_update:
+            session.execute(
+                _update_metadata(vector_store, collection.uuid),
+                _metadata_updates(documents, ids, to_update),
+            )
+        session.commit()
+
+    if packed is not None:
+        binary_index(vector_store).update(embedded_ids, packed)
+    _log_upsert(vector_store, statuses)
+    return statuses
+
+
+async def aupsert_document_statuses(
+    vector_store: PGVector,
+    documents: List[Document],
+    ids: List[str],
+    force: bool = False,
+    versions: Optional[Sequence[float]] = None,
+) -> Dict[str, str]:
+    """upsert_document_statuses for an async store."""
+    documents, ids, versions = _prepare(documents, ids, versions)
+    stored = {} if force else await aget_stored_metadata(vector_store, ids)
+    embeddings = await _aembed(vector_store, documents, _plan(documents, ids, stored)[0])
+
+    packed = None
+    async with vector_store.session_maker() as session:
+        await aensure_versions_table(session)
+        await _aensure_binary_table(session)
+        collection = await vector_store.aget_collection(session)
+        if not collection:
+            raise ValueError(f"Collection {vector_store.collection_name} not found")
+        current = await aclaim_versions(session, collection.uuid, ids, versions)
+        if not force:
+            stored = await _aselect_stored(session, vector_store, collection.uuid, current)
+        to_embed, to_update, statuses = _plan(documents, ids, stored, current)
+        missing = [i for i in to_embed if i not in embeddings]
+        if missing:
+            embeddings.update(await _aembed(vector_store, documents, missing))
+
+        embedded_ids = [ids[i] for i in to_embed]
+        if to_embed:
+            await session.execute(
+                _upsert_embeddings(
+                    vector_store, collection.uuid, documents, ids, to_embed, embeddings
+                )
+            )
+            packed = await awrite_binary_vectors(
+                session, collection.uuid, embedded_ids, [embeddings[i] for i in to_embed]
+            )
+        if to_update:
+            await session.execute(
+                _update_metadata(vector_store, collection.uuid),
+                _metadata_updates(documents, ids, to_update),
+            )
+        await session.commit()
+
+    if packed is not None:
+        binary_index(vector_store).update(embedded_ids, packed)
+    _log_upsert(vector_store, statuses)
+    return statuses
+
+
+def upsert_documents(
+    vector_store: PGVector,
+    documents: List[Document],
+    ids: List[str],
+    force: bool = False,
+    versions: Optional[Sequence[float]] = None,
+) -> Dict[str, int]:
+    """
+    Embed and store documents, see upsert_document_statuses.
+
+    Returns:
+        dict: Counts of embedded, metadata-only updated, skipped and stale documents
+    """
+    statuses = upsert_document_statuses(
+        vector_store, documents, ids, force=force, versions=versions
+    )
+    return _count_statuses(statuses)
+
+
+async def aupsert_documents(
+    vector_store: PGVector,
+    documents: List[Document],
+    ids: List[str],
+    force: bool = False,
+    versions: Optional[Sequence[float]] = None,
+) -> Dict[str, int]:
+    """upsert_documents for an async store."""
+    statuses = await aupsert_document_statuses(
+        vector_store, documents, ids, force=force, versions=versions
+    )
+    return _count_statuses(statuses)
+
+
+def _count_statuses(statuses: Dict[str, str]) -> Dict[str, int]:
+    stats = {"embedded": 0, "metadata_updated": 0, "skipped": 0, "stale": 0}
+    for status in statuses.values():
+        stats[status] += 1
+    return stats
+
+
+def write_embeddings(
+    vector_store: PGVector,
+    documents: List[Document],
+    ids: List[str],
+    embeddings: List[List[float]],
+):
+    """
+    Write already embedded documents with their binary copies.
+
+    For bulk loads into a collection nothing else writes to (a rebuild
+    shadow): versions are not recorded and unchanged documents are not skipped.
+    """
+    if not ids:
+        return
+    indexes = list(range(len(ids)))
+    with vector_store.session_maker() as session:
+        _ensure_binary_table(session)
+        collection = vector_store.get_collection(session)
+        session.execute(
+            _upsert_embeddings(
+                vector_store,
+                collection.uuid,
+                documents,
+                ids,
+                indexes,
+                dict(enumerate(embeddings)),
+            )
+        )
+        packed = write_binary_vectors(session, collection.uuid, ids, embeddings)
+        session.commit()
+    binary_index(vector_store).update(ids, packed)
+
+
+def delete_documents(
+    vector_store: PGVector,
+    ids: Sequence[str],
+    versions: Optional[Sequence[float]] = None,
+) -> int:
+    """
+    Delete documents of the store's collection unless a newer version of them
+    has been written, see upsert_document_statuses. Returns how many were deleted.
+    """
+    if versions is None:
+        versions = [time.time()] * len(ids)
+    latest: Dict[str, float] = {}
+    for doc_id, version in zip(ids, versions):
+        latest[doc_id] = max(version, latest.get(doc_id, version))
+    if not latest:
+        return 0
+
+    EmbeddingStore = vector_store.EmbeddingStore
+    with vector_store.session_maker() as session:
+        ensure_versions_table(session)
+        collection = vector_store.get_collection(session)
+        if not collection:
+            return 0
+        current = claim_versions(
+            session, collection.uuid, list(latest), list(latest.values())
+        )
+        for chunk in _chunks(sorted(current), LOOKUP_CHUNK_SIZE):
+            session.execute(
+                delete(EmbeddingStore)
+                .where(EmbeddingStore.collection_id == collection.uuid)
+                .where(EmbeddingStore.id.in_(chunk))
+            )
+        session.commit()
+    binary_index(vector_store).remove(sorted(current))
+    return len(current)
+
+
+def delete_missing_documents(
+    vector_store: PGVector, keep_ids: Iterable[str], version: Optional[float] = None
+) -> int:
+    """
+    Delete documents of the store's collection whose id is not in keep_ids.
+
+    version is when keep_ids was read (defaults to now), documents written
+    after it are kept, see delete_documents.
+    """
+    keep_ids = set(keep_ids)
+    stale_ids = [
+        doc_id for doc_id in list_document_ids(vector_store) if doc_id not in keep_ids
+    ]
+    if not stale_ids:
+        return 0
+
+    versions = None if version is None else [version] * len(stale_ids)
+    deleted = delete_documents(vector_store, stale_ids, versions=versions)
+    logger.info(
+        f"Deleted {deleted} stale documents from '{vector_store.collection_name}'"
+    )
+    return deleted
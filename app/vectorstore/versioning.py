@@ -0,0 +1,173 @@
+"""
+Blue/green versions of the vector store collections.
+
+Rows are keyed by (collection_id, id) (see schema.py), so every version of
+a collection holds the same document ids. Repointing only swaps collection
+names in one transaction: searches look collections up by name, so they move
+from the old rows to the new ones at commit without ever seeing a partial
+collection, and no row is rewritten.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain_postgres import PGVector
+from sqlalchemy import text
+
+from app.config.config import DELETED_VERSION_TTL_HOURS
+from .pgvector import create_vector_store, vector_engine
+from .schema import assert_embedding_key
+from .versions import prune_versions
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SHADOW_MARKER = "__v"
+RETIRED_MARKER = "__retired_"
+
+
+def new_version() -> str:
+    return time.strftime("%Y%m%d%H%M%S")
+
+
+def shadow_store(vector_store: PGVector, version: str) -> PGVector:
+    """Create an empty shadow collection next to a live one."""
+    return create_vector_store(f"{vector_store.collection_name}{SHADOW_MARKER}{version}")
+
+
+def _collection_uuid(conn, name: str) -> Optional[str]:
+    return conn.execute(
+        text("SELECT uuid FROM langchain_pg_collection WHERE name = :name"),
+        {"name": name},
+    ).scalar()
+
+
+def collection_count(collection_name: str) -> int:
+    with vector_engine.connect() as conn:
+        return conn.execute(
+            text(
+                """
+                SELECT count(e.id)
+                FROM langchain_pg_collection c
+                LEFT JOIN langchain_pg_embedding e ON e.collection_id = c.uuid
+                WHERE c.name = :name
+                """
+            ),
+            {"name": collection_name},
+        ).scalar()
+
+
+def validate_shadow(
+    live_name: str, shadow_name: str, expected: int, min_ratio: float
+) -> Tuple[bool, str]:
+    """
+    Check the shadow holds every expected document and did not shrink below
+    min_ratio of the live collection.
+    """
+    shadow_count = collection_count(shadow_name)
+    live_count = collection_count(live_name)
+    if shadow_count != expected:
+        return False, f"'{shadow_name}' has {shadow_count} rows, expected {expected}"
+    if live_count and shadow_count < live_count * min_ratio:
+        return False, (
+            f"'{shadow_name}' has {shadow_count} rows against {live_count} live, "
+            f"below the {min_ratio:.0%} safety ratio"
+        )
+    return True, f"'{shadow_name}' has {shadow_count} rows ({live_count} live)"
+
+
+def _swap(conn, live_name: str, candidate_name: str, retired_name: str):
+    live_uuid = _collection_uuid(conn, live_name)
+    candidate_uuid = _collection_uuid(conn, candidate_name)
+    if candidate_uuid is None:
+        raise ValueError(f"Collection '{candidate_name}' does not exist")
+
+    if live_uuid is not None:
+        conn.execute(
+            text("UPDATE langchain_pg_collection SET name = :name WHERE uuid = :uuid"),
+            {"name": retired_name, "uuid": live_uuid},
+        )
+        conn.execute(
+            text(
+                f"ALTER INDEX IF EXISTS ix_embedding_{live_name} "
+                f"RENAME TO ix_embedding_{retired_name}"
+            )
+        )
+
+    conn.execute(
+        text("UPDATE langchain_pg_collection SET name = :name WHERE uuid = :uuid"),
+        {"name": live_name, "uuid": candidate_uuid},
+    )
+    conn.execute(
+        text(
+            f"ALTER INDEX IF EXISTS ix_embedding_{candidate_name} "
+            f"RENAME TO ix_embedding_{live_name}"
+        )
+    )
+
+
+def repoint(candidates: Dict[str, str], version: str):
+    """
+    Make each candidate collection live in a single transaction.
+
+    Args:
+        candidates: Mapping of live collection name to the collection replacing it
+        version: Suffix of the retired names given to the current live collections
+    """
+    with vector_engine.begin() as conn:
+        # Versions share unprefixed ids, which the old key does not allow
+        assert_embedding_key(conn)
+        for live_name, candidate_name in candidates.items():
+            retired_name = f"{live_name}{RETIRED_MARKER}{version}"
+            _swap(conn, live_name, candidate_name, retired_name)
+            logger.info(f"Repointed '{live_name}' to '{candidate_name}'")
+
+
+def list_versions(live_name: str) -> Dict[str, List[str]]:
+    """Return the shadow and retired collection names of a collection, newest first."""
+    with vector_engine.connect() as conn:
+        names = list(
+            conn.execute(
+                text(
+                    "SELECT name FROM langchain_pg_collection "
+                    "WHERE starts_with(name, :base) ORDER BY name DESC"
+                ),
+                {"base": f"{live_name}__"},
+            ).scalars()
+        )
+    return {
+        "shadow": [n for n in names if n.startswith(f"{live_name}{SHADOW_MARKER}")],
+        "retired": [n for n in names if n.startswith(f"{live_name}{RETIRED_MARKER}")],
+    }
+
+
+def drop_collection(collection_name: str):
+    """Delete a non-live collection, its rows and its vector index."""
+    with vector_engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_embedding_{collection_name}"))
+        # Embeddings (and their binary copies) cascade
+        conn.execute(
+            text("DELETE FROM langchain_pg_collection WHERE name = :name"),
+            {"name": collection_name},
+        )
+    logger.info(f"Dropped collection '{collection_name}'")
+
+
+def garbage_collect(live_name: str, keep: int, exclude: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Drop retired versions beyond the newest ``keep`` and abandoned shadows,
+    then the write versions of dropped collections and long-deleted documents.
+
+    Returns:
+        list: Names of the dropped collections
+    """
+    versions = list_versions(live_name)
+    dropped = [n for n in versions["shadow"] if n not in exclude]
+    dropped += versions["retired"][keep:]
+    for name in dropped:
+        drop_collection(name)
+    with vector_engine.begin() as conn:
+        prune_versions(conn, DELETED_VERSION_TTL_HOURS * 3600)
+    return dropped
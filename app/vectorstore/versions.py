@@ -0,0 +1,125 @@
+import threading
+from typing import Sequence, Set
+
+from sqlalchemy import text
+
+VERSIONS_TABLE = "langchain_pg_embedding_version"
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+# Version of the last write of every document id, kept after deletes so a
+# late write of an older version cannot bring a deleted document back
+_CREATE_VERSIONS_TABLE = text(
+    f"""
+    CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+        collection_id UUID NOT NULL,
+        id VARCHAR NOT NULL,
+        version DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (collection_id, id)
+    )
+    """
+)
+
+# Takes the version of the ids that are not newer already and returns them.
+# The rows stay locked until the writer commits, so writes of one document
+# are applied in version order whatever order they finish embedding in.
+_CLAIM_VERSIONS = text(
+    f"""
+    INSERT INTO {VERSIONS_TABLE} AS stored (collection_id, id, version)
+    SELECT CAST(:collection_id AS uuid), claimed.id, claimed.version
+    FROM unnest(
+        CAST(:ids AS varchar[]), CAST(:versions AS double precision[])
+    ) AS claimed (id, version)
+    ON CONFLICT (collection_id, id) DO UPDATE
+    SET version = EXCLUDED.version
+    WHERE stored.version <= EXCLUDED.version
+    RETURNING id
+    """
+)
+
+
+def ensure_versions_table(session):
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        session.execute(_CREATE_VERSIONS_TABLE)
+        session.commit()
+        _table_ready = True
+
+
+async def aensure_versions_table(session):
+    global _table_ready
+    if _table_ready:
+        return
+    # CREATE ... IF NOT EXISTS is idempotent, racing coroutines are harmless
+    await session.execute(_CREATE_VERSIONS_TABLE)
+    await session.commit()
+    _table_ready = True
+
+
+# Versions of deleted documents outlive them by ttl, long enough for any
+# write still queued or in flight; rows of dropped collections go at once
+_PRUNE_VERSIONS = text(
+    f"""
+    DELETE FROM {VERSIONS_TABLE} v
+    WHERE NOT EXISTS (
+        SELECT 1 FROM langchain_pg_collection c WHERE c.uuid = v.collection_id
+    )
+    OR (
+        v.version < extract(epoch FROM now()) - :ttl
+        AND NOT EXISTS (
+            SELECT 1 FROM langchain_pg_embedding e
+            WHERE e.collection_id = v.collection_id AND e.id = v.id
+        )
+    )
+    """
+)
+
+
+def prune_versions(session, ttl_seconds: float) -> int:
+    """Delete the versions of documents deleted more than ttl_seconds ago. Returns the count."""
+    exists = session.execute(
+        text("SELECT to_regclass(:table)"), {"table": VERSIONS_TABLE}
+    ).scalar()
+    if exists is None:
+        return 0
+    return session.execute(_PRUNE_VERSIONS, {"ttl": ttl_seconds}).rowcount
+
+
+def _claim_params(collection_uuid, ids: Sequence[str], versions: Sequence[float]) -> dict:
+    return {
+        "collection_id": str(collection_uuid),
+        "ids": list(ids),
+        "versions": [float(version) for version in versions],
+    }
+
+
+def claim_versions(
+    session, collection_uuid, ids: Sequence[str], versions: Sequence[float]
+) -> Set[str]:
+    """
+    Record the versions being written in the session's transaction.
+
+    Returns the ids whose stored version is not newer, the only ones the
+    caller may write before committing.
+    """
+    if not ids:
+        return set()
+    rows = session.execute(_CLAIM_VERSIONS, _claim_params(collection_uuid, ids, versions))
+    return {row.id for row in rows}
+
+
+async def aclaim_versions(
+    session, collection_uuid, ids: Sequence[str], versions: Sequence[float]
+) -> Set[str]:
+    """claim_versions for an async session."""
+    if not ids:
+        return set()
+    rows = await session.execute(
+        _CLAIM_VERSIONS, _claim_params(collection_uuid, ids, versions)
+    )
+    return {row.id for row in rows}
@@ -0,0 +1,105 @@
+"""
+Compare int8 quantized embedding inference against fp32 on the job corpus.
+
+Reports cosine drift between the two models' document vectors, retrieval
+recall@k of the quantized model against fp32 top-k, documents/sec and query
+latency.
+
+Usage: python scripts/embedding_parity.py --limit 2000 --queries 200 --k 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+import job_embed
+from app.llm.embeddings import create_base_embeddings
+
+
+def encode(model, texts, batch_size):
+    # Compare full-precision outputs, independent of the stored precision
+    return model._client.encode(
+        [text.replace("\n", " ") for text in texts],
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    )
+
+
+def benchmark(name, model, documents, queries, batch_size):
+    print(f"\nEncoding {len(documents)} documents with {name}...")
+    started = time.perf_counter()
+    doc_vectors = encode(model, documents, batch_size)
+    elapsed = time.perf_counter() - started
+
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        query_started = time.perf_counter()
+        query_vectors.append(encode(model, [query], 1)[0])
+        latencies.append((time.perf_counter() - query_started) * 1000)
+
+    print(f"  documents/sec: {len(documents) / elapsed:.1f}")
+    print(
+        f"  query latency: p50 {np.percentile(latencies, 50):.1f} ms, "
+        f"p95 {np.percentile(latencies, 95):.1f} ms"
+    )
+    return doc_vectors, np.array(query_vectors)
+
+
+def recall_at_k(reference_scores, candidate_scores, k):
+    reference_top = np.argsort(-reference_scores, axis=1)[:, :k]
+    candidate_top = np.argsort(-candidate_scores, axis=1)[:, :k]
+    hits = [
+        len(set(reference_top[i]) & set(candidate_top[i]))
+        for i in range(len(reference_top))
+    ]
+    return float(np.mean(hits)) / k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=2000, help="Max documents")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Recall cutoff")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print("Fetching job corpus...")
+    jobs = job_embed.fetch_jobs()[: args.limit]
+    documents = [job_embed.create_job_document(job).page_content for job in jobs]
+    if not documents:
+        print("No jobs found.")
+        return
+
+    # Job titles make realistic short search queries
+    queries = [job[1] for job in jobs if job[1]][: args.queries]
+
+    fp32 = create_base_embeddings("none")
+    fp32_docs, fp32_queries = benchmark(
+        "fp32", fp32, documents, queries, args.batch_size
+    )
+    int8 = create_base_embeddings("int8")
+    int8_docs, int8_queries = benchmark(
+        "int8", int8, documents, queries, args.batch_size
+    )
+
+    drift = np.sum(fp32_docs * int8_docs, axis=1)
+    print("\nCosine similarity between fp32 and int8 document vectors:")
+    print(
+        f"  mean {drift.mean():.4f}, p5 {np.percentile(drift, 5):.4f}, "
+        f"min {drift.min():.4f}"
+    )
+
+    k = min(args.k, len(documents))
+    recall = recall_at_k(fp32_queries @ fp32_docs.T, int8_queries @ int8_docs.T, k)
+    print(f"\nRecall@{k} of int8 against fp32 over {len(queries)} queries: {recall:.4f}")
+
+
+if __name__ == "__main__":
+    main()
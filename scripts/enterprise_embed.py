@@ -3,9 +3,19 @@ from contextlib import contextmanager
 from langchain_core.documents import Document
 from app.utils import clean_html
 from constants import main_database_url
-from app.vectorstore import enterprise_vector_store
+from app.vectorstore import (
+    enterprise_vector_store,
+    upsert_documents,
+    delete_documents,
+    delete_missing_documents,
+)
+from app.vectorstore.sync_state import get_watermark, set_watermark
+from app.config.config import DELTA_SYNC_OVERLAP_SECONDS
+from datetime import timedelta
+from typing import List, Optional
 
 import psycopg2
+import time
 
 
 @contextmanager
@@ -17,46 +27,135 @@ def get_db_connection():
         conn.close()
 
 
-def fetch_enterprises() -> list:
-    """Fetch enterprise data from the database."""
+SYNC_NAME = "enterprise_listings"
+
+
+ENTERPRISES_QUERY = """
+    SELECT
+        en.enterprise_id,
+        en.name,
+        en.description,
+        en.company_vision,
+        en.logo_url,
+        en.founded_in,
+        en.organization_type,
+        en.team_size,
+        en.status,
+        en.is_premium,
+        en.is_trial,
+        JSON_AGG(JSONB_BUILD_OBJECT(
+            'category_id', ca.category_id,
+            'category_name', ca.category_name
+        )) as enterprise_categories,
+        JSON_AGG(JSONB_BUILD_OBJECT(
+            'address_id', addr.address_id,
+            'country', addr.country,
+            'city', addr.city,
+            'mixed_address', addr.mixed_address
+        )) as enterprise_addresses
+    FROM enterprises en
+    LEFT JOIN enterprise_addresses enaddr ON enaddr.enterprise_id = en.enterprise_id
+    LEFT JOIN addresses addr ON addr.address_id = enaddr.address_id
+    LEFT JOIN websites we ON we.enterprise_id = en.enterprise_id
+    LEFT JOIN categories ca ON text(ca.category_id) = ANY(en.categories)
+    WHERE en.status = 'ACTIVE'
+        AND (%(enterprise_ids)s::uuid[] IS NULL
+             OR en.enterprise_id = ANY(%(enterprise_ids)s::uuid[]))
+    GROUP BY en.enterprise_id
+"""
+
+
+def fetch_enterprises(enterprise_ids: Optional[List[str]] = None) -> list:
+    """Fetch active enterprises from the database, optionally only the given ids."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(ENTERPRISES_QUERY, {"enterprise_ids": enterprise_ids})
+            return cursor.fetchall()
+
+
+def stream_enterprises(batch_size: int):
+    """Yield active enterprises in batches through a server-side cursor."""
+    with get_db_connection() as conn:
+        with conn.cursor(name="stream_enterprises") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(ENTERPRISES_QUERY, {"enterprise_ids": None})
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+
+def current_database_time():
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT now()")
+            return cursor.fetchone()[0]
+
+
+def fetch_changed_enterprises(since) -> list:
+    """Return (enterprise_id, active) for enterprises changed since."""
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
             cursor.execute(
                 """
-                SELECT
-                en.enterprise_id,
-                en.name, 
-                en.description,
-                en.company_vision,
-                en.logo_url, 
-                en.founded_in,
-                en.organization_type, 
-                en.team_size, 
-                en.status, 
-                en.is_premium,
-                en.is_trial,
-                JSON_AGG(JSONB_BUILD_OBJECT(
-                    'category_id', ca.category_id,
-                    'category_name', ca.category_name
-                )) as enterprise_categories,
-                JSON_AGG(JSONB_BUILD_OBJECT(
-                    'address_id', addr.address_id,
-                    'country', addr.country,
-                    'city', addr.city,
-                    'mixed_address', addr.mixed_address
-                )) as enterprise_addresses
-            FROM enterprises en
-            LEFT JOIN enterprise_addresses enaddr ON enaddr.enterprise_id = en.enterprise_id
-            LEFT JOIN addresses addr ON addr.address_id = enaddr.address_id
-            LEFT JOIN websites we ON we.enterprise_id = en.enterprise_id
-            LEFT JOIN categories ca ON text(ca.category_id) = ANY(en.categories)
-            WHERE en.status = 'ACTIVE'
-            GROUP BY en.enterprise_id
-            """
+                SELECT enterprise_id::text, status = 'ACTIVE'
+                FROM enterprises
+                WHERE updated_at >= %(since)s
+                """,
+                {"since": since},
             )
             return cursor.fetchall()
 
 
+def sync_changes():
+    """
+    Embed enterprises changed since the last sync and delete deactivated ones.
+
+    Falls back to a full sync when no watermark has been stored yet.
+    """
+    watermark = get_watermark(SYNC_NAME)
+    if watermark is None:
+        print("No enterprise sync watermark yet, running a full sync...")
+        main()
+        return
+
+    # Re-read a small window so rows committed late by long transactions are not missed
+    since = watermark - timedelta(seconds=DELTA_SYNC_OVERLAP_SECONDS)
+    started_at = current_database_time()
+    # Version of the written documents: a queued write of data read later wins
+    fetched_at = time.time()
+    changes = fetch_changed_enterprises(since)
+    active_ids = [enterprise_id for enterprise_id, active in changes if active]
+    inactive_ids = [
+        f"enterprise-{enterprise_id}" for enterprise_id, active in changes if not active
+    ]
+    print(f"{len(changes)} enterprises changed since {since.isoformat()}")
+
+    stats = {"embedded": 0, "metadata_updated": 0, "skipped": 0, "stale": 0}
+    if active_ids:
+        enterprises = fetch_enterprises(active_ids)
+        documents = [create_enterprise_document(enterprise) for enterprise in enterprises]
+        ids = [f'enterprise-{doc.metadata["enterprise_id"]}' for doc in documents]
+        stats = upsert_documents(
+            enterprise_vector_store,
+            documents,
+            ids=ids,
+            versions=[fetched_at] * len(ids),
+        )
+    if inactive_ids:
+        delete_documents(
+            enterprise_vector_store, inactive_ids, versions=[fetched_at] * len(inactive_ids)
+        )
+
+    set_watermark(SYNC_NAME, started_at)
+    print(
+        f"Enterprise delta sync done ({stats['embedded']} embedded, "
+        f"{stats['metadata_updated']} metadata updated, {stats['skipped']} skipped, "
+        f"{len(inactive_ids)} deleted)."
+    )
+
+
 def create_enterprise_document(enterprise_data: tuple) -> Document:
     """Create a well-structured document for enterprise embedding."""
     # Unpack enterprise data
@@ -144,7 +243,10 @@ def create_enterprise_document(enterprise_data: tuple) -> Document:
     return Document(page_content=content, metadata=metadata)
 
 
-def main():
+def main(force: bool = False):
+    started_at = current_database_time()
+    fetched_at = time.time()
+
     # Fetch enterprise data
     print("Fetching enterprise data from the database...")
     enterprises = fetch_enterprises()
@@ -152,12 +254,22 @@ def main():
     # Create documents for each enterprise
     print("Creating documents for enterprise data...")
     documents = [create_enterprise_document(enterprise) for enterprise in enterprises]
+    ids = [f'enterprise-{doc.metadata["enterprise_id"]}' for doc in documents]
 
-    # Add embeddings to vector store
+    # Add embeddings to vector store, skipping unchanged enterprises
     print("Adding embeddings to vector store...")
-    enterprise_vector_store.add_documents(
+    stats = upsert_documents(
+        enterprise_vector_store,
         documents,
-        ids=[f'enterprise-{doc.metadata["enterprise_id"]}' for doc in documents],
+        ids=ids,
+        force=force,
+        versions=[fetched_at] * len(ids),
     )
+    deleted = delete_missing_documents(enterprise_vector_store, ids, version=fetched_at)
+    set_watermark(SYNC_NAME, started_at)
 
-    print("Enterprise embeddings added successfully.")
+    print(
+        f"Enterprise embeddings added successfully "
+        f"({stats['embedded']} embedded, {stats['metadata_updated']} metadata updated, "
+        f"{stats['skipped']} skipped, {deleted} deleted)."
+    )
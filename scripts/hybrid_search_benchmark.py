@@ -0,0 +1,158 @@
+"""
+Benchmark hybrid (full-text + vector, RRF) search against vector-only search.
+
+Builds queries from the collection itself and reports, per kind of query,
+the hit rate (share of queries with a matching document in the top k) and
+the p50/p95 retrieval latency of both retrievers:
+
+- exact: a single company name, tag or enterprise name
+- phrase: natural sentences around those terms, stopwords included
+  ("jobs at <company>", "<tag> jobs at <company>")
+- title: a job title inside a sentence ("looking for a <title> position")
+
+Query embeddings are computed once up front, so only the database round trip
+is timed.
+
+Usage: python scripts/hybrid_search_benchmark.py --collection job_listings --queries 200 --k 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from app.llm import embeddings_model
+from app.vectorstore import job_vector_store, enterprise_vector_store
+from app.vectorstore.hybrid import hybrid_search_by_vector
+from app.vectorstore.search import search_by_vector
+from app.vectorstore.upsert import get_stored_metadata, list_document_ids
+
+
+# A query is (kind, text, conditions), a result hits when it meets every
+# (metadata field, value) condition
+
+
+def job_queries(metadatas):
+    queries = []
+    for metadata in metadatas:
+        company = metadata.get("company")
+        tags = metadata.get("tags") or []
+        if company:
+            queries.append(("exact", company, (("company", company),)))
+            queries.append(("phrase", f"jobs at {company}", (("company", company),)))
+        for tag in tags:
+            queries.append(("exact", tag, (("tags", tag),)))
+        if company and tags:
+            queries.append(
+                (
+                    "phrase",
+                    f"{tags[0]} jobs at {company}",
+                    (("tags", tags[0]), ("company", company)),
+                )
+            )
+        if metadata.get("job_name"):
+            queries.append(
+                (
+                    "title",
+                    f"looking for a {metadata['job_name']} position",
+                    (("job_name", metadata["job_name"]),),
+                )
+            )
+    return queries
+
+
+def enterprise_queries(metadatas):
+    queries = []
+    for metadata in metadatas:
+        name = metadata.get("name")
+        if name and name != "Unknown":
+            queries.append(("exact", name, (("name", name),)))
+            queries.append(
+                ("phrase", f"what is it like to work at {name}", (("name", name),))
+            )
+    return queries
+
+
+COLLECTIONS = {
+    "job_listings": (job_vector_store, job_queries),
+    "enterprise_listings": (enterprise_vector_store, enterprise_queries),
+}
+
+
+def matches(document, field, term):
+    value = document.metadata.get(field)
+    term = term.lower()
+    if isinstance(value, list):
+        return any(str(item).lower() == term for item in value)
+    return str(value or "").lower() == term
+
+
+def is_hit(document, conditions):
+    return all(matches(document, field, term) for field, term in conditions)
+
+
+def run(name, search, queries, vectors, k):
+    hits, latencies = {}, {}
+    for (kind, text, conditions), vector in zip(queries, vectors):
+        started = time.perf_counter()
+        documents = search(text, vector, k)
+        latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+        hits[kind] = hits.get(kind, 0) + any(
+            is_hit(document, conditions) for document in documents
+        )
+
+    for kind in sorted(latencies):
+        print(
+            f"  {name:<8} {kind:<8} hit rate {hits[kind] / len(latencies[kind]):.4f}   "
+            f"p50 {np.percentile(latencies[kind], 50):7.2f} ms   "
+            f"p95 {np.percentile(latencies[kind], 95):7.2f} ms   "
+            f"({len(latencies[kind])} queries)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--collection", choices=sorted(COLLECTIONS), default="job_listings")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vector_store, build_queries = COLLECTIONS[args.collection]
+    metadatas = list(
+        get_stored_metadata(vector_store, list_document_ids(vector_store)).values()
+    )
+    queries = sorted(set(build_queries(metadatas)))
+    random.Random(args.seed).shuffle(queries)
+    queries = queries[: args.queries]
+    if not queries:
+        print(f"No queries could be built from '{args.collection}'.")
+        return
+
+    print(f"Embedding {len(queries)} queries...")
+    vectors = [embeddings_model.embed_query(text) for _, text, _ in queries]
+
+    print(f"\n{args.collection}, k={args.k}")
+    run(
+        "vector",
+        lambda text, vector, k: search_by_vector(vector_store, vector, k=k),
+        queries,
+        vectors,
+        args.k,
+    )
+    run(
+        "hybrid",
+        lambda text, vector, k: hybrid_search_by_vector(vector_store, text, vector, k=k),
+        queries,
+        vectors,
+        args.k,
+    )
+
+
+if __name__ == "__main__":
+    main()
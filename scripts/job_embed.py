@@ -1,10 +1,20 @@
 from langchain_core.documents import Document
 from app.services.preprocess import preprocess_text
-from app.vectorstore import job_vector_store
+from app.vectorstore import (
+    job_vector_store,
+    upsert_documents,
+    delete_documents,
+    delete_missing_documents,
+)
+from app.vectorstore.sync_state import get_watermark, set_watermark
+from app.config.config import DELTA_SYNC_OVERLAP_SECONDS
 from constants import main_database_url
 from contextlib import contextmanager
+from datetime import timedelta
+from typing import List, Optional
 from app.utils import clean_html
 import psycopg2
+import time
 
 
 # Database connection
@@ -146,7 +156,11 @@ def create_job_document(job_data: tuple) -> Document:
         "experience": experience or 0,
         "education": education or "",
         "status": job_status or "",
-        "salary_range": {"min": lowest_wage or 0, "max": highest_wage or 0},
+        # A missing or zero wage is unknown (negotiable), stored as null
+        "salary_range": {"min": lowest_wage or None, "max": highest_wage or None},
+        # Flat copies, nested fields cannot be used in metadata filters
+        "min_salary": lowest_wage or None,
+        "max_salary": highest_wage or None,
         "categories": categories,
         "tags": tags,
         "specializations": specializations,
@@ -167,97 +181,198 @@ def create_job_document(job_data: tuple) -> Document:
     return Document(page_content=content, metadata=metadata)
 
 
-def fetch_jobs():
-    """Fetch jobs with related data from database."""
+SYNC_NAME = "job_listings"
+
+
+JOBS_QUERY = """
+    SELECT
+        jb.job_id, 
+        jb.name as job_name, 
+        jb.type as job_type, 
+        jb.deadline, 
+        jb.education, 
+        jb.experience,
+        jb.highest_wage,
+        jb.lowest_wage,
+        jb.status as job_status,
+        jb.requirement,
+        jb.description,
+        jb.responsibility,
+        jb.enterprise_benefits as job_benefits,
+        en.name as enterprise_name,
+        en.organization_type,
+        en.is_premium,
+        en.is_trial,
+        en.status as enterprise_status,
+        COALESCE(bjb.points_used, 0) as points_used,
+        JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
+            'id', ct1.category_id,
+            'name', ct1.category_name
+        )) FILTER (WHERE ct1.category_id IS NOT NULL) AS job_categories,
+        JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
+            'id', ct2.category_id,
+            'name', ct2.category_name
+        )) FILTER (WHERE ct2.category_id IS NOT NULL) AS job_specializations,
+        JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
+            'id', tg.tag_id,
+            'name', tg."name",
+            'color', tg.color,
+            'background_color', tg.background_color
+        )) FILTER (WHERE tg.tag_id IS NOT NULL) AS job_tags,
+        JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
+            'id', ad.address_id,
+            'country', ad.country,
+            'city', ad.city,
+            'street', ad.street,
+            'zip_code', ad.zip_code
+        )) FILTER (WHERE ad.address_id IS NOT NULL) AS job_addresses
+    FROM jobs jb
+    LEFT JOIN enterprises en ON jb.enterprise_id = en.enterprise_id
+    LEFT JOIN job_categories jbc ON jbc.job_id = jb.job_id
+    LEFT JOIN categories ct1 ON ct1.category_id = jbc.category_id
+    LEFT JOIN job_specializations jbs ON jbs.job_id = jb.job_id
+    LEFT JOIN categories ct2 ON ct2.category_id = jbs.category_id
+    LEFT JOIN job_tags jbt ON jbt.job_id = jb.job_id
+    LEFT JOIN tags tg ON tg.tag_id = jbt.tag_id
+    LEFT JOIN job_addresses jba ON jba.job_id = jb.job_id
+    LEFT JOIN addresses ad ON ad.address_id = jba.address_id
+    LEFT JOIN boosted_jobs bjb ON bjb.job_id = jb.job_id
+    WHERE jb.status = 'OPEN' and en.status = 'ACTIVE'
+        AND (%(job_ids)s::uuid[] IS NULL OR jb.job_id = ANY(%(job_ids)s::uuid[]))
+    GROUP BY 
+        jb.job_id, 
+        jb.name, 
+        en.name,
+        en.is_premium,
+        en.is_trial,
+        en.organization_type,
+        en.status,
+        bjb.points_used
+    """
+
+
+def fetch_jobs(job_ids: Optional[List[str]] = None):
+    """Fetch open jobs with related data, optionally only the given ids."""
     print("Fetching jobs...")
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(JOBS_QUERY, {"job_ids": job_ids})
+            return cursor.fetchall()
+
+
+def stream_jobs(batch_size: int):
+    """Yield open jobs in batches through a server-side cursor."""
+    with get_db_connection() as conn:
+        with conn.cursor(name="stream_jobs") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(JOBS_QUERY, {"job_ids": None})
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+
+def current_database_time():
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT now()")
+            return cursor.fetchone()[0]
+
+
+def fetch_changed_jobs(since) -> list:
+    """Return (job_id, active) for jobs whose row or enterprise changed since."""
     with get_db_connection() as conn:
         with conn.cursor() as cursor:
             cursor.execute(
-                """ 
+                """
                 SELECT
-                    jb.job_id, 
-                    jb.name as job_name, 
-                    jb.type as job_type, 
-                    jb.deadline, 
-                    jb.education, 
-                    jb.experience,
-                    jb.highest_wage,
-                    jb.lowest_wage,
-                    jb.status as job_status,
-                    jb.requirement,
-                    jb.description,
-                    jb.responsibility,
-                    jb.enterprise_benefits as job_benefits,
-                    en.name as enterprise_name,
-                    en.organization_type,
-                    en.is_premium,
-                    en.is_trial,
-                    en.status as enterprise_status,
-                    COALESCE(bjb.points_used, 0) as points_used,
-                    JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
-                        'id', ct1.category_id,
-                        'name', ct1.category_name
-                    )) FILTER (WHERE ct1.category_id IS NOT NULL) AS job_categories,
-                    JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
-                        'id', ct2.category_id,
-                        'name', ct2.category_name
-                    )) FILTER (WHERE ct2.category_id IS NOT NULL) AS job_specializations,
-                    JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
-                        'id', tg.tag_id,
-                        'name', tg."name",
-                        'color', tg.color,
-                        'background_color', tg.background_color
-                    )) FILTER (WHERE tg.tag_id IS NOT NULL) AS job_tags,
-                    JSON_AGG(DISTINCT JSONB_BUILD_OBJECT(
-                        'id', ad.address_id,
-                        'country', ad.country,
-                        'city', ad.city,
-                        'street', ad.street,
-                        'zip_code', ad.zip_code
-                    )) FILTER (WHERE ad.address_id IS NOT NULL) AS job_addresses
+                    jb.job_id::text,
+                    jb.status = 'OPEN' AND COALESCE(en.status = 'ACTIVE', false)
                 FROM jobs jb
                 LEFT JOIN enterprises en ON jb.enterprise_id = en.enterprise_id
-                LEFT JOIN job_categories jbc ON jbc.job_id = jb.job_id
-                LEFT JOIN categories ct1 ON ct1.category_id = jbc.category_id
-                LEFT JOIN job_specializations jbs ON jbs.job_id = jb.job_id
-                LEFT JOIN categories ct2 ON ct2.category_id = jbs.category_id
-                LEFT JOIN job_tags jbt ON jbt.job_id = jb.job_id
-                LEFT JOIN tags tg ON tg.tag_id = jbt.tag_id
-                LEFT JOIN job_addresses jba ON jba.job_id = jb.job_id
-                LEFT JOIN addresses ad ON ad.address_id = jba.address_id
-                LEFT JOIN boosted_jobs bjb ON bjb.job_id = jb.job_id
-                WHERE jb.status = 'OPEN' and en.status = 'ACTIVE'
-                GROUP BY 
-                    jb.job_id, 
-                    jb.name, 
-                    en.name,
-                    en.is_premium,
-                    en.is_trial,
-                    en.organization_type,
-                    en.status,
-                    bjb.points_used
-                """
+                WHERE jb.updated_at >= %(since)s OR en.updated_at >= %(since)s
+                """,
+                {"since": since},
             )
             return cursor.fetchall()
 
 
-def main():
+def sync_changes():
+    """
+    Embed jobs changed since the last sync and delete jobs that closed.
+
+    Falls back to a full sync when no watermark has been stored yet.
+    """
+    watermark = get_watermark(SYNC_NAME)
+    if watermark is None:
+        print("No job sync watermark yet, running a full sync...")
+        main()
+        return
+
+    # Re-read a small window so rows committed late by long transactions are not missed
+    since = watermark - timedelta(seconds=DELTA_SYNC_OVERLAP_SECONDS)
+    started_at = current_database_time()
+    # Version of the written documents: a queued write of data read later wins
+    fetched_at = time.time()
+    changes = fetch_changed_jobs(since)
+    active_ids = [job_id for job_id, active in changes if active]
+    closed_ids = [f"job-{job_id}" for job_id, active in changes if not active]
+    print(f"{len(changes)} jobs changed since {since.isoformat()}")
+
+    stats = {"embedded": 0, "metadata_updated": 0, "skipped": 0, "stale": 0}
+    if active_ids:
+        jobs = fetch_jobs(active_ids)
+        documents = [create_job_document(job) for job in jobs]
+        ids = [f"job-{doc.metadata['job_id']}" for doc in documents]
+        stats = upsert_documents(
+            job_vector_store,
+            documents,
+            ids=ids,
+            versions=[fetched_at] * len(ids),
+        )
+    if closed_ids:
+        delete_documents(
+            job_vector_store, closed_ids, versions=[fetched_at] * len(closed_ids)
+        )
+
+    set_watermark(SYNC_NAME, started_at)
+    print(
+        f"Job delta sync done ({stats['embedded']} embedded, "
+        f"{stats['metadata_updated']} metadata updated, {stats['skipped']} skipped, "
+        f"{len(closed_ids)} deleted)."
+    )
+
+
+def main(force: bool = False):
     """Main function to process and embed jobs."""
+    started_at = current_database_time()
+    fetched_at = time.time()
+
     # Fetch jobs
     jobs = fetch_jobs()
 
     # Create documents
     print("Creating documents...")
     documents = [create_job_document(job) for job in jobs]
+    ids = [f"job-{doc.metadata['job_id']}" for doc in documents]
 
-    # Add to vector store
+    # Add to vector store, skipping jobs whose content did not change
     print("Adding documents to vector store...")
-    job_vector_store.add_documents(
-        documents, ids=[f"job-{doc.metadata['job_id']}" for doc in documents]
+    stats = upsert_documents(
+        job_vector_store,
+        documents,
+        ids=ids,
+        force=force,
+        versions=[fetched_at] * len(ids),
     )
+    deleted = delete_missing_documents(job_vector_store, ids, version=fetched_at)
+    set_watermark(SYNC_NAME, started_at)
 
     print(
-        f"Successfully indexed {len(documents)} jobs into pgvector collection 'job_listings'."
+        f"Successfully indexed {len(documents)} jobs into pgvector collection 'job_listings' "
+        f"({stats['embedded']} embedded, {stats['metadata_updated']} metadata updated, "
+        f"{stats['skipped']} skipped, {deleted} deleted)."
     )
 
 
@@ -0,0 +1,37 @@
+"""
+Create the table publishing the version of the related-jobs model.
+
+Run once when upgrading, as a user allowed to create tables in the main
+database. Replicas compare their local model with it to tell when MODEL_PATH
+is not shared with the process that trained. Safe to run again.
+
+Usage:
+    python scripts/migrate_job_model_version.py
+"""
+
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.config import DB_CONFIG_PRIMARY
+from app.services.job_service import (
+    CREATE_JOB_MODEL_VERSION_TABLE,
+    JOB_MODEL_VERSION_TABLE,
+)
+
+
+def main():
+    conn = psycopg2.connect(**DB_CONFIG_PRIMARY)
+    try:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(CREATE_JOB_MODEL_VERSION_TABLE)
+    finally:
+        conn.close()
+    print(f"✓ {JOB_MODEL_VERSION_TABLE} is ready.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Key langchain_pg_embedding and its binary copies by (collection_id, id).
+
+Run once when upgrading and on a new database, before starting the API: the
+migration rewrites the embedding table under an exclusive lock, so the API
+only checks the key and refuses to write until it is done. Prefixed ids of
+shadow and retired collections are renamed and the binary table's foreign
+key is re-created. Safe to run again.
+
+Usage:
+    python scripts/migrate_vector_keys.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy.orm import Session
+
+from app.vectorstore import (
+    website_content_vector_store,
+    job_vector_store,
+    enterprise_vector_store,
+)
+from app.vectorstore.binary import BINARY_TABLE, migrate_binary_table
+from app.vectorstore.pgvector import vector_engine
+from app.vectorstore.schema import EMBEDDING_TABLE, primary_key
+
+
+def main():
+    # Building the stores creates langchain_postgres' tables on a new database
+    for store in (website_content_vector_store, job_vector_store, enterprise_vector_store):
+        store.get()
+    with Session(vector_engine) as session:
+        migrate_binary_table(session)
+        session.commit()
+        for table in (EMBEDDING_TABLE, BINARY_TABLE):
+            print(f"✓ {table} primary key: {primary_key(session, table)}")
+
+
+if __name__ == "__main__":
+    main()
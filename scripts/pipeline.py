@@ -0,0 +1,276 @@
+"""
+Bounded-queue pipeline used by full rebuilds.
+
+Each stage runs in its own thread(s) and hands batches to the next stage
+through a bounded queue, so reading the database, building documents,
+embedding and inserting overlap. A full pass then takes about as long as
+the slowest stage, and a slow stage applies backpressure instead of letting
+batches pile up in memory.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_postgres import PGVector
+
+from app.config.config import EMBEDDING_BATCH_MAX_SIZE
+from app.vectorstore import content_hash
+from app.vectorstore.upsert import CONTENT_HASH_KEY, write_embeddings
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a pipeline, turning a batch into the next stage's batch."""
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self.busy_seconds += seconds
+
+    def stats(self) -> dict:
+        elapsed = (self.finished_at or time.perf_counter()) - (
+            self.started_at or time.perf_counter()
+        )
+        # Busy time is summed over workers, divide to get the stage's own rate
+        busy = self.busy_seconds / self.workers
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "batches": self.batches,
+            "items": self.items,
+            "busy_seconds": round(busy, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(self.items / busy, 1) if busy else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Run a batch source through a chain of stages.
+
+    Args:
+        name: Used in the report
+        source: Callable returning an iterable of batches (lists)
+        stages: Stages applied in order, the last one's output is discarded
+        queue_size: Batches buffered between two stages
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: Callable[[], Iterable[Sequence]],
+        stages: List[Stage],
+        queue_size: int = 4,
+    ):
+        self.name = name
+        self.source = Stage("stream", source)
+        self.stages = stages
+        self.queue_size = queue_size
+        self.error: Optional[BaseException] = None
+        self._abort = threading.Event()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        # Give up instead of blocking forever once another stage has failed
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException):
+        if self.error is None:
+            self.error = error
+        self._abort.set()
+
+    def _run_source(self, out: queue.Queue):
+        stage = self.source
+        stage.started_at = time.perf_counter()
+        batches = None
+        try:
+            batches = iter(stage.fn())
+            while True:
+                start = time.perf_counter()
+                batch = next(batches, _DONE)
+                if batch is _DONE:
+                    break
+                stage.record(len(batch), time.perf_counter() - start)
+                if not self._put(out, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Closes the source's cursor when stopping early
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+            stage.finished_at = time.perf_counter()
+            self._put(out, _DONE)
+
+    def _run_stage(
+        self, stage: Stage, inp: queue.Queue, out: queue.Queue, remaining: List[int]
+    ):
+        try:
+            while True:
+                batch = self._get(inp)
+                if batch is _DONE:
+                    # Let the stage's other workers see the end as well
+                    self._put(inp, _DONE)
+                    break
+                start = time.perf_counter()
+                result = stage.fn(batch)
+                stage.record(len(batch), time.perf_counter() - start)
+                if result and not self._put(out, result):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with stage._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                stage.finished_at = time.perf_counter()
+                self._put(out, _DONE)
+
+    def run(self) -> List[dict]:
+        """Run to completion, re-raising the first stage error. Returns stage stats."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(queues[0],),
+                name=f"{self.name}-stream",
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            stage.started_at = time.perf_counter()
+            remaining = [stage.workers]
+            for worker in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(stage, queues[i], queues[i + 1], remaining),
+                        name=f"{self.name}-{stage.name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        for thread in threads:
+            thread.start()
+        # Drain the last queue, nothing consumes the final stage's output
+        while self._get(queues[-1]) is not _DONE:
+            pass
+        for thread in threads:
+            thread.join()
+
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+    def stats(self) -> List[dict]:
+        return [stage.stats() for stage in [self.source] + self.stages]
+
+
+def batched(items: Iterable, size: int) -> Iterable[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embedding_pipeline(
+    vector_store: PGVector,
+    source: Callable[[], Iterable[Sequence]],
+    build: Callable[[object], Tuple[str, Document]],
+    build_workers: int = 1,
+    queue_size: int = 4,
+) -> Pipeline:
+    """
+    Pipeline writing every source row into vector_store: stream, build, embed, insert.
+
+    Args:
+        vector_store: Collection to write to, normally a fresh shadow collection
+        source: Callable returning batches of raw rows
+        build: Turns a raw row into (document id, document)
+    """
+
+    def build_batch(rows):
+        return [build(row) for row in rows]
+
+    def embed_batch(entries):
+        texts = [document.page_content for _, document in entries]
+        embeddings = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_MAX_SIZE):
+            embeddings.extend(
+                vector_store.embeddings.embed_documents(
+                    texts[start : start + EMBEDDING_BATCH_MAX_SIZE]
+                )
+            )
+        return list(zip(entries, embeddings))
+
+    def insert_batch(embedded):
+        # Later rows with the same id win, as in upsert_document_statuses
+        latest = {
+            doc_id: (document, embedding)
+            for (doc_id, document), embedding in embedded
+        }
+        ids = list(latest)
+        documents = [document for document, _ in latest.values()]
+        embeddings = [embedding for _, embedding in latest.values()]
+        for document in documents:
+            document.metadata[CONTENT_HASH_KEY] = content_hash(document.page_content)
+        write_embeddings(vector_store, documents, ids, embeddings)
+        return None
+
+    return Pipeline(
+        vector_store.collection_name,
+        source,
+        [
+            Stage("build", build_batch, workers=build_workers),
+            Stage("embed", embed_batch),
+            Stage("insert", insert_batch),
+        ],
+        queue_size=queue_size,
+    )
+
+
+def format_stats(name: str, stats: List[dict]) -> str:
+    lines = [f"{name}:"]
+    for stage in stats:
+        lines.append(
+            f"  {stage['stage']:<7} {stage['items']:>7} items in {stage['batches']:>4} batches, "
+            f"busy {stage['busy_seconds']:>8.2f}s, {stage['items_per_second']:>8.1f} items/s"
+        )
+    slowest = max(stats, key=lambda stage: stage["busy_seconds"])
+    lines.append(f"  slowest stage: {slowest['stage']}")
+    return "\n".join(lines)
@@ -0,0 +1,206 @@
+"""
+Blue/green rebuild of the website content, job and enterprise collections.
+
+Every collection is re-embedded into a versioned shadow collection while the
+live ones keep serving searches. The three collections are built concurrently,
+each through a stream -> build -> embed -> insert pipeline (see pipeline.py).
+Once all shadows pass validation they are made live together in one
+transaction and older versions are dropped.
+
+Usage:
+    python scripts/rebuild.py
+    python scripts/rebuild.py --rollback
+    python scripts/rebuild.py --gc
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import enterprise_embed
+import job_embed
+import website_content_embed
+from app.config.config import (
+    DOCUMENT_BUILD_WORKERS,
+    REBUILD_FETCH_SIZE,
+    REBUILD_KEEP_VERSIONS,
+    REBUILD_MIN_COUNT_RATIO,
+    REBUILD_QUEUE_SIZE,
+    VECTOR_INDEX_METHOD,
+)
+from app.vectorstore import (
+    website_content_vector_store,
+    job_vector_store,
+    enterprise_vector_store,
+)
+from app.vectorstore.index import create_index, embedding_dimensions
+from app.vectorstore.sync_state import set_watermark
+from app.vectorstore.versioning import (
+    drop_collection,
+    garbage_collect,
+    list_versions,
+    new_version,
+    repoint,
+    shadow_store,
+    validate_shadow,
+)
+from pipeline import batched, embedding_pipeline, format_stats
+
+
+def stream_website_content(batch_size: int):
+    return batched(website_content_embed.load_website_content_from_csv(), batch_size)
+
+
+def build_website_content(content):
+    return (
+        website_content_embed.website_content_id(content),
+        website_content_embed.create_website_content_document(content),
+    )
+
+
+def build_job(row):
+    document = job_embed.create_job_document(row)
+    return f"job-{document.metadata['job_id']}", document
+
+
+def build_enterprise(row):
+    document = enterprise_embed.create_enterprise_document(row)
+    return f"enterprise-{document.metadata['enterprise_id']}", document
+
+
+# (live store, batch source, row -> (id, document), delta sync watermark name)
+COLLECTIONS = [
+    (website_content_vector_store, stream_website_content, build_website_content, None),
+    (job_vector_store, job_embed.stream_jobs, build_job, job_embed.SYNC_NAME),
+    (
+        enterprise_vector_store,
+        enterprise_embed.stream_enterprises,
+        build_enterprise,
+        enterprise_embed.SYNC_NAME,
+    ),
+]
+
+
+def build_shadow(live_store, stream, build, version: str, min_ratio: float) -> str:
+    """Embed one collection into a new shadow collection, returns its name."""
+    shadow = shadow_store(live_store, version)
+    pipeline = embedding_pipeline(
+        shadow,
+        lambda: stream(REBUILD_FETCH_SIZE),
+        build,
+        build_workers=DOCUMENT_BUILD_WORKERS,
+        queue_size=REBUILD_QUEUE_SIZE,
+    )
+    try:
+        stats = pipeline.run()
+        print(format_stats(shadow.collection_name, stats))
+
+        inserted = stats[-1]["items"]
+        valid, message = validate_shadow(
+            live_store.collection_name, shadow.collection_name, inserted, min_ratio
+        )
+        print(f"{'✓' if valid else '❌'} {message}")
+        if not valid:
+            raise RuntimeError(f"Validation failed: {message}")
+
+        if VECTOR_INDEX_METHOD != "none" and embedding_dimensions() is not None:
+            print(f"Building vector index for '{shadow.collection_name}'...")
+            create_index(shadow)
+    except Exception:
+        # Live collections were never touched, just drop the partial version
+        drop_collection(shadow.collection_name)
+        raise
+    return shadow.collection_name
+
+
+def rebuild(min_ratio: float = REBUILD_MIN_COUNT_RATIO, keep: int = REBUILD_KEEP_VERSIONS):
+    version = new_version()
+    # Changes made during the rebuild are picked up by the next delta sync
+    started_at = job_embed.current_database_time()
+    print(f"Building version {version}...")
+
+    # The collections are independent, build them side by side
+    with ThreadPoolExecutor(max_workers=len(COLLECTIONS)) as executor:
+        futures = {
+            live_store.collection_name: executor.submit(
+                build_shadow, live_store, stream, build, version, min_ratio
+            )
+            for live_store, stream, build, _ in COLLECTIONS
+        }
+    shadows, errors = {}, []
+    for live_name, future in futures.items():
+        try:
+            shadows[live_name] = future.result()
+        except Exception as e:
+            errors.append(f"{live_name}: {str(e)}")
+    if errors:
+        for shadow_name in shadows.values():
+            drop_collection(shadow_name)
+        raise RuntimeError(f"Rebuild failed, live collections unchanged ({'; '.join(errors)})")
+
+    print("\nRepointing live collections...")
+    repoint(shadows, version)
+    for *_, sync_name in COLLECTIONS:
+        if sync_name:
+            set_watermark(sync_name, started_at)
+
+    for live_store, *_ in COLLECTIONS:
+        for name in garbage_collect(live_store.collection_name, keep):
+            print(f"Dropped old version '{name}'")
+    print(f"\n🎉 Version {version} is live.")
+
+
+def rollback():
+    """Make the newest retired version of every collection live again."""
+    candidates = {}
+    for live_store, *_ in COLLECTIONS:
+        retired = list_versions(live_store.collection_name)["retired"]
+        if not retired:
+            print(f"❌ No retired version of '{live_store.collection_name}' to roll back to.")
+            sys.exit(1)
+        candidates[live_store.collection_name] = retired[0]
+
+    repoint(candidates, new_version())
+    for live_name, retired_name in candidates.items():
+        print(f"✓ '{live_name}' rolled back to '{retired_name}'")
+    print("Run a delta sync to catch up with changes made since that version.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument(
+        "--rollback", action="store_true", help="Repoint to the previous version"
+    )
+    action.add_argument(
+        "--gc", action="store_true", help="Only drop old and abandoned versions"
+    )
+    parser.add_argument(
+        "--min-ratio",
+        type=float,
+        default=REBUILD_MIN_COUNT_RATIO,
+        help="Refuse to go live if a collection shrinks below this share of live rows",
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=REBUILD_KEEP_VERSIONS,
+        help="Retired versions to keep for rollback",
+    )
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    elif args.gc:
+        for live_store, *_ in COLLECTIONS:
+            for name in garbage_collect(live_store.collection_name, args.keep):
+                print(f"Dropped '{name}'")
+    else:
+        rebuild(min_ratio=args.min_ratio, keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,43 @@
+import argparse
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-import psycopg2
 import enterprise_embed
 import job_embed
+import rebuild
 import website_content_embed
 
-
-conn = psycopg2.connect(
-    dbname=os.getenv("VECTOR_DB_DATABASE"),
-    user=os.getenv("VECTOR_DB_USERNAME"),
-    password=os.getenv("VECTOR_DB_PASSWORD"),
-    host=os.getenv("VECTOR_DB_HOST"),
-    port=os.getenv("VECTOR_DB_PORT"),
+parser = argparse.ArgumentParser(description="Embed website content, jobs and enterprises.")
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument(
+    "--force",
+    action="store_true",
+    help="Re-embed every document into new collections and switch over once complete.",
+)
+mode.add_argument(
+    "--delta",
+    action="store_true",
+    help="Only sync jobs and enterprises updated since the last sync.",
 )
-cursor = conn.cursor()
+args = parser.parse_args()
 
-print("Starting embedding process...")
-print("Clearing existing embeddings...")
-print("==========================")
+if args.delta:
+    print("Starting delta sync...")
+    job_embed.sync_changes()
+    enterprise_embed.sync_changes()
+    sys.exit(0)
 
-cursor.execute("delete from langchain_pg_embedding;")
-rowcount = cursor.rowcount
-if rowcount == 0:
-    print("No existing embeddings found.")
-else:
-    print(f"Cleared {rowcount} existing embeddings.")
+print("Starting embedding process...")
+if args.force:
+    # Rebuild into new collections while the live ones keep serving searches
+    print("Rebuilding every collection (blue/green)...")
+    print("==========================")
+    rebuild.rebuild()
+    sys.exit(0)
 
-conn.commit()
-print("Existing embeddings cleared successfully.")
+print("Unchanged documents will be skipped (use --force to rebuild everything).")
 print("==========================")
 
 try:
@@ -55,7 +62,3 @@ try:
 except Exception as e:
     print(f"❌ Error during embedding process: {str(e)}")
     raise
-finally:
-    conn.close()
-    print("==========================")
-    print("Database connection closed.")
@@ -0,0 +1,48 @@
+"""
+Grant the Database tool's login role SELECT on the allow-listed columns only.
+
+Create the role first (CREATE ROLE jobcompass_sql_tool LOGIN PASSWORD '...'),
+then set SQL_TOOL_DB_USERNAME and SQL_TOOL_DB_PASSWORD for the API.
+
+Usage:
+    python scripts/sql_tool_role.py jobcompass_sql_tool          # print the SQL
+    python scripts/sql_tool_role.py jobcompass_sql_tool --apply  # run it as MAIN_DB_USERNAME
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.config import DB_CONFIG_PRIMARY
+from app.services.sql_schema import grant_statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("role", help="Login role of the Database tool")
+    parser.add_argument(
+        "--apply", action="store_true", help="Run the statements instead of printing them"
+    )
+    args = parser.parse_args()
+
+    statements = grant_statements(args.role)
+    if not args.apply:
+        print(";\n".join(statements) + ";")
+        return
+
+    conn = psycopg2.connect(**DB_CONFIG_PRIMARY)
+    try:
+        with conn, conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    finally:
+        conn.close()
+    print(f"✓ {args.role} can read {len(statements) - 2} allow-listed tables.")
+
+
+if __name__ == "__main__":
+    main()
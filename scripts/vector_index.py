@@ -0,0 +1,147 @@
+"""
+Manage the per-collection approximate nearest neighbour indexes.
+
+Usage:
+    python scripts/vector_index.py status
+    python scripts/vector_index.py create --method hnsw --m 16 --ef-construction 64
+    python scripts/vector_index.py create --method ivfflat --lists 100
+    python scripts/vector_index.py drop --collection job_listings
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config.config import (
+    DB_CONFIG_VECTOR,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_M,
+    VECTOR_INDEX_METHOD,
+)
+from app.llm.embeddings import EMBEDDING_DIMENSIONS
+from app.services.leader import advisory_lock
+from app.vectorstore import (
+    website_content_vector_store,
+    job_vector_store,
+    enterprise_vector_store,
+)
+from app.vectorstore.index import (
+    INDEX_BUILD_LOCK,
+    INDEX_METHODS,
+    create_index,
+    drop_index,
+    embedding_dimensions,
+    index_name,
+    index_status,
+    metadata_index_status,
+    create_metadata_indexes,
+    create_text_search_index,
+    set_embedding_dimensions,
+    text_search_index_exists,
+    TEXT_SEARCH_INDEX,
+)
+
+VECTOR_STORES = {
+    store.collection_name: store
+    for store in (website_content_vector_store, job_vector_store, enterprise_vector_store)
+}
+
+
+def create_indexes(stores, args):
+    if embedding_dimensions() is None:
+        if not args.set_dimensions:
+            print(
+                "The embedding column has no declared dimension, "
+                "rerun with --set-dimensions to fix it (rewrites the table)."
+            )
+            sys.exit(1)
+        set_embedding_dimensions()
+
+    for store in stores:
+        print(f"Creating {args.method} index for '{store.collection_name}'...")
+        created = create_index(
+            store,
+            method=args.method,
+            m=args.m,
+            ef_construction=args.ef_construction,
+            lists=args.lists,
+        )
+        print("✓ Created." if created else "Already indexed or empty, skipped.")
+
+    print("Creating metadata filter indexes...")
+    for name in create_metadata_indexes():
+        print(f"✓ Created {name}.")
+
+    print("Creating full-text index for hybrid search...")
+    if create_text_search_index():
+        print(f"✓ Created {TEXT_SEARCH_INDEX}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["status", "create", "drop"])
+    parser.add_argument(
+        "--collection",
+        choices=sorted(VECTOR_STORES),
+        action="append",
+        help="Limit to a collection (repeatable), defaults to all of them",
+    )
+    parser.add_argument("--method", choices=INDEX_METHODS, default=VECTOR_INDEX_METHOD)
+    parser.add_argument("--m", type=int, default=HNSW_M, help="HNSW links per node")
+    parser.add_argument(
+        "--ef-construction",
+        type=int,
+        default=HNSW_EF_CONSTRUCTION,
+        help="HNSW candidate list size while building",
+    )
+    parser.add_argument(
+        "--lists", type=int, default=None, help="IVFFlat lists (default rows / 1000)"
+    )
+    parser.add_argument(
+        "--set-dimensions",
+        action="store_true",
+        help=f"Declare the embedding column as vector({EMBEDDING_DIMENSIONS}) first",
+    )
+    args = parser.parse_args()
+
+    stores = [VECTOR_STORES[name] for name in args.collection or VECTOR_STORES]
+
+    if args.command == "create":
+        with advisory_lock(INDEX_BUILD_LOCK, DB_CONFIG_VECTOR) as leader:
+            if not leader:
+                print("Another process is building the vector indexes, try again later.")
+                sys.exit(1)
+            create_indexes(stores, args)
+
+    elif args.command == "drop":
+        for store in stores:
+            dropped = drop_index(store)
+            print(
+                f"{'Dropped' if dropped else 'No index for'} '{store.collection_name}'."
+            )
+
+    print(f"\nEmbedding column dimension: {embedding_dimensions() or 'undeclared'}")
+    for store in stores:
+        status = index_status(store)
+        if status is None:
+            print(f"{store.collection_name}: no index")
+        else:
+            print(
+                f"{store.collection_name}: {index_name(store)} "
+                f"({status['size']}{'' if status['valid'] else ', INVALID'})"
+            )
+            print(f"  {status['definition']}")
+
+    print("\nMetadata filter indexes:")
+    for name, exists in metadata_index_status().items():
+        print(f"  {name}: {'present' if exists else 'missing'}")
+    print(
+        f"\nFull-text index {TEXT_SEARCH_INDEX}: "
+        f"{'present' if text_search_index_exists() else 'missing'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
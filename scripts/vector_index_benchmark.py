@@ -0,0 +1,139 @@
+"""
+Benchmark the collection vector indexes against exact search.
+
+Samples stored embeddings of a collection as queries and reports p50/p95
+latency and recall@k of the index for several ef_search (HNSW) or probes
+(IVFFlat) values, next to an exact sequential scan. Run it against a local
+pgvector container (docker compose up vector_db) after
+scripts/vector_index.py create.
+
+Usage: python scripts/vector_index_benchmark.py --collection job_listings --queries 100 --k 10 --search 20 40 100
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from sqlalchemy import text
+
+from app.vectorstore import (
+    website_content_vector_store,
+    job_vector_store,
+    enterprise_vector_store,
+)
+from app.vectorstore.index import index_status
+from app.vectorstore.pgvector import vector_engine
+
+VECTOR_STORES = {
+    store.collection_name: store
+    for store in (website_content_vector_store, job_vector_store, enterprise_vector_store)
+}
+
+SEARCH_QUERY = text(
+    """
+    SELECT id FROM langchain_pg_embedding
+    WHERE collection_id = :cid
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :k
+    """
+)
+
+
+def run_queries(collection_uuid, queries, k, settings):
+    """Run every query with the given SET LOCAL settings, returns (ids, latencies)."""
+    results, latencies = [], []
+    with vector_engine.connect() as conn:
+        for query in queries:
+            with conn.begin():
+                for setting in settings:
+                    conn.execute(text(f"SET LOCAL {setting}"))
+                started = time.perf_counter()
+                rows = conn.execute(
+                    SEARCH_QUERY, {"cid": collection_uuid, "embedding": query, "k": k}
+                ).scalars()
+                results.append(list(rows))
+                latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+
+def report(label, latencies, recall=None):
+    line = (
+        f"  {label:<24} p50 {np.percentile(latencies, 50):7.2f} ms   "
+        f"p95 {np.percentile(latencies, 95):7.2f} ms"
+    )
+    if recall is not None:
+        line += f"   recall {recall:.4f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--collection", choices=sorted(VECTOR_STORES), default="job_listings")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument(
+        "--search",
+        type=int,
+        nargs="+",
+        default=[20, 40, 100, 200],
+        help="ef_search (HNSW) or probes (IVFFlat) values to try",
+    )
+    args = parser.parse_args()
+
+    store = VECTOR_STORES[args.collection]
+    status = index_status(store)
+    if status is None:
+        print(f"'{args.collection}' has no vector index, create it first.")
+        sys.exit(1)
+    parameter = (
+        "hnsw.ef_search" if "USING hnsw" in status["definition"] else "ivfflat.probes"
+    )
+    print(status["definition"])
+
+    with store.session_maker() as session:
+        collection_uuid = store.get_collection(session).uuid
+
+    with vector_engine.connect() as conn:
+        queries = list(
+            conn.execute(
+                text(
+                    """
+                    SELECT embedding::text FROM langchain_pg_embedding
+                    WHERE collection_id = :cid ORDER BY random() LIMIT :n
+                    """
+                ),
+                {"cid": collection_uuid, "n": args.queries},
+            ).scalars()
+        )
+    if not queries:
+        print(f"'{args.collection}' is empty.")
+        return
+
+    print(f"\n{len(queries)} queries, k={args.k}")
+    exact, latencies = run_queries(
+        collection_uuid,
+        queries,
+        args.k,
+        ["enable_indexscan = off", "enable_bitmapscan = off"],
+    )
+    report("exact (sequential scan)", latencies)
+
+    for value in args.search:
+        found, latencies = run_queries(
+            collection_uuid, queries, args.k, [f"{parameter} = {int(value)}"]
+        )
+        recall = np.mean(
+            [
+                len(set(a) & set(e)) / max(len(e), 1)
+                for a, e in zip(found, exact)
+            ]
+        )
+        report(f"{parameter}={value}", latencies, recall)
+
+
+if __name__ == "__main__":
+    main()
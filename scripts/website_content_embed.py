@@ -1,4 +1,5 @@
 import csv
+import hashlib
 import sys
 import os
 
@@ -8,7 +9,11 @@ from app.services.preprocess import preprocess_text
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from langchain_core.documents import Document
-from app.vectorstore import website_content_vector_store
+from app.vectorstore import (
+    website_content_vector_store,
+    upsert_documents,
+    delete_missing_documents,
+)
 
 
 def load_website_content_from_csv():
@@ -58,14 +63,35 @@ def create_website_content_document(content_data: dict) -> Document:
     return Document(page_content=page_content, metadata=metadata)
 
 
-def embed_website_content():
-    """Embed all website content into the vector store."""
+def website_content_id(content_data: dict) -> str:
+    """
+    Stable id of an FAQ entry, derived from its type, question and answer.
+
+    Adding or removing rows does not shift the ids of the others, and an
+    edited entry gets a new id so the old one is deleted. Whitespace and case
+    are normalized so cosmetic edits keep the id.
+    """
+    key = "\n".join(
+        " ".join(content_data.get(field, "").split()).lower()
+        for field in ("type", "question", "answer")
+    )
+    return f"website-content-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def embed_website_content(force: bool = False):
+    """
+    Sync the website content CSV into the vector store.
+
+    Only new or changed entries are embedded, entries removed from the CSV
+    are deleted by id.
+    """
     print("Starting website content embedding process...")
 
     # Load website content from CSV
     website_content = load_website_content_from_csv()
 
     if not website_content:
+        # An unreadable CSV must not wipe the collection
         print("No website content to embed.")
         return
 
@@ -76,42 +102,29 @@ def embed_website_content():
     for i, content in enumerate(website_content):
         try:
             document = create_website_content_document(content)
-            documents.append(document)
-            # Create unique ID for each document
-            doc_id = f"website-content-{i+1}"
-            document_ids.append(doc_id)
+            doc_id = website_content_id(content)
         except Exception as e:
             print(f"Error creating document for content {i+1}: {str(e)}")
             continue
+        documents.append(document)
+        document_ids.append(doc_id)
 
     if not documents:
         print("No valid documents created for embedding.")
         return
 
     try:
-        # Clear existing website content embeddings
-        print("Clearing existing website content embeddings...")
-        # Note: This will clear all existing website content embeddings
-        # If you want to add incrementally, remove this step
-        existing_ids = []
-        try:
-            # Get existing document IDs (if any)
-            existing_docs = website_content_vector_store.similarity_search("", k=1000)
-            existing_ids = [
-                doc.metadata.get("id", f"unknown-{i}")
-                for i, doc in enumerate(existing_docs)
-            ]
-            if existing_ids:
-                website_content_vector_store.delete(existing_ids)
-                print(f"Cleared {len(existing_ids)} existing embeddings.")
-        except Exception as e:
-            print(f"Warning: Could not clear existing embeddings: {str(e)}")
-
-        # Add new documents to vector store
-        print(f"Adding {len(documents)} documents to vector store...")
-        website_content_vector_store.add_documents(documents, ids=document_ids)
+        print(f"Syncing {len(documents)} documents to vector store...")
+        stats = upsert_documents(
+            website_content_vector_store, documents, ids=document_ids, force=force
+        )
+        deleted = delete_missing_documents(website_content_vector_store, document_ids)
 
-        print(f"Successfully embedded {len(documents)} website content entries.")
+        print(
+            f"Successfully embedded {stats['embedded']} website content entries "
+            f"({stats['metadata_updated']} metadata updated, {stats['skipped']} skipped, "
+            f"{deleted} deleted)."
+        )
         print("Website content embedding process completed successfully!")
 
     except Exception as e:
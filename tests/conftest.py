@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# The unit tests import app modules, which read the required settings at
+# import time. They never connect, placeholders are enough.
+for var in (
+    "MAIN_DB_DATABASE",
+    "MAIN_DB_USERNAME",
+    "MAIN_DB_PASSWORD",
+    "MAIN_DB_HOST",
+    "VECTOR_DB_DATABASE",
+    "VECTOR_DB_USERNAME",
+    "VECTOR_DB_PASSWORD",
+    "VECTOR_DB_HOST",
+    "OPENAI_API_KEY",
+):
+    os.environ.setdefault(var, "test")
+
+# The module-level write queue creates its SQLite file at import
+os.environ.setdefault(
+    "WRITE_QUEUE_PATH", os.path.join(tempfile.mkdtemp(), "write_queue.sqlite3")
+)
+
+# Manual scripts calling the live LLM and database, run them directly
+collect_ignore = ["test_gemini.py", "test_openai.py", "test_tools.py"]
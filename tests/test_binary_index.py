@@ -0,0 +1,81 @@
+import threading
+import time
+
+from app.vectorstore.binary import BinaryIndex, pack_bits
+
+
+def make_index(read):
+    index = BinaryIndex("jobs", refresh_seconds=60)
+    index._read = read
+    return index
+
+
+def test_reload_keeps_writes_made_while_loading():
+    loading, release = threading.Event(), threading.Event()
+
+    def read():
+        loading.set()
+        release.wait(5)
+        return ["job-1"], pack_bits([[1.0, -1.0]])
+
+    index = make_index(read)
+    loader = threading.Thread(target=index.candidates, args=([1.0, -1.0], 1))
+    loader.start()
+    loading.wait(5)
+    index.update(["job-2"], pack_bits([[-1.0, 1.0]]))
+    release.set()
+    loader.join(5)
+
+    assert index.ids == ["job-1", "job-2"]
+    assert index.candidates([-1.0, 1.0], 1) == ["job-2"]
+
+
+def test_searches_use_the_loaded_copy_during_a_reload():
+    reads = []
+    release = threading.Event()
+
+    def read():
+        reads.append(1)
+        if len(reads) > 1:
+            release.wait(5)
+        return ["job-1"], pack_bits([[1.0, -1.0]])
+
+    index = make_index(read)
+    assert index.candidates([1.0, -1.0], 1) == ["job-1"]
+
+    index._loaded_at -= 120
+    reloader = threading.Thread(target=index.candidates, args=([1.0, -1.0], 1))
+    reloader.start()
+    while len(reads) < 2:
+        time.sleep(0.01)
+    # A second caller neither waits nor starts another load
+    assert index.candidates([1.0, -1.0], 1) == ["job-1"]
+    release.set()
+    reloader.join(5)
+    assert len(reads) == 2
+
+
+def test_removed_documents_leave_the_candidates():
+    index = make_index(lambda: (["job-1", "job-2"], pack_bits([[1.0, -1.0], [-1.0, 1.0]])))
+    assert index.candidates([1.0, -1.0], 2) == ["job-1", "job-2"]
+    index.remove(["job-1", "unknown"])
+    assert index.candidates([1.0, -1.0], 2) == ["job-2"]
+
+
+def test_reload_replays_deletes_made_while_loading():
+    loading, release = threading.Event(), threading.Event()
+
+    def read():
+        loading.set()
+        release.wait(5)
+        return ["job-1", "job-2"], pack_bits([[1.0, -1.0], [-1.0, 1.0]])
+
+    index = make_index(read)
+    loader = threading.Thread(target=index.candidates, args=([1.0, -1.0], 1))
+    loader.start()
+    loading.wait(5)
+    index.remove(["job-1"])
+    release.set()
+    loader.join(5)
+
+    assert index.ids == ["job-2"]
@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.sql_cache import sql_result_cache
+from app.tools import database
+
+# Reads a column outside the allow-list
+HIDDEN_COLUMN_QUERY = "SELECT email FROM enterprises"
+
+
+@pytest.fixture(autouse=True)
+def executor(monkeypatch):
+    queries = []
+    monkeypatch.setattr(
+        database.sql_executor, "run", lambda query: queries.append(query) or "[]"
+    )
+    sql_result_cache.invalidate()
+    return queries
+
+
+def test_check_refuses_without_a_restricted_role(monkeypatch, executor):
+    monkeypatch.setattr(database, "SQL_TOOL_RESTRICTED_ROLE", False)
+    assert database.database_query(HIDDEN_COLUMN_QUERY).startswith("Query not allowed")
+    assert executor == []
+
+
+def test_role_decides_when_configured(monkeypatch, executor):
+    monkeypatch.setattr(database, "SQL_TOOL_RESTRICTED_ROLE", True)
+    assert database.database_query(HIDDEN_COLUMN_QUERY) == "[]"
+    assert executor == [HIDDEN_COLUMN_QUERY]
+
+
+def test_only_selects_run(monkeypatch, executor):
+    monkeypatch.setattr(database, "SQL_TOOL_RESTRICTED_ROLE", True)
+    assert database.database_query("DELETE FROM jobs") == "Only SELECT queries are allowed."
+    assert executor == []
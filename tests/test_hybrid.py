@@ -0,0 +1,47 @@
+import pytest
+from langchain_postgres.vectorstores import _get_embedding_collection_store
+from sqlalchemy.dialects import postgresql
+
+from app.vectorstore.hybrid import _hybrid_statement, _text_queries, strip_stopwords
+
+
+@pytest.mark.parametrize(
+    "query, terms",
+    [
+        ("jobs at the bank", ["jobs", "bank"]),
+        ("IT support in Hanoi", ["IT", "support", "Hanoi"]),
+        ("A React developer", ["React", "developer"]),
+        ("The", []),
+        ("node.js at the C++ shop", ["node.js", "C++", "shop"]),
+    ],
+)
+def test_strip_stopwords(query, terms):
+    assert strip_stopwords(query).split() == terms
+
+
+def test_text_queries_drop_stopwords():
+    all_terms, any_term = _text_queries("the react developer")
+    sql = str(
+        any_term.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    assert "plainto_tsquery('simple', 'react developer')" in sql
+    assert "'&', '|'" in sql
+
+
+class _Store:
+    EmbeddingStore = _get_embedding_collection_store(3)[0]
+
+
+def _vector_arm(vector_candidates):
+    statement = _hybrid_statement(
+        _Store(), "cid", "react", [0.1, 0.2, 0.3], 4, None, 50, 60, vector_candidates
+    )
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    return sql.split("text_ranked AS")[0]
+
+
+def test_vector_ranking_reranks_binary_candidates():
+    assert "langchain_pg_embedding.id IN" in _vector_arm(["a", "b"])
+    assert "langchain_pg_embedding.id IN" not in _vector_arm(None)
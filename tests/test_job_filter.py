@@ -0,0 +1,87 @@
+import re
+
+import pytest
+
+from app.tools import job
+from app.tools.job import build_job_filter
+
+
+def like(pattern: str, value: str) -> bool:
+    """Postgres ILIKE semantics, enough for the patterns built here."""
+    regex = ""
+    for token in re.findall(r"\\.|.", pattern):
+        if token == "%":
+            regex += ".*"
+        elif token == "_":
+            regex += "."
+        else:
+            regex += re.escape(token[-1])
+    return re.fullmatch(regex, value, re.IGNORECASE | re.DOTALL) is not None
+
+
+def test_no_criteria():
+    assert build_job_filter() is None
+    assert build_job_filter(location="  ", job_types=["", " "], categories=[]) is None
+
+
+def test_single_condition_is_not_wrapped():
+    assert build_job_filter(min_experience=2) == {"experience": {"$gte": 2}}
+
+
+def test_unknown_wages_match_salary_criteria():
+    assert build_job_filter(min_salary=1000) == {
+        "$or": [{"max_salary": {"$gte": 1000}}, {"max_salary": {"$eq": None}}]
+    }
+
+
+def test_conditions_are_anded():
+    assert build_job_filter(location="Da Nang", min_experience=1, max_salary=2000) == {
+        "$and": [
+            {"locations": {"$ilike": "%Da Nang%"}},
+            {"experience": {"$gte": 1}},
+            {"$or": [{"min_salary": {"$lte": 2000}}, {"min_salary": {"$eq": None}}]},
+        ]
+    }
+
+
+def test_user_wildcards_are_escaped():
+    condition = build_job_filter(location="100%_remote")
+    assert condition == {"locations": {"$ilike": "%100\\%\\_remote%"}}
+
+
+def test_categories_match_whole_elements():
+    condition = build_job_filter(categories=["IT"])
+    pattern = condition["$or"][0]["categories"]["$ilike"]
+    assert like(pattern, '["Finance", "IT"]')
+    assert not like(pattern, '["IT Support"]')
+
+
+@pytest.mark.parametrize(
+    "requested", ["Full-time", "full time", "FULL_TIME", " full - time "]
+)
+@pytest.mark.parametrize("stored", ["FULL_TIME", "Full-time", "full time", "Fulltime"])
+def test_job_types_ignore_case_and_separators(requested, stored):
+    condition = build_job_filter(job_types=[requested])
+    assert like(condition["$or"][0]["job_type"]["$ilike"], stored)
+
+
+def test_job_types_do_not_match_other_types():
+    condition = build_job_filter(job_types=["Full-time"])
+    assert not like(condition["$or"][0]["job_type"]["$ilike"], "PART_TIME")
+
+
+def test_search_retries_without_job_types(monkeypatch):
+    filters = []
+
+    def search(store, query, k, filter, hybrid):
+        filters.append(filter)
+        return [] if len(filters) == 1 else ["doc"]
+
+    monkeypatch.setattr(job, "search_documents", search)
+    monkeypatch.setattr(job, "format_job_results", lambda docs: ["Job 1"])
+    results = job.job_vector_search("developer", job_types=["Contract"], min_salary=500)
+
+    assert "job_type" in str(filters[0])
+    assert filters[1] == build_job_filter(min_salary=500)
+    assert results[0].startswith("No jobs matched the job types Contract")
+    assert results[1:] == ["Job 1"]
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.lazy import Lazy, lazy_status, warm_up
+
+
+def test_built_once_on_first_use():
+    calls = []
+    lazy = Lazy("test_built_once", lambda: calls.append(1) or {"value": 1})
+    assert not lazy.initialized
+    assert calls == []
+
+    assert lazy.get() == {"value": 1}
+    assert lazy.get() is lazy.get()
+    assert calls == [1]
+    assert lazy.initialized
+
+
+def test_attributes_are_forwarded():
+    lazy = Lazy("test_forwarded", lambda: "text")
+    assert lazy.upper() == "TEXT"
+    with pytest.raises(AttributeError):
+        lazy.__missing_dunder__
+
+
+def test_concurrent_first_use_builds_once():
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    lazy = Lazy("test_concurrent", build)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_failed_build_is_retried():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("unavailable")
+        return "ready"
+
+    lazy = Lazy("test_retried", build)
+    with pytest.raises(RuntimeError):
+        lazy.get()
+    assert lazy.status()["error"] == "unavailable"
+    assert lazy.get() == "ready"
+    assert lazy.status()["error"] is None
+
+
+def test_warm_up_logs_failures_and_builds_the_rest():
+    def fail():
+        raise RuntimeError("down")
+
+    Lazy("test_warm_fail", fail)
+    Lazy("test_warm_ok", lambda: 1)
+    status = warm_up(["test_warm_fail", "test_warm_ok", "test_not_registered"])
+    assert status["test_warm_fail"]["error"] == "down"
+    assert status["test_warm_ok"]["initialized"]
+    assert "test_not_registered" not in lazy_status()
+
+
+def test_reset_rebuilds_on_next_use():
+    versions = iter(["old", "new"])
+    lazy = Lazy("test_reset", lambda: next(versions))
+    assert lazy.get() == "old"
+    lazy.reset()
+    assert lazy.get() == "new"
+    assert lazy.get() == "new"
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from app.services.leader import host_lock
+
+# Holds the lock from another process until its stdin closes
+_HOLDER = """
+import sys
+from app.services.leader import host_lock
+with host_lock(sys.argv[1]) as leader:
+    print(leader, flush=True)
+    sys.stdin.read()
+"""
+
+
+def test_host_lock_is_held_by_one_process(tmp_path):
+    path = str(tmp_path / "models" / ".lock")
+    holder = subprocess.Popen(
+        [sys.executable, "-c", _HOLDER, path],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(__file__))},
+    )
+    try:
+        assert holder.stdout.readline().strip() == "True"
+        with host_lock(path) as leader:
+            assert not leader
+    finally:
+        holder.communicate("")
+
+    with host_lock(path) as leader:
+        assert leader
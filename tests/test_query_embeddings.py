@@ -0,0 +1,54 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.llm.embeddings import CachedQueryEmbeddings, embedding_version, normalize_query
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.queries.append(text)
+        return [float(len(self.queries))]
+
+
+def test_normalize_query_collapses_whitespace_and_case():
+    assert normalize_query("  Senior\tPython \n Developer ") == "senior python developer"
+
+
+def test_equivalent_queries_share_an_embedding():
+    base = CountingEmbeddings()
+    cached = CachedQueryEmbeddings(base)
+    first = cached.embed_query("Python Developer")
+    assert cached.embed_query("python   developer") == first
+    # The model sees the normalized text
+    assert base.queries == ["python developer"]
+    assert cached.stats()["hits"] == 1
+
+
+def test_least_recently_used_query_is_evicted():
+    base = CountingEmbeddings()
+    cached = CachedQueryEmbeddings(base, max_size=2)
+    for query in ("a", "b", "a", "c"):
+        cached.embed_query(query)
+    assert cached.stats()["size"] == 2
+    cached.embed_query("a")
+    cached.embed_query("b")
+    assert base.queries == ["a", "b", "c", "b"]
+
+
+def test_documents_are_not_cached():
+    cached = CachedQueryEmbeddings(CountingEmbeddings())
+    assert cached.embed_documents(["ab", "abc"]) == [[2.0], [3.0]]
+    assert cached.stats()["size"] == 0
+
+
+def test_embedding_version_follows_the_quantization():
+    # fp32 keeps the version the stored content hashes were computed with
+    assert embedding_version("none") == "snowflake-arctic-embed-m/float32"
+    assert embedding_version("int8") == "snowflake-arctic-embed-m/int8"
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.session_store import SessionStore, SessionStoreUnavailable
+
+
+class SharedBackend:
+    """Stands in for one Postgres table shared by several workers."""
+
+    def __init__(self):
+        self.messages = {}
+
+    def load(self, conversation_id, limit):
+        return self.messages.get(conversation_id, [])[-limit:] or None
+
+    def append(self, conversation_id, messages):
+        self.messages.setdefault(conversation_id, []).extend(messages)
+
+    def delete(self, conversation_id):
+        self.messages.pop(conversation_id, None)
+
+    def prune(self, max_age_seconds):
+        return 3
+
+
+def message(content):
+    return {"type": "human", "content": content}
+
+
+def test_workers_see_each_others_messages():
+    backend = SharedBackend()
+    first, second = SessionStore(backend=backend), SessionStore(backend=backend)
+
+    first.append_messages("c1", [message("hello")])
+    assert second.get_messages("c1") == [message("hello")]
+    second.append_messages("c1", [message("again")])
+    assert first.get_messages("c1") == [message("hello"), message("again")]
+
+
+def test_memory_store_keeps_recent_messages():
+    store = SessionStore(max_conversations=1, max_messages=2)
+    store.append_messages("c1", [message("a"), message("b"), message("c")])
+    assert store.get_messages("c1") == [message("b"), message("c")]
+
+    store.append_messages("c2", [message("d")])
+    assert store.get_messages("c1") == []
+
+
+def test_prune_needs_a_backend_and_a_ttl():
+    assert SessionStore(ttl_seconds=60).prune() == 0
+    assert SessionStore(backend=SharedBackend()).prune() == 0
+    assert SessionStore(backend=SharedBackend(), ttl_seconds=60).prune() == 3
+
+
+class FailingBackend(SharedBackend):
+    def load(self, conversation_id, limit):
+        raise RuntimeError("connection refused")
+
+    def delete(self, conversation_id):
+        raise RuntimeError("connection refused")
+
+
+def test_backend_errors_are_not_an_empty_history():
+    store = SessionStore(backend=FailingBackend())
+    with pytest.raises(SessionStoreUnavailable):
+        store.get_messages("c1")
+    with pytest.raises(SessionStoreUnavailable):
+        store.delete("c1")
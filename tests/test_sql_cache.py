@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from app.services.sql_cache import SQLResultCache, normalize_sql
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("SELECT name FROM jobs", "select  name\n from JOBS;"),
+        ("SELECT name FROM jobs -- newest\n", "SELECT name FROM jobs"),
+    ],
+)
+def test_normalize_sql_merges_equivalent_queries(a, b):
+    assert normalize_sql(a) == normalize_sql(b)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("SELECT 1 FROM jobs WHERE status = 'OPEN'", "SELECT 1 FROM jobs WHERE status = 'open'"),
+        ("SELECT 1 FROM jobs WHERE name = E'Dev\\'s'", "SELECT 1 FROM jobs WHERE name = E'dev\\'s'"),
+        ("SELECT 1 FROM jobs WHERE name = $$Dev$$", "SELECT 1 FROM jobs WHERE name = $$dev$$"),
+        ("SELECT 1 FROM jobs WHERE name = $t$Dev$t$", "SELECT 1 FROM jobs WHERE name = $t$dev$t$"),
+        ('SELECT 1 FROM "Jobs"', "SELECT 1 FROM jobs"),
+    ],
+)
+def test_normalize_sql_keeps_literals(a, b):
+    assert normalize_sql(a) != normalize_sql(b)
+
+
+def test_results_are_cached_per_normalized_query():
+    cache = SQLResultCache(db_config={})
+    calls = []
+
+    def run(query):
+        calls.append(query)
+        return "result"
+
+    assert cache.get_or_run("SELECT name FROM jobs", run) == "result"
+    assert cache.get_or_run("select name from jobs;", run) == "result"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_are_not_cached():
+    cache = SQLResultCache(db_config={})
+
+    def fail(query):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_run("SELECT name FROM jobs", fail)
+    assert cache.get_or_run("SELECT name FROM jobs", lambda query: "ok") == "ok"
+
+
+def test_ttl_is_the_shortest_of_the_tables_read():
+    cache = SQLResultCache(default_ttl=300, table_ttls={"tags": 3600, "jobs": 0}, db_config={})
+    assert cache.ttl({"tags"}) == 3600
+    assert cache.ttl({"tags", "enterprises"}) == 300
+    assert cache.ttl({"tags", "jobs"}) == 0
+
+    calls = []
+    cache.get_or_run("SELECT name FROM jobs", calls.append)
+    cache.get_or_run("SELECT name FROM jobs", calls.append)
+    assert len(calls) == 2
+
+
+def test_lru_eviction():
+    cache = SQLResultCache(max_size=2, db_config={})
+    for table in ("jobs", "tags", "jobs", "enterprises"):
+        cache.get_or_run(f"SELECT name FROM {table}", lambda query: query)
+    assert cache.stats()["size"] == 2
+    # jobs was used last before enterprises came in, tags was evicted
+    assert cache.get_or_run("SELECT name FROM jobs", lambda query: "again") != "again"
+    assert cache.get_or_run("SELECT name FROM tags", lambda query: "again") == "again"
+
+
+def test_invalidate_by_table():
+    cache = SQLResultCache(db_config={})
+    cache.get_or_run("SELECT name FROM jobs", lambda query: "jobs")
+    cache.get_or_run("SELECT name FROM tags", lambda query: "tags")
+    assert cache.invalidate(["JOBS"]) == 1
+    assert cache.stats()["size"] == 1
+    assert cache.invalidate() == 1
+
+
+def test_notifications_from_other_processes_are_applied():
+    cache = SQLResultCache(db_config={})
+    other = SQLResultCache(db_config={})
+    cache.get_or_run("SELECT name FROM jobs", lambda query: "jobs")
+
+    own = json.dumps({"origin": cache._origin, "tables": ["jobs"]})
+    assert cache.apply_notification(own) == 0
+    assert cache.apply_notification(json.dumps({"origin": other._origin, "tables": ["jobs"]})) == 1
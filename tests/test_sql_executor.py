@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from app.services.sql_executor import QueryRejected, SQLExecutor
+
+
+class FakePool:
+    """ThreadedConnectionPool's contract: getconn raises when exhausted."""
+
+    def __init__(self, size):
+        self.free = [FakeConnection() for _ in range(size)]
+
+    def getconn(self):
+        if not self.free:
+            raise RuntimeError("connection pool exhausted")
+        return self.free.pop()
+
+    def putconn(self, conn, close=False):
+        self.free.append(conn)
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def executor():
+    executor = SQLExecutor({}, pool_size=2, pool_timeout=0.2)
+    pool = FakePool(2)
+    executor._pool.get = lambda: pool
+    return executor
+
+
+def test_waits_for_a_free_connection(executor):
+    held = [executor._connection() for _ in range(2)]
+    for connection in held:
+        connection.__enter__()
+
+    released = threading.Timer(0.05, held[0].__exit__, (None, None, None))
+    released.start()
+    with executor._connection() as conn:
+        assert isinstance(conn, FakeConnection)
+    released.join()
+    held[1].__exit__(None, None, None)
+
+
+def test_refuses_when_no_connection_frees_up(executor):
+    held = [executor._connection() for _ in range(2)]
+    for connection in held:
+        connection.__enter__()
+
+    with pytest.raises(QueryRejected, match="busy"):
+        with executor._connection():
+            pass
+    for connection in held:
+        connection.__exit__(None, None, None)
+    with executor._connection():
+        pass
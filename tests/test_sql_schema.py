@@ -0,0 +1,104 @@
+import pytest
+
+from app.services.sql_schema import (
+    SQL_ALLOWED_SCHEMA,
+    SchemaCache,
+    grant_statements,
+    referenced_tables,
+)
+
+
+@pytest.fixture
+def schema(tmp_path):
+    # No cache file: the checks must not depend on it having been refreshed
+    return SchemaCache(str(tmp_path / "sql_schema.json"), SQL_ALLOWED_SCHEMA)
+
+
+@pytest.mark.parametrize(
+    "query, tables",
+    [
+        ("SELECT name FROM jobs", {"jobs"}),
+        ("SELECT 1 FROM jobs j, enterprises AS e JOIN tags t ON true", {"jobs", "enterprises", "tags"}),
+        ("SELECT 1 FROM public.jobs, other.jobs", {"jobs", "other.jobs"}),
+        ("SELECT 1 FROM jobs WHERE job_id IN (/**/ SELECT 1 FROM users)", {"jobs", "users"}),
+        ("SELECT 1 FROM jobs WHERE job_id IN (-- x\n SELECT 1 FROM users)", {"jobs", "users"}),
+        ("SELECT 1 FROM jobs WHERE job_id IN ((SELECT 1) UNION SELECT 1 FROM users)", {"jobs", "users"}),
+        ("SELECT extract(year FROM created_at) FROM jobs", {"jobs"}),
+        ("SELECT 1 FROM jobs WHERE a IS DISTINCT FROM b", {"jobs"}),
+        ('SELECT 1 FROM "Jobs"', {"Jobs"}),
+        ("SELECT E'\\'', (SELECT 1 FROM users), 'x' FROM jobs", {"jobs", "users"}),
+        ("SELECT $$ -- $$, (SELECT 1 FROM users) FROM jobs", {"jobs", "users"}),
+    ],
+)
+def test_referenced_tables(query, tables):
+    assert referenced_tables(query) == tables
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT name, lowest_wage FROM jobs WHERE status = 'OPEN' AND deadline > CURRENT_DATE "
+        "ORDER BY lowest_wage DESC LIMIT 5",
+        "SELECT e.name, count(*) AS total FROM enterprises e JOIN jobs j "
+        "ON j.enterprise_id = e.enterprise_id GROUP BY e.name ORDER BY total DESC LIMIT 10",
+        "SELECT extract(year FROM created_at) AS year, count(*) FROM jobs GROUP BY 1",
+        "WITH open_jobs AS (SELECT job_id, name FROM jobs WHERE status = 'OPEN') "
+        "SELECT o.name FROM open_jobs o",
+        "SELECT s.total FROM (SELECT count(*) AS total FROM jobs) s",
+        "SELECT name FROM jobs WHERE created_at > NOW() - INTERVAL '7 days' AND name ILIKE '%dev%'",
+        "SELECT name, highest_wage::numeric(10, 2), CAST(lowest_wage AS text) FROM jobs",
+        "SELECT e.name, row_number() OVER (PARTITION BY e.status ORDER BY e.created_at DESC) "
+        "FROM enterprises e",
+        "SELECT name FROM jobs WHERE job_id = ANY(ARRAY(SELECT job_id FROM boosted_jobs))",
+        "SELECT name FROM jobs;",
+    ],
+)
+def test_check_query_allows(schema, query):
+    assert schema.check_query(query) is None
+
+
+@pytest.mark.parametrize(
+    "query, reason",
+    [
+        # Comments hiding a subquery
+        ("SELECT name FROM jobs WHERE job_id IN (/**/ SELECT email FROM users)", "Tables not available"),
+        ("SELECT name FROM jobs WHERE job_id IN (--\n SELECT email FROM users)", "Tables not available"),
+        # SQL run by a function from a string literal
+        (
+            "SELECT query_to_xml('select email, password from users', true, false, '') FROM jobs",
+            "Function not available",
+        ),
+        ("SELECT pg_catalog.query_to_xml('x', true, false, '') FROM jobs", "System catalogs"),
+        # Whole rows
+        ("SELECT row_to_json(e) FROM enterprises e", "Function not available"),
+        ("SELECT e FROM enterprises e", "Whole-row references"),
+        ("SELECT (e).email FROM enterprises e", "Whole-row references"),
+        ("SELECT enterprises FROM enterprises", "Whole-row references"),
+        ("SELECT e.* FROM enterprises e", "instead of *"),
+        ("SELECT name, * FROM enterprises", "instead of *"),
+        # Columns outside the allow-list, with no schema cache loaded
+        ("SELECT email FROM enterprises", "Columns not available: email"),
+        ("SELECT e.email FROM enterprises e", "Columns not available: email"),
+        ('SELECT "Name" FROM enterprises', "Columns not available: Name"),
+        ("SELECT name AS email, email FROM enterprises", "Columns not available: email"),
+        ("SELECT name AS x FROM jobs ORDER BY x + 1", "Columns not available: x"),
+        # Literals the tokenizer must not end early
+        ("SELECT E'\\'', (SELECT email FROM users), 'x' FROM jobs", "Tables not available"),
+        ("SELECT $$ -- $$, (SELECT email FROM users) FROM jobs", "Tables not available"),
+        ('SELECT name FROM "Jobs"', "Tables not available"),
+        ("SELECT name FROM jobs; DROP TABLE jobs", "single statement"),
+    ],
+)
+def test_check_query_rejects(schema, query, reason):
+    assert reason in schema.check_query(query)
+
+
+def test_check_query_rejects_hidden_keyword_columns(schema):
+    # A column named like a keyword is only readable when allow-listed
+    schema.hidden = {"jobs": ["first"]}
+    assert "first" in schema.check_query("SELECT first FROM jobs")
+
+
+def test_grant_statements_cover_only_allowed_columns():
+    statements = grant_statements("sql_tool", {"jobs": {"columns": ["job_id", "name"]}})
+    assert statements[-1] == 'GRANT SELECT ("job_id", "name") ON public."jobs" TO "sql_tool"'
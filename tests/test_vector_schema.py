@@ -0,0 +1,48 @@
+import pytest
+
+from app.vectorstore import schema
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+    def scalars(self):
+        return self.value
+
+
+class FakeSession:
+    """Answers primary_key's two catalog queries with a fixed key."""
+
+    def __init__(self, key):
+        self.key = key
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        if "to_regclass" in str(statement):
+            return _Result("langchain_pg_embedding")
+        return _Result(self.key)
+
+
+@pytest.fixture(autouse=True)
+def unchecked(monkeypatch):
+    monkeypatch.setattr(schema, "_key_checked", False)
+
+
+def test_assert_embedding_key_refuses_the_old_key():
+    session = FakeSession(["id"])
+    with pytest.raises(RuntimeError, match="migrate_vector_keys"):
+        schema.assert_embedding_key(session)
+    # Checking never alters the table
+    assert not any("ALTER" in statement for statement in session.statements)
+
+
+def test_assert_embedding_key_checks_once():
+    session = FakeSession(["collection_id", "id"])
+    schema.assert_embedding_key(session)
+    schema.assert_embedding_key(session)
+    assert len(session.statements) == 2
@@ -0,0 +1,180 @@
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services.write_queue import WriteQueue
+from app.vectorstore.pgvector import JOB_COLLECTION
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WriteQueue(
+        str(tmp_path / "write_queue.sqlite3"),
+        debounce_seconds=0,
+        max_attempts=3,
+        retry_seconds=60,
+    )
+    queue.written = []
+    queue._write = lambda rows: queue.written.append(
+        [(row["doc_id"], row["op"], row["payload"]) for row in rows]
+    )
+    return queue
+
+
+def fail_writes(queue):
+    def write(rows):
+        raise RuntimeError("vector store down")
+
+    queue._write = write
+
+
+def pending(queue):
+    with closing(queue._connect()) as conn:
+        return conn.execute("SELECT * FROM pending_writes").fetchall()
+
+
+def make_due(queue):
+    with closing(queue._connect()) as conn:
+        conn.execute("UPDATE pending_writes SET not_before = 0")
+
+
+def test_updates_to_one_document_coalesce(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="second"))
+    queue.enqueue_upsert(JOB_COLLECTION, "job-2", Document(page_content="other"))
+
+    assert queue.stats()["pending_updates"] == 3
+    assert queue.process_batch() == 2
+    (batch,) = queue.written
+    assert [doc_id for doc_id, _, _ in batch] == ["job-1", "job-2"]
+    assert '"second"' in batch[0][2]
+    assert pending(queue) == []
+
+
+def test_delete_replaces_queued_upsert(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    queue.enqueue_delete(JOB_COLLECTION, "job-1")
+
+    queue.process_batch()
+    assert queue.written == [[("job-1", "delete", None)]]
+
+
+def test_debounce_holds_recent_updates(queue):
+    queue.debounce_seconds = 60
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    assert queue.process_batch() == 0
+
+
+def test_max_delay_caps_the_debounce(queue):
+    queue.debounce_seconds = 60
+    queue.max_delay_seconds = 30
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    with closing(sqlite3.connect(queue.path)) as conn, conn:
+        conn.execute("UPDATE pending_writes SET first_enqueued_at = first_enqueued_at - 31")
+    # Still being edited, but pending for longer than the max delay
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="second"))
+    assert queue.process_batch() == 1
+    assert queue.written[0][0][2].startswith('{"page_content": "second"')
+
+
+def test_unknown_collection_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.enqueue_delete("unknown", "job-1")
+
+
+def test_failed_write_is_delayed(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    fail_writes(queue)
+    with pytest.raises(RuntimeError):
+        queue.process_batch()
+
+    (row,) = pending(queue)
+    assert row["attempts"] == 1
+    assert row["claimed_by"] is None
+    assert row["not_before"] >= time.time() + 50
+    # Not claimed again before its retry time
+    assert queue.process_batch() == 0
+
+
+def test_backoff_doubles(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    fail_writes(queue)
+    for _ in range(2):
+        make_due(queue)
+        with pytest.raises(RuntimeError):
+            queue.process_batch()
+
+    (row,) = pending(queue)
+    assert row["attempts"] == 2
+    assert row["not_before"] >= time.time() + 110
+
+
+def test_failing_write_moves_to_dead_letter(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    fail_writes(queue)
+    for _ in range(queue.max_attempts):
+        make_due(queue)
+        with pytest.raises(RuntimeError):
+            queue.process_batch()
+
+    assert pending(queue) == []
+    with closing(queue._connect()) as conn:
+        (dead,) = conn.execute("SELECT * FROM dead_writes").fetchall()
+    assert (dead["doc_id"], dead["attempts"]) == ("job-1", 3)
+    assert dead["error"] == "vector store down"
+    assert queue.stats()["dead"] == 1
+
+
+def test_new_update_resets_attempts(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="first"))
+    fail_writes(queue)
+    with pytest.raises(RuntimeError):
+        queue.process_batch()
+
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="second"))
+    (row,) = pending(queue)
+    assert (row["attempts"], row["not_before"]) == (0, 0)
+
+
+def test_one_bad_document_does_not_hold_back_the_batch(queue):
+    queue.enqueue_upsert(JOB_COLLECTION, "job-1", Document(page_content="bad"))
+    queue.enqueue_upsert(JOB_COLLECTION, "job-2", Document(page_content="good"))
+    written = []
+
+    def write(rows):
+        if any(row["doc_id"] == "job-1" for row in rows):
+            raise RuntimeError("bad document")
+        written.extend(row["doc_id"] for row in rows)
+
+    queue._write = write
+    assert queue.process_batch() == 1
+    assert written == ["job-2"]
+    assert [row["doc_id"] for row in pending(queue)] == ["job-1"]
+
+
+def test_queue_files_without_retry_delay_are_migrated(tmp_path):
+    path = str(tmp_path / "write_queue.sqlite3")
+    with closing(sqlite3.connect(path)) as conn:
+        conn.execute(
+            """
+            CREATE TABLE pending_writes (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                op TEXT NOT NULL,
+                payload TEXT,
+                first_enqueued_at REAL NOT NULL,
+                enqueued_at REAL NOT NULL,
+                updates INTEGER NOT NULL DEFAULT 1,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                claimed_by TEXT,
+                claimed_at REAL,
+                PRIMARY KEY (collection, doc_id)
+            )
+            """
+        )
+    queue = WriteQueue(path, debounce_seconds=0)
+    queue.enqueue_delete(JOB_COLLECTION, "job-1")
+    assert pending(queue)[0]["not_before"] == 0